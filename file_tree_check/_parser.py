@@ -7,6 +7,13 @@ import os
 from pathlib import Path
 from typing import Sequence
 
+from .inodeTracker import SYMLINK_POLICIES
+from .measureRegistry import MEASURES, set_annex_sizes
+from .sidecarReader import register_sidecar_measures
+
+# Measures with their own option and flag, the other registered ones are selected by name
+BASE_MEASURES = ("file_count", "dir_count", "file_size", "modified_time")
+
 
 class Parser:
     """Class to parse command line arguments and configuration file."""
@@ -31,20 +38,43 @@ class Parser:
         self.file_size_rounding_percentage = 0
         self.modified_time = False
         self.modified_time_rounding_margin = 0
+        self.extra_measures = []
+        self.checksum_processes = 1
+        self.checksum_cache_path = None
+        self.sidecar_keys = []
+        self.sidecar_processes = 1
+        self.sidecar_cache_path = None
+        self.annex_sizes = False
         self.measures = []
         # Output
         self.create_summary = False
         self.summary_path = None
+        self.summary_max_outliers = 0
+        self.summary_list_common = True
+        self.create_json_summary = False
+        self.json_summary_path = None
         self.create_tree = False
         self.tree_path = None
+        self.collapse_tree = False
+        self.background_writers = False
+        self.writer_queue_size = 64
         self.create_csv = False
         self.csv_path = None
+        self.stream_csv = False
+        self.sort_csv = False
+        self.create_columnar = False
+        self.columnar_path = None
+        self.columnar_format = "parquet"
         self.create_plots = False
         self.plots_path = None
         self.num_plots = 0
         self.print_plots = False
         self.save_plots = False
+        self.fast_plots = False
+        self.figure_per_measure = False
+        self.plot_processes = 1
         self.pipe_data = False
+        self.pipe_format = "csv"
         self.output_dir = None
         # Configurations
         self.get_configurations = False
@@ -54,6 +84,27 @@ class Parser:
         self.range_end = -1
         self.limit_depth = False
         self.depth_limit = -1
+        self.cluster_configurations = False
+        self.cluster_similarity = 0.8
+        self.compare_subtrees = False
+        self.subtree_measures = False
+        # Checks
+        self.run_checks = False
+        self.checks_path = "./results/Checks.txt"
+        self.check_identifiers = ""
+        self.check_min_size = None
+        self.check_required_permissions = None
+        self.check_forbidden_permissions = None
+        self.check_uid = None
+        self.check_gid = None
+        self.check_min_file_count = None
+        self.check_max_file_count = None
+        # Duplicates
+        self.find_duplicates = False
+        self.duplicates_path = "./results/Duplicates.txt"
+        self.duplicate_min_size = 1
+        self.duplicate_boundary_placeholder = None
+        self.duplicate_boundary_depth = 1
         # Logging
         self.log_level = 0
         self.log_path = None
@@ -61,6 +112,14 @@ class Parser:
         self.debug = False
         # Input
         self.root_path = None
+        self.async_traversal = False
+        self.traversal_concurrency = 128
+        self.symlink_policy = "follow"
+        self.hard_links_once = False
+        self.listing_path = None
+        self.listing_sorted = False
+        self.archive_path = None
+        self.archive_root = ""
         self.file_tree_path = None
         # To Be Deprecated
         self.regex_file = ""
@@ -86,6 +145,36 @@ class Parser:
             "-r", "--root", type=Path, help="Path to root directory to be explored."
         )
         parser.add_argument("-f", "--file_tree", type=Path, help="Path to file tree to be used.")
+        parser.add_argument(
+            "-ac",
+            "--async_concurrency",
+            type=int,
+            help="Specify the number of filesystem requests in flight for asynchronous traversal.",
+        )
+        parser.add_argument(
+            "-sl",
+            "--symlinks",
+            choices=SYMLINK_POLICIES,
+            help="Whether to follow, skip or only record the symbolic links to directories.",
+        )
+        parser.add_argument(
+            "-hl",
+            "--hard_links_once",
+            help="If toggled then the size of files with several hard links is counted once.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-il",
+            "--listing",
+            type=Path,
+            help="Path to a listing file (e.g. from find -printf) read instead of the filesystem.",
+        )
+        parser.add_argument(
+            "-ia",
+            "--archive",
+            type=Path,
+            help="Path to a tar or zip archive whose members are read instead of the filesystem.",
+        )
         # Only ask for search criteria if none given assume option is off,
         #  as search does not work, won't add for now
         # parser.add_argument("-s", "--search", type=str,
@@ -130,6 +219,31 @@ class Parser:
             help="If toggled then modified_time measure will on.",
             action="store_true",
         )
+        parser.add_argument(
+            "-mx",
+            "--measures",
+            nargs="+",
+            choices=[name for name in MEASURES if name not in BASE_MEASURES],
+            help="Names of other measures to turn on, e.g. allocated_size link_count.",
+        )
+        parser.add_argument(
+            "-mcp",
+            "--checksum_processes",
+            type=int,
+            help="Turn on the checksum measure, computed by the given number of processes.",
+        )
+        parser.add_argument(
+            "-msk",
+            "--sidecar_keys",
+            nargs="+",
+            help="Keys of the JSON sidecars to measure, e.g. RepetitionTime EchoTime.",
+        )
+        parser.add_argument(
+            "-man",
+            "--annex_sizes",
+            help="If toggled then the size of git-annex files is read from their symlink.",
+            action="store_true",
+        )
         parser.add_argument(
             "-mtr",
             "--time_round",
@@ -155,22 +269,93 @@ class Parser:
             help="If toggled then summary file will be created.",
             action="store_true",
         )
+        parser.add_argument(
+            "-osk",
+            "--summary_max_outliers",
+            type=int,
+            help="Specify how many outliers the summary lists per identifier, 0 to list all.",
+        )
+        parser.add_argument(
+            "-osc",
+            "--summary_count_common",
+            help="If toggled then the summary only counts the paths with the common value.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-oj",
+            "--json_summary",
+            help="If toggled then a JSON summary file will be created.",
+            action="store_true",
+        )
         parser.add_argument(
             "-ot",
             "--tree",
             help="If toggled then text tree file will be created.",
             action="store_true",
         )
+        parser.add_argument(
+            "-otc",
+            "--collapse_tree",
+            help="If toggled then identical subtrees are folded in the text tree.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-obw",
+            "--background_writers",
+            help="If toggled then the outputs are written by threads during the exploration.",
+            action="store_true",
+        )
         parser.add_argument(
             "-oc", "--csv", help="If toggled then csv file will be created.", action="store_true"
         )
-        # plots commands to be added later
+        parser.add_argument(
+            "-ocs",
+            "--stream_csv",
+            help="If toggled then csv rows will be written during the exploration.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-ocss",
+            "--sort_csv",
+            help="If toggled then the streamed csv will be sorted by identifier once complete.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-ocol",
+            "--columnar",
+            help="If toggled then a columnar (Parquet or Arrow) data file will be created.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-pl",
+            "--plots",
+            help="If toggled then the distribution plots will be created.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-plf",
+            "--fast_plots",
+            help="If toggled then plots are binned with numpy and saved without being shown.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-plp",
+            "--plot_processes",
+            type=int,
+            help="Specify the number of processes rendering one plot figure per measure.",
+        )
         parser.add_argument(
             "-p",
             "--pipe_data",
             help="If toggled then data will be piped to stdout.",
             action="store_true",
         )
+        parser.add_argument(
+            "-pf",
+            "--pipe_format",
+            choices=["csv", "ndjson", "binary"],
+            help="Specify the format of the data piped to stdout.",
+        )
         # Configurations
         parser.add_argument(
             "-gc",
@@ -191,9 +376,35 @@ class Parser:
             nargs=2,
             help="Specify range of depths for directory exploration.",
         )
+        parser.add_argument(
+            "-cc",
+            "--cluster_similarity",
+            type=float,
+            help="Specify the similarity (0 to 1) above which configurations are clustered.",
+        )
+        parser.add_argument(
+            "-cst",
+            "--compare_subtrees",
+            help="If toggled then the whole content of configuration directories is compared.",
+            action="store_true",
+        )
         parser.add_argument(
             "-dl", "--depth_limit", type=int, help="Specify depth limit for directory exploration."
         )
+        # Checks
+        parser.add_argument(
+            "-ck",
+            "--checks",
+            help="If toggled then the rules of the Checks section are checked on each path.",
+            action="store_true",
+        )
+        # Duplicates
+        parser.add_argument(
+            "-dup",
+            "--duplicates",
+            help="If toggled then the files with identical content are reported.",
+            action="store_true",
+        )
         # Logging
         parser.add_argument("-l", "--log", type=Path, help="Path to log file.")
         parser.add_argument("-ll", "--log_level", type=int, help="Specify log level.")
@@ -237,19 +448,60 @@ class Parser:
         self.modified_time_rounding_margin = config["Measures_Averaging"].getint(
             "time_rounding_seconds"
         )
+        self.extra_measures = [
+            name
+            for name in MEASURES
+            if name not in BASE_MEASURES and config["Measures"].getboolean(name, fallback=False)
+        ]
+        self.checksum_processes = config["Measures"].getint("checksum_processes", fallback=1)
+        self.checksum_cache_path = (
+            config["Measures"].get("checksum_cache_path", fallback="") or None
+        )
+        self.sidecar_keys = [
+            key.strip()
+            for key in config["Measures"].get("sidecar_keys", fallback="").split(",")
+            if key.strip()
+        ]
+        self.sidecar_processes = config["Measures"].getint("sidecar_processes", fallback=1)
+        self.sidecar_cache_path = config["Measures"].get("sidecar_cache_path", fallback="") or None
+        self.annex_sizes = config["Measures"].getboolean("annex_sizes", fallback=False)
         # Output
         self.create_summary = config["Output"].getboolean("create_summary")
         self.summary_path = config["Output"]["summary_path"]
+        self.summary_max_outliers = config["Output"].getint("summary_max_outliers", fallback=0)
+        self.summary_list_common = config["Output"].getboolean("summary_list_common", fallback=True)
+        self.create_json_summary = config["Output"].getboolean(
+            "create_json_summary", fallback=False
+        )
+        self.json_summary_path = config["Output"].get(
+            "json_summary_path", fallback="./results/Summary.json"
+        )
         self.create_tree = config["Output"].getboolean("create_text_tree")
         self.tree_path = config["Output"]["text_tree_path"]
+        self.collapse_tree = config["Output"].getboolean("collapse_text_tree", fallback=False)
+        self.background_writers = config["Output"].getboolean("background_writers", fallback=False)
+        self.writer_queue_size = config["Output"].getint("writer_queue_size", fallback=64)
         self.create_csv = config["Output"].getboolean("create_csv")
         self.csv_path = config["Output"]["csv_path"]
+        self.stream_csv = config["Output"].getboolean("stream_csv", fallback=False)
+        self.sort_csv = config["Output"].getboolean("sort_streamed_csv", fallback=False)
+        self.create_columnar = config["Output"].getboolean("create_columnar", fallback=False)
+        self.columnar_path = config["Output"].get(
+            "columnar_path", fallback="./results/Data.parquet"
+        )
+        self.columnar_format = config["Output"].get("columnar_format", fallback="parquet")
         self.create_plots = config["Output.Visualization"].getboolean("create_plots")
         self.plots_path = config["Output.Visualization"]["plots_path"]
-        self.num_plots = config["Output.Visualization"].getint("num_plots_per_measure")
+        self.num_plots = config["Output.Visualization"].getint("number_plot_per_measure")
         self.print_plots = config["Output.Visualization"].getboolean("print_plots")
         self.save_plots = config["Output.Visualization"].getboolean("save_plots")
+        self.fast_plots = config["Output.Visualization"].getboolean("fast_plots", fallback=False)
+        self.figure_per_measure = config["Output.Visualization"].getboolean(
+            "figure_per_measure", fallback=False
+        )
+        self.plot_processes = config["Output.Visualization"].getint("plot_processes", fallback=1)
         self.pipe_data = config["Output.Piping"].getboolean("pipe_data")
+        self.pipe_format = config["Output.Piping"].get("pipe_format", fallback="csv")
         # Configurations
         self.get_configurations = config["Configurations"].getboolean("get_configurations")
         self.target_depth = config["Configurations"].getint("target_depth")
@@ -260,12 +512,61 @@ class Parser:
         self.depth_limit = (
             config["Configurations"].getint("depth_limit") if self.limit_depth else None
         )
+        self.cluster_configurations = config["Configurations"].getboolean(
+            "cluster_configurations", fallback=False
+        )
+        self.cluster_similarity = config["Configurations"].getfloat(
+            "cluster_similarity", fallback=0.8
+        )
+        self.compare_subtrees = config["Configurations"].getboolean(
+            "compare_subtrees", fallback=False
+        )
+        self.subtree_measures = config["Configurations"].getboolean(
+            "subtree_measures", fallback=False
+        )
+        # Checks
+        if config.has_section("Checks"):
+            checks = config["Checks"]
+            self.run_checks = checks.getboolean("run_checks", fallback=False)
+            self.checks_path = checks.get("checks_path", fallback=self.checks_path)
+            self.check_identifiers = checks.get("check_identifiers", fallback="")
+            self.check_min_size = _get_optional_int(checks, "min_file_size")
+            self.check_required_permissions = _get_optional_int(
+                checks, "required_permissions", base=8
+            )
+            self.check_forbidden_permissions = _get_optional_int(
+                checks, "forbidden_permissions", base=8
+            )
+            self.check_uid = _get_optional_int(checks, "owner_uid")
+            self.check_gid = _get_optional_int(checks, "owner_gid")
+            self.check_min_file_count = _get_optional_int(checks, "min_files_per_directory")
+            self.check_max_file_count = _get_optional_int(checks, "max_files_per_directory")
+        # Duplicates
+        if config.has_section("Duplicates"):
+            duplicates = config["Duplicates"]
+            self.find_duplicates = duplicates.getboolean("find_duplicates", fallback=False)
+            self.duplicates_path = duplicates.get("duplicates_path", fallback=self.duplicates_path)
+            self.duplicate_min_size = duplicates.getint("duplicate_min_size", fallback=1)
+            self.duplicate_boundary_placeholder = (
+                duplicates.get("duplicate_boundary_placeholder", fallback="") or None
+            )
+            self.duplicate_boundary_depth = duplicates.getint(
+                "duplicate_boundary_depth", fallback=1
+            )
         # Logging
         self.log_level = config["Logging"]["log_level"]
         self.log_path = config["Logging"]["log_path"]
         # Input
         self.root_path = config["Input"]["root_path"]
         self.file_tree_path = config["Input"]["file_tree_path"]
+        self.async_traversal = config["Input"].getboolean("async_traversal", fallback=False)
+        self.traversal_concurrency = config["Input"].getint("traversal_concurrency", fallback=128)
+        self.symlink_policy = config["Input"].get("symlinked_directories", fallback="follow")
+        self.hard_links_once = config["Input"].getboolean("count_hard_links_once", fallback=False)
+        self.listing_path = config["Input"].get("listing_path", fallback="") or None
+        self.listing_sorted = config["Input"].getboolean("listing_sorted", fallback=False)
+        self.archive_path = config["Input"].get("archive_path", fallback="") or None
+        self.archive_root = config["Input"].get("archive_root", fallback="")
         # To Be Deprecated
         self.regex_file = config["Categorization"]["regular_expression_file"]
         self.regex_directory = config["Categorization"]["regular_expression_directory"]
@@ -280,10 +581,20 @@ class Parser:
             Path(output_dir).touch()
         if self.summary_path is not None and self.create_summary:
             self.summary_path = os.path.join(output_dir, Path(self.summary_path).name)
+        if self.json_summary_path is not None and self.create_json_summary:
+            self.json_summary_path = os.path.join(output_dir, Path(self.json_summary_path).name)
         if self.tree_path is not None and self.create_tree:
             self.tree_path = os.path.join(output_dir, Path(self.tree_path).name)
         if self.csv_path is not None and self.create_csv:
             self.csv_path = os.path.join(output_dir, Path(self.csv_path).name)
+        if self.columnar_path is not None and self.create_columnar:
+            self.columnar_path = os.path.join(output_dir, Path(self.columnar_path).name)
+        if self.plots_path is not None and self.create_plots:
+            self.plots_path = os.path.join(output_dir, Path(self.plots_path).name)
+        if self.run_checks:
+            self.checks_path = os.path.join(output_dir, Path(self.checks_path).name)
+        if self.find_duplicates:
+            self.duplicates_path = os.path.join(output_dir, Path(self.duplicates_path).name)
         if self.log_path is not None:
             self.log_path = os.path.join(output_dir, Path(self.log_path).name)
 
@@ -332,14 +643,55 @@ class Parser:
             self.measures.append("modified_time")
             if args.time_round is not None:
                 self.modified_time_rounding_margin = args.time_round
+        if args.checksum_processes is not None:
+            self.checksum_processes = args.checksum_processes
+            self.extra_measures.append("checksum")
+        if args.sidecar_keys:
+            self.sidecar_keys = args.sidecar_keys
+        if args.annex_sizes:
+            self.annex_sizes = True
+        set_annex_sizes(self.annex_sizes)
+        for name in (
+            self.extra_measures
+            + (args.measures or [])
+            + register_sidecar_measures(self.sidecar_keys)
+        ):
+            if name not in self.measures:
+                self.measures.append(name)
         if args.summary:
             self.create_summary = True
+        if args.summary_max_outliers is not None:
+            self.summary_max_outliers = args.summary_max_outliers
+        if args.summary_count_common:
+            self.summary_list_common = False
+        if args.json_summary:
+            self.create_json_summary = True
         if args.tree:
             self.create_tree = True
+        if args.collapse_tree:
+            self.collapse_tree = True
+        if args.background_writers:
+            self.background_writers = True
         if args.csv:
             self.create_csv = True
+        if args.stream_csv:
+            self.stream_csv = True
+        if args.sort_csv:
+            self.sort_csv = True
+        if args.columnar:
+            self.create_columnar = True
+        if args.plots:
+            self.create_plots = True
+        if args.fast_plots:
+            self.fast_plots = True
+        if args.plot_processes is not None:
+            self.figure_per_measure = True
+            self.plot_processes = args.plot_processes
         if args.pipe_data:
             self.pipe_data = True
+        if args.pipe_format is not None:
+            self.pipe_data = True
+            self.pipe_format = args.pipe_format
         if args.get_configurations:
             self.get_configurations = True
         if args.target_depth is not None:
@@ -348,6 +700,15 @@ class Parser:
             self.use_depth_range = True
             self.range_start = args.depth_range[0]
             self.range_end = args.depth_range[1]
+        if args.cluster_similarity is not None:
+            self.cluster_configurations = True
+            self.cluster_similarity = args.cluster_similarity
+        if args.compare_subtrees:
+            self.compare_subtrees = True
+        if args.checks:
+            self.run_checks = True
+        if args.duplicates:
+            self.find_duplicates = True
         if args.depth_limit is not None:
             self.limit_depth = True
             self.depth_limit = args.depth_limit
@@ -363,8 +724,33 @@ class Parser:
             self.debug = args.debug
         if args.root is not None:
             self.root_path = args.root
+        if args.async_concurrency is not None:
+            self.async_traversal = True
+            self.traversal_concurrency = args.async_concurrency
+        if args.symlinks is not None:
+            self.symlink_policy = args.symlinks
+        if args.hard_links_once:
+            self.hard_links_once = True
+        if args.listing is not None:
+            self.listing_path = args.listing
+        if args.archive is not None:
+            self.archive_path = args.archive
+        if self.archive_path is not None:
+            # The archive is explored like a directory at its path
+            self.root_path = Path(self.archive_path, self.archive_root)
         if args.file_tree is not None:
             self.file_tree_handler(args.file_tree)
         else:
             cwd = Path.cwd()
             self.file_tree_path = cwd / self.file_tree_path
+
+
+def _get_optional_int(
+    section: configparser.SectionProxy, option: str, base: int = 10
+) -> int | None:
+    """Read an integer option, None when it is missing or left empty.
+
+    Permission masks are written in octal, e.g. 440, and are read with base=8.
+    """
+    value = section.get(option, fallback="").strip()
+    return int(value, base) if value else None
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import stat
+import tarfile
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Iterator
+
+from file_tree import FileTree
+
+from .csvStreamer import SORT_CHUNK_ROWS
+from .listingInput import generate_tree_from_lines
+
+logger = logging.getLogger(f"file_tree_check.{__name__}")
+
+
+def _member_name(name: str) -> str:
+    """Return the name of an archive member relative to the archive, without './' or '/'."""
+    parts = [part for part in PurePosixPath(name).parts if part not in ("/", ".")]
+    return "/".join(parts)
+
+
+def _listing_line(path: str, is_dir: bool, size: int, mtime: float, mode: int) -> str:
+    permissions = f"{stat.S_IMODE(mode):o}" if stat.S_IMODE(mode) else ""
+    return f"{path}\t{'d' if is_dir else 'f'}\t{size}\t{mtime}\t{permissions}\n"
+
+
+def _tar_members(archive_path: Path) -> Iterator[tuple[str, bool, int, float, int]]:
+    # Read as a stream: the member headers are read one after the other, the data is skipped
+    # (compressed archives are still decompressed on the way)
+    with tarfile.open(archive_path, "r|*") as archive:
+        while True:
+            member = archive.next()
+            if member is None:
+                break
+            # next() appends each member read to archive.members, they are not needed again
+            archive.members.clear()
+            yield member.name, member.isdir(), member.size, float(member.mtime), member.mode
+
+
+def _zip_members(archive_path: Path) -> Iterator[tuple[str, bool, int, float, int]]:
+    # Only the central directory at the end of the archive is read
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            mtime = time.mktime(info.date_time + (0, 0, -1))
+            yield info.filename, info.is_dir(), info.file_size, mtime, info.external_attr >> 16
+
+
+def archive_members(archive_path: str | Path) -> Iterator[tuple[str, bool, int, float, int]]:
+    """Read the name, type, size, modification time and mode of the members of an archive.
+
+    Zip archives and tar archives, compressed or not, are supported.
+    Only the headers of the members are read, nothing is extracted.
+
+    Raises
+    ------
+    ValueError
+        If the file is neither a zip nor a tar archive.
+    """
+    if zipfile.is_zipfile(archive_path):
+        return _zip_members(archive_path)
+    try:
+        is_tar = tarfile.is_tarfile(archive_path)
+    except OSError:
+        is_tar = False
+    if not is_tar:
+        raise ValueError(f"{archive_path} is neither a zip nor a tar archive")
+    return _tar_members(archive_path)
+
+
+def archive_listing(archive_path: str | Path) -> Iterator[str]:
+    """Write the members of an archive as listing lines, see listingInput.parse_listing_line().
+
+    The paths are the ones of the members under the archive's path, the archive itself
+    being the root directory. The directories without a member of their own,
+    only present in the names of other members, are added with the archive's
+    modification time.
+    """
+    archive_path = Path(archive_path)
+    archive_stat = os.stat(archive_path)
+    root = str(archive_path).rstrip("/") or "/"
+    yield _listing_line(root, True, 0, archive_stat.st_mtime, 0)
+    directories = set()
+    implicit_directories = set()
+    for name, is_dir, size, mtime, mode in archive_members(archive_path):
+        name = _member_name(name)
+        if not name:
+            continue
+        if re.search(r"[\t\n]", name):
+            logger.warning(
+                f"Skipping the member {name!r} of {archive_path}, its name has a tab or a newline"
+            )
+            continue
+        if is_dir:
+            directories.add(name)
+        implicit_directories.update(str(parent) for parent in PurePosixPath(name).parents)
+        yield _listing_line(f"{root}/{name}", is_dir, size, mtime, mode)
+    for name in sorted(implicit_directories - directories - {"."}):
+        yield _listing_line(f"{root}/{name}", True, 0, archive_stat.st_mtime, 0)
+
+
+def generate_tree_from_archive(
+    archive_path: str | Path,
+    archive_root: str = "",
+    criteria: re.Pattern | None = None,
+    filter_files: bool = False,
+    filter_dir: bool = False,
+    filter_hidden: bool = False,
+    depth_limit: int = None,
+    ignore: list = None,
+    file_tree: FileTree = None,
+    digests: bool = False,
+    digest_measures: list[str] = (),
+    chunk_rows: int = SORT_CHUNK_ROWS,
+):
+    """Create a SmartPath generator like generate_tree(), from the members of an archive.
+
+    The index of the archive is read as a listing (see archive_listing()) and explored
+    like generate_tree_from_listing() does, so the paths are those of a directory
+    at the archive's path, without anything being extracted.
+    The measures using the "stat" and "listing" inputs (file_size, modified_time,
+    file_count, dir_count, mode, ...) are taken from the member headers,
+    the ones reading the content of files can not be computed.
+
+    Parameters
+    ----------
+    archive_path: string or pathlib.Path
+        Path to a zip or tar (optionally gzip, bzip2 or xz compressed) archive.
+
+    archive_root: string
+        Directory inside the archive to explore, '' for the whole archive.
+
+    criteria, filter_files, filter_dir, filter_hidden, depth_limit, ignore, file_tree,
+    digests, digest_measures:
+        See generate_tree().
+
+    chunk_rows: int
+        Maximum number of members held in memory while sorting the index.
+
+    Yields
+    ------
+    SmartPath
+        Each file and directory of the archive, in the same order as generate_tree()
+        on the extracted archive.
+    """
+    root = Path(archive_path) / archive_root if archive_root else Path(archive_path)
+    yield from generate_tree_from_lines(
+        archive_listing(archive_path),
+        root,
+        criteria=criteria,
+        filter_files=filter_files,
+        filter_dir=filter_dir,
+        filter_hidden=filter_hidden,
+        depth_limit=depth_limit,
+        ignore=ignore,
+        file_tree=file_tree,
+        digests=digests,
+        digest_measures=digest_measures,
+        chunk_rows=chunk_rows,
+    )
@@ -0,0 +1,450 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from file_tree import FileTree
+
+from .inodeTracker import InodeTracker
+from .smartDirectoryPath import SmartDirectoryPath
+from .smartFilePath import SmartFilePath
+
+# Default maximum number of listing and stat requests in flight at once
+TRAVERSAL_CONCURRENCY = 128
+# Listings requested or waiting to be taken by the exploration, per request in flight
+PREFETCH_WINDOW_FACTOR = 4
+
+
+class LocalFilesystem:
+    """The blocking filesystem calls made by the asynchronous traversal."""
+
+    def list_directory(self, path: Path) -> list[tuple[Path, bool]]:
+        """Return the path of each entry of a directory and whether it is a directory."""
+        with os.scandir(path) as entries:
+            return [(Path(entry.path), entry.is_dir()) for entry in entries]
+
+    def stat(self, path: Path) -> os.stat_result:
+        return os.stat(path)
+
+
+class LatencyFilesystem(LocalFilesystem):
+    """Local filesystem adding a delay to every call, like the round trip of a network filesystem.
+
+    Used to test and measure the asynchronous traversal without a network mount.
+
+    Attributes
+    ----------
+    latency: float
+        Delay in seconds added to each call.
+
+    call_count: int
+        Number of calls made so far.
+    """
+
+    def __init__(self, latency: float = 0.001):
+        self.latency = latency
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+    def _wait(self) -> None:
+        with self._lock:
+            self.call_count += 1
+        time.sleep(self.latency)
+
+    def list_directory(self, path: Path) -> list[tuple[Path, bool]]:
+        self._wait()
+        return super().list_directory(path)
+
+    def stat(self, path: Path) -> os.stat_result:
+        self._wait()
+        return super().stat(path)
+
+
+def is_selected(
+    path: Path,
+    is_dir: bool,
+    criteria: re.Pattern | None = None,
+    filter_files: bool = False,
+    filter_dir: bool = False,
+    filter_hidden: bool = False,
+    ignore: list = (),
+) -> bool:
+    """Whether an entry of a directory is kept by the search criteria and the ignore filters."""
+    if criteria is not None and not (
+        criteria.match(str(path.name)) is not None
+        or (is_dir and not filter_dir)
+        or (not is_dir and not filter_files)
+    ):
+        return False
+    return not (
+        any(path.name == ignore_name for ignore_name in ignore)
+        or (path.name.startswith(".") and filter_hidden)
+    )
+
+
+def select_children(
+    smart_root: SmartDirectoryPath,
+    entries: list[tuple[Path, bool, os.stat_result | None]],
+    criteria: re.Pattern | None = None,
+    filter_files: bool = False,
+    filter_dir: bool = False,
+    filter_hidden: bool = False,
+    ignore: list = None,
+    file_tree: FileTree = None,
+    inode_tracker: InodeTracker | None = None,
+) -> None:
+    """Create the SmartPath of the entries of a directory kept by the filters, as its children.
+
+    This is shared by generate_tree() and generate_tree_async() so both create the same paths.
+
+    Parameters
+    ----------
+    smart_root: SmartDirectoryPath
+        The directory.
+
+    entries: list of tuple
+        The path of each entry of the directory, whether it is a directory,
+        and its stat result if it was fetched ahead of time (None otherwise).
+
+    criteria, filter_files, filter_dir, filter_hidden, ignore, file_tree, inode_tracker:
+        See generate_tree().
+    """
+    logger = logging.getLogger("file_tree_check")
+    if criteria is not None:
+        entries = [
+            entry
+            for entry in entries
+            if is_selected(entry[0], entry[1], criteria, filter_files, filter_dir)
+        ]
+    entries = sorted(entries, key=lambda entry: str(entry[0]).lower())
+    # The entries ignored are left out first, so the last one kept is the last child
+    entries = [
+        (path, is_dir, stat_result)
+        for path, is_dir, stat_result in entries
+        if is_selected(path, is_dir, filter_hidden=filter_hidden, ignore=ignore)
+        and (inode_tracker is None or inode_tracker.keeps(path, is_dir))
+    ]
+
+    for count, (path, is_dir, stat_result) in enumerate(entries, start=1):
+        try:
+            # Check if this path is the last children in its parent's directory
+            is_last = count == len(entries)
+            if is_dir:
+                smart_child = SmartDirectoryPath(path, smart_root, is_last, file_tree)
+            else:
+                smart_child = SmartFilePath(path, smart_root, is_last, file_tree)
+            smart_child._stat = stat_result
+            smart_root.add_children(smart_child)
+        except FileNotFoundError as e:
+            logger.warning("FileNotFoundError", e)
+            continue
+
+
+def unexplored(
+    directory: SmartDirectoryPath,
+    inode_tracker: InodeTracker | None,
+    digests: bool = False,
+    digest_measures: list[str] = (),
+) -> bool:
+    """Return whether the inode tracker leaves the content of a directory unexplored.
+
+    This is shared by generate_tree() and generate_tree_async().
+    The root of the exploration is always explored.
+    The directory left unexplored has its explored attribute set to False,
+    and its digest is the one of an empty directory.
+    """
+    if inode_tracker is None or directory.parent is None or inode_tracker.explore(directory):
+        return False
+    directory.explored = False
+    if digests:
+        directory.compute_digest(digest_measures)
+    return True
+
+
+class _Prefetcher:
+    """Fetch directory listings and stats ahead of the exploration, on an asyncio event loop.
+
+    The event loop runs in its own thread and sends the blocking calls to a thread pool,
+    with at most `concurrency` of them in flight. As soon as a directory is listed,
+    the listing of each of its selected subdirectories is requested,
+    so the requests of many directories overlap instead of being made one at a time.
+
+    At most concurrency * PREFETCH_WINDOW_FACTOR listings are requested ahead, counting
+    the ones fetched but not yet taken by the exploration, so the prefetcher does not run
+    the whole tree ahead and hold its listings in memory. The other directories found
+    wait in a queue, in the order the exploration reaches them,
+    and a listing is requested from it each time the exploration takes one.
+    """
+
+    def __init__(
+        self,
+        filesystem,
+        concurrency: int,
+        depth_limit: int | None,
+        select,
+        stats: bool,
+        inode_tracker: InodeTracker | None = None,
+    ):
+        self.filesystem = filesystem
+        self.concurrency = concurrency
+        self.depth_limit = depth_limit
+        self.select = select
+        self.stats = stats
+        # Its own tracker: the directories are claimed in the order they are listed,
+        # only the exploration's tracker decides which ones are explored
+        self.inode_tracker = inode_tracker
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.semaphore = None
+        self.window = concurrency * PREFETCH_WINDOW_FACTOR
+        self.tasks = {}
+        # Directories found but not requested yet: a heap in exploration order,
+        # the ones still waiting (not taken directly by the exploration) are in _pending
+        self._queue = []
+        self._pending = set()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def _call(self, function, *args):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        async with self.semaphore:
+            return await self.loop.run_in_executor(self.executor, function, *args)
+
+    def _schedule(self, path: Path, depth: int) -> asyncio.Task:
+        task = self.loop.create_task(self._list(path, depth))
+        self.tasks[path] = task
+        return task
+
+    def _fill(self) -> None:
+        """Request the next directories of the queue, up to the window."""
+        while self._queue and len(self.tasks) < self.window:
+            _, path, depth = heapq.heappop(self._queue)
+            if path in self._pending:
+                self._pending.discard(path)
+                self._schedule(path, depth)
+
+    async def _list(self, path: Path, depth: int) -> list[tuple[Path, bool, os.stat_result]]:
+        entries = await self._call(self.filesystem.list_directory, path)
+        selected = [self.select(entry_path, is_dir) for entry_path, is_dir in entries]
+        stats = [None] * len(entries)
+        if self.stats:
+            results = iter(
+                await asyncio.gather(
+                    *(
+                        self._call(self.filesystem.stat, entry_path)
+                        for (entry_path, _), keep in zip(entries, selected)
+                        if keep
+                    ),
+                    return_exceptions=True,
+                )
+            )
+            stats = [next(results) if keep else None for keep in selected]
+            # Failed stats are left for the exploration to make again and report
+            stats = [None if isinstance(stat, BaseException) else stat for stat in stats]
+        if self.depth_limit is None or depth + 1 < self.depth_limit:
+            directories = [
+                entry_path
+                for (entry_path, is_dir), keep in zip(entries, selected)
+                if is_dir and keep
+            ]
+            if self.inode_tracker is not None:
+                # Symbolic link loops and directories already listed are not listed again
+                claimed = await asyncio.gather(
+                    *(self._call(self.inode_tracker.claim_directory, path) for path in directories)
+                )
+                directories = [path for path, claim in zip(directories, claimed) if claim]
+            for directory in directories:
+                # Siblings are explored in the lowercase order of their path (select_children)
+                key = tuple(part.lower() for part in directory.parts)
+                heapq.heappush(self._queue, (key, directory, depth + 1))
+                self._pending.add(directory)
+            self._fill()
+        return [(entry_path, is_dir, stat) for (entry_path, is_dir), stat in zip(entries, stats)]
+
+    async def _take(self, path: Path, depth: int):
+        task = self.tasks.pop(path, None)
+        if task is None:
+            # Reached before its turn in the queue, it is not requested again from it
+            self._pending.discard(path)
+            task = self.loop.create_task(self._list(path, depth))
+        self._fill()
+        return await task
+
+    def listing(self, path: Path, depth: int) -> list[tuple[Path, bool, os.stat_result]]:
+        """Wait for the listing of a directory, requesting it if it was not already."""
+        return asyncio.run_coroutine_threadsafe(self._take(path, depth), self.loop).result()
+
+    async def _cancel(self) -> None:
+        tasks = list(self.tasks.values())
+        self.tasks.clear()
+        self._queue.clear()
+        self._pending.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._cancel(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.executor.shutdown(wait=True)
+
+
+def generate_tree_async(
+    root: str | Path,
+    criteria: re.Pattern | None = None,
+    filter_files: bool = False,
+    filter_dir: bool = False,
+    filter_hidden: bool = False,
+    depth_limit: int = None,
+    ignore: list = None,
+    file_tree: FileTree = None,
+    digests: bool = False,
+    digest_measures: list[str] = (),
+    concurrency: int = TRAVERSAL_CONCURRENCY,
+    filesystem: LocalFilesystem | None = None,
+    prefetch_stats: bool = True,
+    inode_tracker: InodeTracker | None = None,
+):
+    """Create a SmartPath generator like generate_tree(), fetching the filesystem data ahead.
+
+    On network filesystems each listing or stat call waits for a round trip to the server.
+    Here the listings of the directories, and the stats of their content, are requested
+    by an asyncio event loop as soon as the directories are found, with up to `concurrency`
+    requests in flight, while the paths already fetched are yielded and measured.
+    The paths are the same and in the same order as the ones of generate_tree(),
+    so the generator can be given to get_data_from_paths() in the same way.
+
+    Parameters
+    ----------
+    root, criteria, filter_files, filter_dir, filter_hidden, depth_limit, ignore, file_tree,
+    digests, digest_measures, inode_tracker:
+        See generate_tree().
+
+    concurrency: int
+        Maximum number of listing and stat requests in flight at once.
+
+    filesystem: LocalFilesystem
+        The object making the blocking filesystem calls, e.g. a LatencyFilesystem for tests.
+        Defaults to the local filesystem.
+
+    prefetch_stats: bool
+        Whether to also fetch the stat of each file and directory, used by the measures
+        with the "stat" input (see measureRegistry) and by the checks.
+        Not needed when none of them is used.
+
+    Yields
+    ------
+    SmartPath
+        Each file and directory, in the same order as generate_tree().
+    """
+    ignore = ignore if ignore is not None else []
+
+    def select(path: Path, is_dir: bool) -> bool:
+        return is_selected(path, is_dir, criteria, filter_files, filter_dir, filter_hidden, ignore)
+
+    smart_root = SmartDirectoryPath(
+        root, parent_smart_path=None, is_last=False, file_tree=file_tree
+    )
+    prefetch_tracker = None
+    if inode_tracker is not None:
+        inode_tracker.visit_root(smart_root)
+        prefetch_tracker = inode_tracker.copy()
+        prefetch_tracker.visit_root(smart_root)
+    prefetcher = _Prefetcher(
+        filesystem if filesystem is not None else LocalFilesystem(),
+        concurrency,
+        depth_limit,
+        select,
+        prefetch_stats,
+        prefetch_tracker,
+    )
+    try:
+        yield from _generate_prefetched(
+            smart_root,
+            prefetcher,
+            criteria,
+            filter_files,
+            filter_dir,
+            filter_hidden,
+            depth_limit,
+            ignore,
+            file_tree,
+            digests,
+            digest_measures,
+            inode_tracker,
+        )
+    finally:
+        prefetcher.close()
+
+
+def _generate_prefetched(
+    smart_root: SmartDirectoryPath,
+    prefetcher: _Prefetcher,
+    criteria: re.Pattern | None,
+    filter_files: bool,
+    filter_dir: bool,
+    filter_hidden: bool,
+    depth_limit: int | None,
+    ignore: list,
+    file_tree: FileTree,
+    digests: bool,
+    digest_measures: list[str],
+    inode_tracker: InodeTracker | None = None,
+):
+    if depth_limit is not None and smart_root.depth >= depth_limit:
+        return
+    if unexplored(smart_root, inode_tracker, digests, digest_measures):
+        yield smart_root
+        return
+    entries = prefetcher.listing(smart_root.path, smart_root.depth)
+    # Kept for the measures with the "listing" input, so the directory is not listed again
+    smart_root._listing = [(path.name, is_dir) for path, is_dir, _ in entries]
+    select_children(
+        smart_root,
+        entries,
+        criteria,
+        filter_files,
+        filter_dir,
+        filter_hidden,
+        ignore,
+        file_tree,
+        inode_tracker,
+    )
+    yield smart_root
+    logger = logging.getLogger("file_tree_check")
+    for child in smart_root.children:
+        try:
+            if isinstance(child, SmartDirectoryPath):
+                yield from _generate_prefetched(
+                    child,
+                    prefetcher,
+                    criteria,
+                    filter_files,
+                    filter_dir,
+                    filter_hidden,
+                    depth_limit,
+                    ignore,
+                    file_tree,
+                    digests,
+                    digest_measures,
+                    inode_tracker,
+                )
+            else:
+                if inode_tracker is not None:
+                    inode_tracker.track_file(child)
+                yield child
+        except FileNotFoundError as e:
+            logger.warning("FileNotFoundError", e)
+            continue
+    if digests:
+        smart_root.compute_digest(digest_measures)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+from .smartPath import SmartPath
+
+# Maximum number of batches waiting to be written by each writer thread
+WRITER_QUEUE_SIZE = 64
+# Number of items given to the writer thread at once
+WRITER_BATCH_SIZE = 256
+
+
+class BackgroundWriter:
+    """Give the items of an output to a dedicated thread that writes them, through a bounded queue.
+
+    Writing to a slow disk, or to a pipe read by a slow consumer, then overlaps with
+    the exploration instead of stalling it. Items are sent to the thread by batches of
+    batch_size to limit the cost of the queue. When queue_size batches are already waiting,
+    the exploration waits for the writer thread: the time spent waiting is the stall time
+    reported in the debug log once the writer is closed, along with the largest queue depth.
+
+    Items are written in the order they were given. If writing an item fails,
+    the following ones are discarded and the error is raised by write() or close().
+
+    Attributes
+    ----------
+    name: string
+        Name of the output, used for the thread and the logs.
+
+    item_count: int
+        Number of items given to the writer so far.
+
+    max_queue_depth: int
+        Largest number of batches found waiting in the queue.
+
+    stall_count: int
+        Number of times the queue was full.
+
+    stall_time: float
+        Total time in seconds spent waiting for the queue to have room.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Any], Any],
+        name: str,
+        queue_size: int = WRITER_QUEUE_SIZE,
+        batch_size: int = WRITER_BATCH_SIZE,
+    ):
+        self.sink = sink
+        self.name = name
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.item_count = 0
+        self.max_queue_depth = 0
+        self.stall_count = 0
+        self.stall_time = 0.0
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+        self._batch = []
+        self._error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=f"{name} writer", daemon=True)
+        self._thread.start()
+
+    def write(self, item: Any) -> None:
+        """Add an item to be written by the writer thread."""
+        self._batch.append(item)
+        self.item_count += 1
+        if len(self._batch) >= self.batch_size:
+            self._put(self._batch)
+            self._batch = []
+
+    def _put(self, batch: list | None) -> None:
+        if self._error is not None:
+            raise self._error
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            start = time.perf_counter()
+            self._queue.put(batch)
+            self.stall_time += time.perf_counter() - start
+            self.stall_count += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def _run(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            # After an error, the batches are still taken out of the queue
+            # so the exploration is never blocked by a full queue
+            if self._error is not None:
+                continue
+            try:
+                for item in batch:
+                    self.sink(item)
+            except Exception as e:
+                self._error = e
+
+    def close(self) -> None:
+        """Write the remaining items and wait for the writer thread to finish."""
+        if not self._thread.is_alive():
+            return
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+        self._queue.put(None)
+        self._thread.join()
+        self.logger.debug(
+            f"{self.name} writer closed after {self.item_count} items: "
+            f"max queue depth {self.max_queue_depth}/{self.queue_size} batches, "
+            f"queue full {self.stall_count} times, stalled for {self.stall_time:.3f} s"
+        )
+        if self._error is not None:
+            raise self._error
+
+
+class BackgroundRowWriter(BackgroundWriter):
+    """BackgroundWriter giving its rows to a CsvStreamer or ColumnarWriter on the writer thread.
+
+    It has the same write_row() as the row writer it wraps, so it can be used in its place.
+    Closing it does not close the wrapped row writer.
+    """
+
+    def __init__(
+        self,
+        row_writer,
+        queue_size: int = WRITER_QUEUE_SIZE,
+        batch_size: int = WRITER_BATCH_SIZE,
+    ):
+        super().__init__(
+            lambda row: row_writer.write_row(*row),
+            type(row_writer).__name__,
+            queue_size=queue_size,
+            batch_size=batch_size,
+        )
+        self.row_writer = row_writer
+
+    def write_row(self, path: SmartPath, identifier: str, stats: dict) -> None:
+        self.write((path, identifier, stats))
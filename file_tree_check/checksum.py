@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .pathPool import POOL_WINDOW, PathPool, StatCache
+
+if TYPE_CHECKING:
+    from .smartPath import SmartPath
+
+CHECKSUM_ALGORITHM = "blake2b"
+# Size in bytes of the chunks read and hashed at once
+CHECKSUM_CHUNK_SIZE = 8 * 1024 * 1024
+# Files at least this large are memory mapped instead of read in chunks
+CHECKSUM_MMAP_SIZE = 64 * 1024 * 1024
+# Maximum number of paths held back while their checksum is computed by the pool
+CHECKSUM_WINDOW = POOL_WINDOW
+
+
+def hash_file(
+    path: str | Path,
+    algorithm: str = CHECKSUM_ALGORITHM,
+    chunk_size: int = CHECKSUM_CHUNK_SIZE,
+    mmap_size: int = CHECKSUM_MMAP_SIZE,
+) -> str:
+    """Return the hexadecimal checksum of the content of a file.
+
+    The file is read in chunks of chunk_size into a single reused buffer,
+    or memory mapped when it is at least mmap_size bytes, so the content is never
+    held in memory at once and no copy is made for each chunk.
+    hashlib releases the GIL while hashing large chunks.
+    """
+    hasher = hashlib.new(algorithm)
+    with open(path, "rb", buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        if size >= mmap_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, size, chunk_size):
+                        hasher.update(view[start : start + chunk_size])
+                finally:
+                    view.release()
+        else:
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+            while True:
+                read = file.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
+    return hasher.hexdigest()
+
+
+class ChecksumCache(StatCache):
+    """Checksums kept in an SQLite database between runs, keyed on the file's stat result.
+
+    A checksum is reused while the file has the same device, inode, size and modification
+    time (in nanoseconds), so only new or modified files are hashed again.
+    Each algorithm has its own checksum, see StatCache.
+
+    Attributes
+    ----------
+    path: pathlib.Path
+        Path to the database file, created if needed.
+
+    hits: int
+        Number of checksums found in the cache.
+
+    misses: int
+        Number of checksums not found in the cache.
+    """
+
+    table = "checksums"
+    columns = ("algorithm", "checksum")
+
+    def get(self, stat_result: os.stat_result, algorithm: str = CHECKSUM_ALGORITHM) -> str | None:
+        """Return the checksum of the file with this stat result, None if it is not cached."""
+        checksums = super().get(stat_result, [algorithm])
+        return checksums[algorithm] if checksums is not None else None
+
+    def put(
+        self, stat_result: os.stat_result, checksum: str, algorithm: str = CHECKSUM_ALGORITHM
+    ) -> None:
+        """Store the checksum of the file with this stat result."""
+        super().put(stat_result, {algorithm: checksum})
+
+
+class Checksummer(PathPool):
+    """Compute the checksum of the files found during the exploration on a process pool.
+
+    checksum_paths() wraps the SmartPath generator (see PathPool): the files are sent
+    to the pool as soon as they are found, and each path is yielded, in the original order,
+    once its checksum is stored in its checksum attribute.
+    Checksums found in the cache are not computed. A file that can not be read or stat'ed,
+    e.g. deleted since it was found, is logged and keeps a None checksum.
+
+    Attributes
+    ----------
+    algorithm: string
+        Name of the hashlib algorithm used.
+
+    processes, cache, window, logger:
+        See PathPool.
+    """
+
+    action = "compute the checksum of"
+
+    def __init__(
+        self,
+        processes: int = 1,
+        cache: ChecksumCache | None = None,
+        algorithm: str = CHECKSUM_ALGORITHM,
+        window: int = CHECKSUM_WINDOW,
+    ):
+        super().__init__(hash_file, processes, cache, window)
+        self.algorithm = algorithm
+
+    @property
+    def hashed_count(self) -> int:
+        """Number of files hashed."""
+        return self.processed_count
+
+    def wants(self, path: SmartPath) -> bool:
+        return not path.is_directory and path.checksum is None
+
+    def arguments(self, path: SmartPath) -> tuple:
+        return str(path.path), self.algorithm
+
+    def cached(self, path: SmartPath) -> str | None:
+        return self.cache.get(path.stat(), self.algorithm)
+
+    def assign(self, path: SmartPath, result: str | None) -> None:
+        path.checksum = result
+
+    def cache_result(self, path: SmartPath, result: str) -> None:
+        self.cache.put(path.stat(), result, self.algorithm)
+
+    def checksum_paths(self, paths):
+        """Yield the given paths with the checksum of each file computed.
+
+        Parameters
+        ----------
+        paths: iterable containing SmartPath objects
+            Expected to be the generator created by generate_tree().
+
+        Yields
+        ------
+        SmartPath
+            The same paths in the same order, files having their checksum attribute set.
+            The cache is closed once the paths are exhausted.
+        """
+        return self.process_paths(paths)
+
+    def close(self) -> None:
+        """Close the cache, called once checksum_paths() is exhausted."""
+        if self.cache is not None:
+            self.logger.info(
+                f"Hashed {self.hashed_count} files, {self.cache.hits} checksums found in cache"
+            )
+        else:
+            self.logger.info(f"Hashed {self.hashed_count} files")
+        super().close()
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from file_tree import FileTree
+
+from .measureRegistry import MEASURES
+from .smartPath import SmartPath
+
+# Number of rows buffered before being written as a row group
+ROW_GROUP_SIZE = 65_536
+
+
+def measure_type(measure: str) -> str:
+    """Return the Arrow type of a measure's column, strings for the unregistered ones."""
+    return MEASURES[measure].arrow_type if measure in MEASURES else "string"
+
+
+class ColumnarWriter:
+    """Write the data of each file/directory to a columnar file while the structure is explored.
+
+    This is the columnar counterpart of the CSV output, meant to be loaded by analysis tools
+    (pandas, polars, duckdb, ...) that only need to read the columns they use.
+    The columns are:
+
+        path, identifier, placeholder1, placeholder2, ..., measure1, measure2, ...
+
+    The identifier column is dictionary encoded since it only takes a few distinct values.
+    Placeholder columns contain the value of each file_tree placeholder found in the path
+    or its parents, and are empty otherwise.
+
+    Rows are buffered and written every ROW_GROUP_SIZE rows as a row group (Parquet)
+    or record batch (Arrow IPC), so memory use does not grow with the size of the file structure.
+
+    Requires the optional dependency pyarrow, installed with ``pip install file_tree_check[arrow]``.
+    If pyarrow was built without Parquet support, the Arrow IPC format is used instead.
+
+    Attributes
+    ----------
+    output_path: pathlib.Path
+        Path to where the file is written.
+        When falling back to the Arrow IPC format, the suffix is changed to ".arrow".
+
+    file_format: string
+        Either "parquet" or "arrow".
+
+    measures: list of string
+        The name of the measures stored, one column each.
+
+    placeholders: list of string
+        The name of the placeholders stored, one column each.
+
+    row_count: int
+        Number of rows written so far.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    def __init__(
+        self,
+        output_path: str | Path,
+        measures=(),
+        file_tree: FileTree | None = None,
+        file_format: str = "parquet",
+        row_group_size: int = ROW_GROUP_SIZE,
+    ):
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "The columnar output requires pyarrow: pip install file_tree_check[arrow]"
+            ) from e
+        self._pa = pa
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+        self.output_path = Path(output_path)
+        self.file_format = file_format
+        self.measures = list(measures)
+        self.file_tree = file_tree
+        self.placeholders = sorted(
+            {
+                placeholder
+                for template in (file_tree._templates.values() if file_tree else ())
+                for placeholder in template.placeholders()
+            }
+        )
+        self.row_group_size = row_group_size
+        self.row_count = 0
+
+        fields = [
+            pa.field("path", pa.string()),
+            pa.field("identifier", pa.dictionary(pa.int32(), pa.string())),
+        ]
+        fields += [pa.field(placeholder, pa.string()) for placeholder in self.placeholders]
+        fields += [
+            pa.field(measure, pa.type_for_alias(measure_type(measure))) for measure in self.measures
+        ]
+        self.schema = pa.schema(fields)
+        self._columns = {name: [] for name in self.schema.names}
+        # The identifier dictionary is shared by every row group and only grows,
+        # which allows the Arrow IPC format to store it as deltas
+        self._identifiers = []
+        self._identifier_indices = {}
+        self._writer = self._open_writer()
+        self.logger.info(
+            f"Writing {self.file_format} file at {self.output_path} "
+            f"with columns: {self.schema.names}"
+        )
+
+    def _open_writer(self):
+        if self.file_format == "parquet":
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                self.logger.warning(
+                    "pyarrow was built without Parquet support, using the Arrow IPC format"
+                )
+                self.file_format = "arrow"
+                self.output_path = self.output_path.with_suffix(".arrow")
+            else:
+                return pq.ParquetWriter(
+                    self.output_path, self.schema, use_dictionary=["identifier"]
+                )
+        if self.file_format != "arrow":
+            raise ValueError(f"Unknown columnar format: {self.file_format}")
+        return self._pa.ipc.new_file(
+            str(self.output_path),
+            self.schema,
+            options=self._pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+        )
+
+    def write_row(self, path: SmartPath, identifier: str, stats: dict) -> None:
+        """Add the row of a single file/directory, writing a row group once enough are buffered.
+
+        Parameters
+        ----------
+        path: SmartPath
+            The file/directory the row is about.
+
+        identifier: string
+            The path's identifier.
+
+        stats: dict
+            The value of each measure for this path, as returned by SmartPath.get_stats().
+        """
+        self._columns["path"].append(str(path.path))
+        index = self._identifier_indices.get(identifier)
+        if index is None:
+            index = self._identifier_indices[identifier] = len(self._identifiers)
+            self._identifiers.append(identifier)
+        self._columns["identifier"].append(index)
+        if self.placeholders:
+            placeholder_values = path.get_placeholders(self.file_tree)
+            for placeholder in self.placeholders:
+                self._columns[placeholder].append(placeholder_values.get(placeholder))
+        for measure in self.measures:
+            value = stats.get(measure)
+            if value is not None and measure_type(measure) == "string":
+                value = str(value)
+            self._columns[measure].append(value)
+        self.row_count += 1
+        if len(self._columns["path"]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._columns["path"]:
+            return
+        arrays = []
+        for field in self.schema:
+            if field.name == "identifier":
+                arrays.append(
+                    self._pa.DictionaryArray.from_arrays(
+                        self._pa.array(self._columns["identifier"], type=self._pa.int32()),
+                        self._pa.array(self._identifiers, type=self._pa.string()),
+                    )
+                )
+            else:
+                arrays.append(self._pa.array(self._columns[field.name], type=field.type))
+        batch = self._pa.record_batch(arrays, schema=self.schema)
+        self._writer.write_batch(batch)
+        self.logger.debug(f"Wrote a group of {batch.num_rows} rows to {self.output_path}")
+        self._columns = {name: [] for name in self.schema.names}
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        self.logger.info(
+            f"{self.file_format} file closed. Contains {self.row_count} rows, "
+            f"{self.output_path.stat().st_size} bytes of data"
+        )
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import weakref
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+
+import numpy as np
+
+from .smartPath import SmartPath
+
+# Number of hash functions of the MinHash signatures used to cluster configurations
+MINHASH_PERMUTATIONS = 128
+# Maximum number of clusters of an LSH bucket each of its candidates is compared to
+LSH_BUCKET_REPRESENTATIVES = 64
+# Mersenne prime 2**31 - 1, small enough for the products of the hash functions to fit in int64
+_MINHASH_PRIME = (1 << 31) - 1
+
+
+class PathTable:
+    """Compact storage of the paths of the directories found in configurations.
+
+    Each path is stored as the index of its parent in the table and its own name,
+    so the common part of the paths (the root, the subject directories, ...)
+    is stored a single time instead of once per path string.
+    Names are interned, repeated names like "anat" are kept in memory only once.
+
+    Attributes
+    ----------
+    names: list of string
+        The name of each path, or the full path for the ones without parent.
+
+    parents: array of int
+        The index of the parent of each path, -1 for the ones without parent.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.parents = array("l")
+        self._indices = weakref.WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        """Return the number of paths stored, including the parents added along."""
+        return len(self.names)
+
+    def add(self, path: SmartPath) -> int:
+        """Add the path and its parents to the table if needed, returning the path's index."""
+        index = self._indices.get(path)
+        if index is not None:
+            return index
+        if path.parent is None:
+            parent_index, name = -1, str(path.path)
+        else:
+            parent_index, name = self.add(path.parent), path.path.name
+        index = len(self.names)
+        self.names.append(sys.intern(name))
+        self.parents.append(parent_index)
+        self._indices[path] = index
+        return index
+
+    def get(self, index: int) -> str:
+        """Rebuild the path string stored at the given index."""
+        parts = []
+        while index != -1:
+            parts.append(self.names[index])
+            index = self.parents[index]
+        return os.path.join(*reversed(parts))
+
+
+class PathList(Sequence):
+    """Read-only list of path strings stored as indices in a PathTable."""
+
+    def __init__(self, path_table: PathTable):
+        self.path_table = path_table
+        self.indices = array("l")
+
+    def __len__(self) -> int:
+        """Return the number of paths in the list."""
+        return len(self.indices)
+
+    def __getitem__(self, item):
+        """Return the path string(s) at the given index or slice."""
+        if isinstance(item, slice):
+            return [self.path_table.get(index) for index in self.indices[item]]
+        return self.path_table.get(self.indices[item])
+
+    def __repr__(self) -> str:
+        """Represent the list like a list of strings."""
+        return repr(list(self))
+
+
+class ConfigurationList(list):
+    """List of the configurations found for an identifier, indexed by their structure.
+
+    It is a list of dict like the ones described in add_configuration(),
+    each containing the list of children (structure) and the path to all directories
+    following this configuration, so it can be used anywhere a list of configurations is.
+    Configurations are also stored in a dictionary keyed by their structure
+    so a directory finds its configuration with a single lookup
+    rather than by comparing its structure to every configuration already found.
+
+    The paths of each configuration are a PathList, stored as indices in a PathTable
+    that can be shared by every ConfigurationList of an exploration.
+
+    Attributes
+    ----------
+    index: dict
+        Maps the structure of each configuration, as a tuple, to its dict in the list.
+
+    path_table: PathTable
+        Where the paths of the configurations are stored.
+
+    subtrees: list of SmartPath
+        The directories of the identifier, kept when whole subtrees are compared
+        (see group_subtrees()). Empty otherwise.
+    """
+
+    def __init__(self, path_table: PathTable | None = None):
+        super().__init__()
+        self.index = {}
+        self.path_table = path_table if path_table is not None else PathTable()
+        self.subtrees = []
+
+    def add_path(self, structure: list[str], path: SmartPath) -> dict:
+        """Add a path to the configuration with the given structure, creating it if needed.
+
+        Parameters
+        ----------
+        structure: list of string
+            The sorted identifiers of the directory's children.
+
+        path: SmartPath
+            The directory.
+
+        Returns
+        -------
+        dict
+            The configuration the path was added to.
+        """
+        signature = tuple(structure)
+        configuration = self.index.get(signature)
+        if configuration is None:
+            configuration = {"structure": structure, "paths": PathList(self.path_table)}
+            self.index[signature] = configuration
+            self.append(configuration)
+        configuration["paths"].indices.append(self.path_table.add(path))
+        return configuration
+
+
+def structure_delta(structure: list[str], reference: list[str]) -> tuple[list[str], list[str]]:
+    """Compare a configuration's structure to a reference one.
+
+    Returns
+    -------
+    tuple of two lists of string
+        The sorted identifiers missing from structure compared to the reference,
+        and the sorted identifiers structure has in addition to the reference.
+        Identifiers found several times are counted, e.g. having 2 'baby_duck_jpg'
+        instead of 3 gives one missing 'baby_duck_jpg'.
+    """
+    structure_counter = Counter(structure)
+    reference_counter = Counter(reference)
+    minus = sorted((reference_counter - structure_counter).elements())
+    plus = sorted((structure_counter - reference_counter).elements())
+    return minus, plus
+
+
+def group_subtrees(paths: list[SmartPath]) -> list[dict]:
+    """Group directories whose whole subtrees are identical, using their digest.
+
+    Unlike configurations, which only compare the children of the directories,
+    the digests cover every level under them. Grouping costs one dictionary lookup
+    per directory, and each group is compared to the most common one
+    by exploring only the branches whose digests differ.
+
+    Parameters
+    ----------
+    paths: list of SmartPath
+        The directories to group, whose digest was computed (see SmartPath.compute_digest()).
+
+    Returns
+    -------
+    list of dict
+        The groups, from the one with the most directories to the one with the fewest:
+
+        .. code-block:: python
+
+            [
+                {'digest': 'a3f...', 'paths': [smart_path1, smart_path2], 'differences': []},
+                {'digest': '09b...', 'paths': [smart_path3],
+                 'differences': [('anat/sub-03_T1w.json', 'removed'), ...]},
+                ...
+            ]
+
+        The differences are the ones of the group's first directory compared to the
+        first directory of the most common group, as returned by SmartPath.diff().
+    """
+    groups = {}
+    for path in paths:
+        groups.setdefault(path.digest, []).append(path)
+    sorted_groups = sorted(groups.items(), key=lambda item: len(item[1]), reverse=True)
+    if not sorted_groups:
+        return []
+    reference = sorted_groups[0][1][0]
+    return [
+        {
+            "digest": digest.hex() if digest is not None else None,
+            "paths": group,
+            "differences": reference.diff(group[0]),
+        }
+        for digest, group in sorted_groups
+    ]
+
+
+def structure_tokens(structure: list[str]) -> list[str]:
+    """Turn a structure, where identifiers can be repeated, into a set of unique tokens.
+
+    Each occurrence of an identifier is numbered, e.g. ['a', 'a', 'b'] gives
+    ['a#1', 'a#2', 'b#1'], so having a different number of the same children
+    makes the structures different once compared as sets.
+    """
+    counter = Counter()
+    tokens = []
+    for identifier in structure:
+        counter[identifier] += 1
+        tokens.append(f"{identifier}#{counter[identifier]}")
+    return tokens
+
+
+def minhash_signatures(token_sets: list[list[str]], num_perm: int, seed: int = 0) -> np.ndarray:
+    """Compute the MinHash signature of each set of tokens.
+
+    Each token is hashed once, then num_perm random linear hash functions modulo
+    a Mersenne prime are applied with numpy and the minimum over the set is kept.
+    The fraction of equal values between two signatures estimates
+    the Jaccard similarity of the two sets.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (len(token_sets), num_perm).
+    """
+    generator = np.random.default_rng(seed)
+    a = generator.integers(1, _MINHASH_PRIME, size=num_perm, dtype=np.int64)
+    b = generator.integers(0, _MINHASH_PRIME, size=num_perm, dtype=np.int64)
+    signatures = np.full((len(token_sets), num_perm), _MINHASH_PRIME, dtype=np.int64)
+    for row, tokens in enumerate(token_sets):
+        if not tokens:
+            continue
+        hashes = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+                % _MINHASH_PRIME
+                for token in tokens
+            ],
+            dtype=np.int64,
+        )
+        signatures[row] = ((np.outer(a, hashes) + b[:, None]) % _MINHASH_PRIME).min(axis=1)
+    return signatures
+
+
+def cluster_configurations(
+    configuration_list: list[dict],
+    similarity: float = 0.8,
+    num_perm: int = MINHASH_PERMUTATIONS,
+) -> list[dict]:
+    """Group configurations whose structures are similar using MinHash and LSH.
+
+    The signatures are cut in bands and configurations sharing an identical band
+    are candidates, which are grouped when their estimated Jaccard similarity
+    is at least the given similarity. The number of bands is chosen so the LSH threshold
+    is close to that similarity. In each bucket, a candidate is compared to one
+    representative of each cluster already found in the bucket, up to
+    LSH_BUCKET_REPRESENTATIVES of them, instead of to every other candidate.
+    The cost is at most bands * configurations * LSH_BUCKET_REPRESENTATIVES signature
+    comparisons, linear in the number of configurations.
+
+    Parameters
+    ----------
+    configuration_list: list of dict
+        The configurations of an identifier, as stored by add_configuration().
+
+    similarity: float, default=0.8
+        Minimal estimated Jaccard similarity between two structures to group them.
+
+    num_perm: int
+        Number of hash functions of the MinHash signatures.
+
+    Returns
+    -------
+    list of dict
+        The clusters, from the one with the most directories to the one with the fewest:
+
+        .. code-block:: python
+
+            [
+                {
+                    'core': ['identifier3', 'identifier4'],
+                    'count': 9,
+                    'members': [
+                        {'configuration': configuration_dict, 'minus': [], 'plus': []},
+                        {'configuration': configuration_dict, 'minus': [], 'plus': ['id5']},
+                    ]
+                },
+                ...
+            ]
+
+        The core structure contains the identifiers found in more than half of the
+        cluster's directories, and each member gives its difference with the core.
+    """
+    token_sets = [structure_tokens(item["structure"]) for item in configuration_list]
+    signatures = minhash_signatures(token_sets, num_perm)
+    bands, rows = _lsh_bands(num_perm, similarity)
+
+    parents = list(range(len(configuration_list)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for band in range(bands):
+        buckets = {}
+        for index, signature in enumerate(signatures):
+            key = signature[band * rows : (band + 1) * rows].tobytes()
+            buckets.setdefault(key, []).append(index)
+        for bucket in buckets.values():
+            # A candidate joins every cluster of the bucket it is similar to, so the clusters
+            # do not depend on which of their members is the representative
+            representatives = [bucket[0]]
+            for index in bucket[1:]:
+                similar = (
+                    np.mean(signatures[representatives] == signatures[index], axis=1) >= similarity
+                )
+                if not similar.any():
+                    if len(representatives) < LSH_BUCKET_REPRESENTATIVES:
+                        representatives.append(index)
+                    continue
+                for representative in np.array(representatives)[similar]:
+                    parents[find(int(representative))] = find(index)
+
+    groups = {}
+    for index in range(len(configuration_list)):
+        groups.setdefault(find(index), []).append(index)
+
+    clusters = []
+    for members in groups.values():
+        count = sum(len(configuration_list[index]["paths"]) for index in members)
+        token_weights = Counter()
+        for index in members:
+            for token in token_sets[index]:
+                token_weights[token] += len(configuration_list[index]["paths"])
+        core = sorted(
+            token.rsplit("#", 1)[0] for token, weight in token_weights.items() if weight * 2 > count
+        )
+        cluster_members = []
+        for index in sorted(members, key=lambda item: -len(configuration_list[item]["paths"])):
+            minus, plus = structure_delta(configuration_list[index]["structure"], core)
+            cluster_members.append(
+                {"configuration": configuration_list[index], "minus": minus, "plus": plus}
+            )
+        clusters.append({"core": core, "count": count, "members": cluster_members})
+    return sorted(clusters, key=lambda cluster: cluster["count"], reverse=True)
+
+
+def _lsh_bands(num_perm: int, similarity: float) -> tuple[int, int]:
+    """Choose the number of bands and rows per band whose LSH threshold is closest to similarity.
+
+    Two signatures are likely to share a band when their similarity is above
+    (1 / bands) ** (1 / rows).
+    """
+    divisions = [(bands, num_perm // bands) for bands in range(1, num_perm + 1)]
+    return min(
+        (division for division in divisions if division[0] * division[1] == num_perm),
+        key=lambda division: abs((1 / division[0]) ** (1 / division[1]) - similarity),
+    )
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import csv
+import heapq
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from .smartPath import SmartPath
+
+# Size in bytes of the write buffer used for the streamed CSV output
+CSV_BUFFER_SIZE = 1024 * 1024
+# Number of rows sorted in memory at once by external_sort_csv
+SORT_CHUNK_ROWS = 500_000
+
+
+class CsvStreamer:
+    """Write the CSV output one row at a time while the file structure is explored.
+
+    The rows have the same format as the ones written by StatBuilder.create_csv():
+
+        path,identifier,measure1,measure2,measure3,...
+
+    but are written in the order the paths are found rather than grouped by identifier,
+    and contain the measured values before any averaging done by StatBuilder.
+    Since the rows go through a buffered writer as soon as they are measured,
+    the CSV can be read while the exploration is still running
+    and creating it does not require the data of the whole file structure in memory.
+
+    Attributes
+    ----------
+    output_path: pathlib.Path
+        Path to where the CSV is written.
+
+    measures: list of string
+        The name of the measures written in each row, in the order of the columns.
+
+    row_count: int
+        Number of rows written so far, not counting the header.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    def __init__(self, output_path: str | Path, measures=(), buffer_size: int = CSV_BUFFER_SIZE):
+        self.output_path = Path(output_path)
+        self.measures = list(measures)
+        self.row_count = 0
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+        self.logger.debug(f"Opening csv file for streaming at: {output_path}")
+        self._file = open(self.output_path, "w", newline="", buffering=buffer_size)
+        self._writer = csv.writer(self._file)
+        headers = ["Path", "Identifier"] + self.measures
+        self._writer.writerow(headers)
+        self.logger.info(f"Streaming CSV file with header: {str(headers)}")
+
+    def write_row(self, path: SmartPath, identifier: str, stats: dict) -> None:
+        """Write the row of a single file/directory.
+
+        Parameters
+        ----------
+        path: SmartPath
+            The file/directory the row is about.
+
+        identifier: string
+            The path's identifier.
+
+        stats: dict
+            The value of each measure for this path, as returned by SmartPath.get_stats().
+            Missing measures are written as empty values.
+        """
+        self._writer.writerow(
+            [path.path, identifier] + [stats.get(measure) for measure in self.measures]
+        )
+        self.row_count += 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        self.logger.info(
+            f"CSV file closed. Contains {self.row_count} rows, "
+            f"{self.output_path.stat().st_size} bytes of data"
+        )
+
+
+def external_sort_csv(
+    csv_path: str | Path,
+    key_columns: tuple[int, ...] = (1, 0),
+    chunk_rows: int = SORT_CHUNK_ROWS,
+    output_path: str | Path | None = None,
+) -> None:
+    """Sort the rows of a CSV file while keeping its header first.
+
+    Rows are sorted by chunks of chunk_rows in memory, each chunk is saved
+    to a temporary file next to the output and the chunks are then merged into the output.
+    Memory use is therefore bounded by chunk_rows regardless of the size of the CSV.
+
+    Parameters
+    ----------
+    csv_path: pathlib.Path or string
+        Path to the CSV to sort.
+
+    key_columns: tuple of int, default=(1, 0)
+        Index of the columns to sort by, in order of priority.
+        The default sorts by identifier then by path, grouping the rows like
+        StatBuilder.create_csv() does.
+
+    chunk_rows: int
+        Maximum number of rows held in memory at once.
+
+    output_path: pathlib.Path or string
+        Where to write the sorted CSV. If None, the CSV is sorted in place.
+    """
+    logger = logging.getLogger(f"file_tree_check.{__name__}")
+    csv_path = Path(csv_path)
+    output_path = Path(output_path) if output_path is not None else csv_path
+
+    def sort_key(row: list[str]) -> tuple[str, ...]:
+        return tuple(row[column] for column in key_columns)
+
+    chunk_paths = []
+    with open(csv_path, newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader, None)
+        if header is None:
+            return
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                chunk_paths.append(_write_sorted_chunk(chunk, sort_key, output_path.parent))
+                chunk = []
+        if chunk or not chunk_paths:
+            chunk_paths.append(_write_sorted_chunk(chunk, sort_key, output_path.parent))
+    logger.debug(f"Merging {len(chunk_paths)} sorted chunks into {output_path}")
+
+    chunk_files = [open(chunk_path, newline="") for chunk_path in chunk_paths]
+    try:
+        with open(output_path, "w", newline="", buffering=CSV_BUFFER_SIZE) as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(
+                heapq.merge(*(csv.reader(chunk_file) for chunk_file in chunk_files), key=sort_key)
+            )
+    finally:
+        for chunk_file in chunk_files:
+            chunk_file.close()
+        for chunk_path in chunk_paths:
+            os.remove(chunk_path)
+    logger.info(f"Sorted CSV file at {output_path}")
+
+
+def _write_sorted_chunk(chunk: list[list[str]], sort_key, directory: Path) -> str:
+    chunk.sort(key=sort_key)
+    file_descriptor, chunk_path = tempfile.mkstemp(suffix=".csv", dir=directory)
+    with open(file_descriptor, "w", newline="", buffering=CSV_BUFFER_SIZE) as chunk_file:
+        csv.writer(chunk_file).writerows(chunk)
+    return chunk_path
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TextIO
+
+from file_tree import FileTree
+
+from .checksum import CHECKSUM_ALGORITHM, ChecksumCache, hash_file
+from .smartPath import SmartPath
+
+# Number of bytes read at the beginning and at the end of files to compare them
+DUPLICATE_SAMPLE_SIZE = 4096
+
+
+def sample_checksum(path: str | Path, size: int, sample_size: int = DUPLICATE_SAMPLE_SIZE) -> str:
+    """Return the checksum of the first and last sample_size bytes of a file of the given size.
+
+    Files of at most 2 * sample_size bytes are hashed whole.
+    """
+    hasher = hashlib.new(CHECKSUM_ALGORITHM)
+    with open(path, "rb") as file:
+        if size <= 2 * sample_size:
+            hasher.update(file.read())
+        else:
+            hasher.update(file.read(sample_size))
+            file.seek(-sample_size, os.SEEK_END)
+            hasher.update(file.read(sample_size))
+    return hasher.hexdigest()
+
+
+def _try_hash_file(path: str) -> tuple[str | None, str | None]:
+    """Return the checksum of a file and None, or None and the error if it can not be read.
+
+    The error is returned rather than raised, so a file failing on a worker process
+    does not stop the others.
+    """
+    try:
+        return hash_file(path), None
+    except OSError as e:
+        return None, str(e)
+
+
+class DuplicateFinder:
+    """Find the files with identical content among the files found during the exploration.
+
+    The files are compared in tiers, each one only looking at the files still colliding:
+
+    1. Files are grouped by size, a file with a unique size has no duplicate.
+    2. Files of the same size are grouped by the checksum of their first and last
+       sample_size bytes, most files that differ do so at their beginning or end
+       (headers, trailing data).
+    3. Only the files still grouped are read in full and grouped by their checksum.
+
+    Most files are therefore never read, and most of the others only partially.
+    It has the same write_row() as the CsvStreamer so it can be given to
+    get_data_from_paths() as a row writer, collecting the size of each file.
+
+    A group of duplicates crosses a boundary when its files belong to different units
+    of the repeating structure, e.g. the same image found under two subjects.
+    The unit of a file is the value of the boundary placeholder if one is given
+    (e.g. 'participant'), otherwise its parent directory found at boundary_depth.
+
+    Attributes
+    ----------
+    min_size: int
+        Files smaller than this are ignored, by default the empty files.
+
+    boundary_placeholder: string or None
+        Name of the file_tree placeholder whose value identifies the units.
+
+    boundary_depth: int
+        Depth of the directories identifying the units, when no placeholder is given.
+
+    counts: dict
+        Number of files at each tier of the last call to find():
+        'files', 'same_size', 'sampled' and 'hashed'.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        boundary_placeholder: str | None = None,
+        boundary_depth: int = 1,
+        file_tree: FileTree | None = None,
+        sample_size: int = DUPLICATE_SAMPLE_SIZE,
+        processes: int = 1,
+        cache: ChecksumCache | None = None,
+    ):
+        self.min_size = min_size
+        self.boundary_placeholder = boundary_placeholder
+        self.boundary_depth = boundary_depth
+        self.file_tree = file_tree
+        self.sample_size = sample_size
+        self.processes = processes
+        self.cache = cache
+        self.counts = {}
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+        # Files of each size, as (path, identifier, unit)
+        self._sizes = {}
+
+    def write_row(self, path: SmartPath, identifier: str, stats: dict) -> None:
+        """Collect the size of a file, directories are skipped."""
+        if path.is_directory:
+            return
+        if "file_size" in stats:
+            size = stats["file_size"]
+        else:
+            try:
+                size = path.stat().st_size
+            except OSError as e:
+                self.logger.warning(f"Could not stat {path.path}: {e}")
+                return
+        if size is None:
+            # The size could not be measured, e.g. an annexed file whose content is missing
+            self.logger.debug(f"Skipping {path.path}, its size is unknown")
+            return
+        if size < self.min_size:
+            return
+        self._sizes.setdefault(int(size), []).append((str(path.path), identifier, self.unit(path)))
+
+    def unit(self, path: SmartPath) -> str | None:
+        """Return the unit of the repeating structure the path belongs to."""
+        if self.boundary_placeholder is not None and self.file_tree is not None:
+            return path.get_placeholders(self.file_tree).get(self.boundary_placeholder)
+        ancestor = path
+        while ancestor.depth > self.boundary_depth:
+            ancestor = ancestor.parent
+        return ancestor.path.name if ancestor.depth == self.boundary_depth else None
+
+    def _full_checksums(self, paths: list[str]) -> list[str | None]:
+        """Return the checksum of each file, None for the files that could not be read."""
+        checksums = [None] * len(paths)
+        stat_results = [None] * len(paths)
+        missing = []
+        for index, path in enumerate(paths):
+            if self.cache is not None:
+                try:
+                    stat_results[index] = os.stat(path)
+                except OSError as e:
+                    self.logger.warning(f"Could not read {path}: {e}")
+                    continue
+                checksums[index] = self.cache.get(stat_results[index])
+            if checksums[index] is None:
+                missing.append(index)
+        missing_paths = [paths[index] for index in missing]
+        if self.processes > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                computed = list(executor.map(_try_hash_file, missing_paths))
+        else:
+            computed = [_try_hash_file(path) for path in missing_paths]
+        for index, (checksum, error) in zip(missing, computed):
+            if error is not None:
+                self.logger.warning(f"Could not read {paths[index]}: {error}")
+                continue
+            checksums[index] = checksum
+            if self.cache is not None:
+                self.cache.put(stat_results[index], checksum)
+        return checksums
+
+    def find(self) -> list[dict]:
+        """Compare the files collected and return the groups of duplicates.
+
+        Returns
+        -------
+        list of dict
+            The groups of files with identical content, sorted by identifiers and size:
+
+            .. code-block:: python
+
+                [
+                    {'size': 27071, 'checksum': 'f357...',
+                     'paths': [('path1', 'identifier1', 'sub-01'), ('path2', ...)],
+                     'identifiers': ['identifier1'], 'crosses_boundary': True},
+                    ...
+                ]
+        """
+        self.counts = {
+            "files": sum(len(files) for files in self._sizes.values()),
+            "same_size": 0,
+            "sampled": 0,
+            "hashed": 0,
+        }
+        candidates = []
+        for size, files in self._sizes.items():
+            if len(files) < 2:
+                continue
+            self.counts["same_size"] += len(files)
+            samples = {}
+            for file in files:
+                try:
+                    key = sample_checksum(file[0], size, self.sample_size)
+                except OSError as e:
+                    self.logger.warning(f"Could not read {file[0]}: {e}")
+                    continue
+                samples.setdefault(key, []).append(file)
+            self.counts["sampled"] += len(files)
+            for key, group in samples.items():
+                if len(group) >= 2:
+                    candidates.append((size, key, group))
+
+        groups = []
+        for size, key, group in candidates:
+            if size <= 2 * self.sample_size:
+                # The sample was the whole file
+                by_checksum = {key: group}
+            else:
+                self.counts["hashed"] += len(group)
+                by_checksum = {}
+                checksums = self._full_checksums([file[0] for file in group])
+                for file, checksum in zip(group, checksums):
+                    if checksum is None:
+                        continue
+                    by_checksum.setdefault(checksum, []).append(file)
+            for checksum, files in by_checksum.items():
+                if len(files) < 2:
+                    continue
+                groups.append(
+                    {
+                        "size": size,
+                        "checksum": checksum,
+                        "paths": sorted(files),
+                        "identifiers": sorted({file[1] for file in files}),
+                        "crosses_boundary": len({file[2] for file in files}) > 1,
+                    }
+                )
+        self.logger.info(
+            f"Found {len(groups)} groups of duplicates among {self.counts['files']} files: "
+            f"{self.counts['same_size']} had the same size as another, "
+            f"{self.counts['hashed']} were read in full"
+        )
+        return sorted(groups, key=lambda group: (group["identifiers"], -group["size"]))
+
+    def write_report(self, output: TextIO, root: Path | str | None = None) -> int:
+        """Find the duplicates and write them as text, grouped by identifier.
+
+        Returns
+        -------
+        int
+            The number of characters written.
+        """
+        groups = self.find()
+        written = output.write(
+            f"***** Duplicate files in '{root}' *****\n" if root is not None else ""
+        )
+        written += output.write(
+            f"{len(groups)} groups of duplicates among {self.counts['files']} files, "
+            f"{sum(group['crosses_boundary'] for group in groups)} crossing units\n"
+        )
+        current_identifiers = None
+        for group in groups:
+            if group["identifiers"] != current_identifiers:
+                current_identifiers = group["identifiers"]
+                written += output.write(f"\nIn '{', '.join(current_identifiers)}':\n")
+            crosses = " across units" if group["crosses_boundary"] else ""
+            written += output.write(
+                f"    {len(group['paths'])} identical files of {group['size']} bytes{crosses}:\n"
+            )
+            for path, _, unit in group["paths"]:
+                written += output.write(f"        {path}" + (f"  ({unit})\n" if unit else "\n"))
+        return written
+
+    def close(self) -> None:
+        pass
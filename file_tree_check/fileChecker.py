@@ -1,23 +1,36 @@
 from __future__ import annotations
 
+import logging
 import os
+import re
+from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import TextIO
+
+from .smartDirectoryPath import SmartDirectoryPath
+from .smartFilePath import SmartFilePath
+from .smartPath import SmartPath
+
+# Number of failing paths listed per identifier and rule in the checks report
+CHECK_MAX_FAILURES = 10
 
 
 def check_size(path, min_size: int = 50) -> bool:
     return path.stat().st_size > min_size
 
 
+def permission_mask(permissions: tuple[int, int, int]) -> int:
+    """Turn permission digits for the owner, group and others, e.g. (4, 4, 0), into a mode mask."""
+    return (permissions[-3] << 6) | (permissions[-2] << 3) | permissions[-1]
+
+
 def check_permissions(path: str | Path, min_permissions: tuple[int, int, int] = (4, 4, 0)):
-    path = Path(path)
-    perm = list(oct(path.stat().st_mode))
+    """Check that the path has at least the permission bits given for the owner, group and others.
 
-    return (
-        perm[-3]
-        >= min_permissions[-3] & perm[-2]
-        >= min_permissions[-2] & perm[-1]
-        >= min_permissions[-1]
-    )
+    E.g. (4, 4, 0) requires the owner and the group to have read permission.
+    """
+    required = permission_mask(min_permissions)
+    return Path(path).stat().st_mode & required == required
 
 
 def get_total_file_count(path: str | Path, print_items: bool = False):
@@ -31,3 +44,309 @@ def get_total_file_count(path: str | Path, print_items: bool = False):
             print(item.name)
     # Iterate through the directory and count all the files
     return sum(len(files) for _, _, files in os.walk(base_path))
+
+
+class Rule(ABC):
+    """A check made on the files and/or directories found during the exploration.
+
+    Subclasses implement check() and description. check() is given the stat result
+    of the path when needs_stat is True, so the rules share the single stat of each path
+    made by the exploration instead of making their own.
+
+    Attributes
+    ----------
+    name: string
+        Name of the rule in the report.
+
+    identifiers: re.Pattern or None
+        Only the paths whose identifier fully matches are checked. If None, all are.
+
+    applies_to_files: bool
+        Whether files are checked.
+
+    applies_to_directories: bool
+        Whether directories are checked.
+
+    needs_stat: bool
+        Whether check() uses the stat result of the path.
+    """
+
+    name = "rule"
+    applies_to_files = True
+    applies_to_directories = True
+    needs_stat = True
+
+    def __init__(self, identifiers: re.Pattern | str | None = None):
+        self.identifiers = re.compile(identifiers) if isinstance(identifiers, str) else identifiers
+
+    def applies(self, path: SmartPath, identifier: str) -> bool:
+        """Whether the path is checked by this rule."""
+        if isinstance(path, SmartFilePath) and not self.applies_to_files:
+            return False
+        if isinstance(path, SmartDirectoryPath) and not self.applies_to_directories:
+            return False
+        return self.identifiers is None or self.identifiers.fullmatch(identifier) is not None
+
+    @abstractmethod
+    def check(self, path: SmartPath, stat_result: os.stat_result | None) -> bool:
+        """Whether the path passes the check."""
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def description(self) -> str:
+        """What the rule requires, for the report."""
+        raise NotImplementedError()
+
+
+class MinSizeRule(Rule):
+    """Files must have at least min_size bytes, e.g. to find empty or truncated files."""
+
+    name = "min_size"
+    applies_to_directories = False
+
+    def __init__(self, min_size: int, identifiers: re.Pattern | str | None = None):
+        super().__init__(identifiers)
+        self.min_size = min_size
+
+    def check(self, path: SmartPath, stat_result: os.stat_result | None) -> bool:
+        return stat_result.st_size >= self.min_size
+
+    @property
+    def description(self) -> str:
+        return f"at least {self.min_size} bytes"
+
+
+class PermissionRule(Rule):
+    """The mode must have all the required permission bits and none of the forbidden ones.
+
+    Masks are compared to the mode with bitwise operations, e.g. required=0o440
+    for read permission of the owner and group, forbidden=0o002 for no write permission
+    for others.
+    """
+
+    name = "permissions"
+
+    def __init__(
+        self,
+        required: int = 0,
+        forbidden: int = 0,
+        identifiers: re.Pattern | str | None = None,
+    ):
+        super().__init__(identifiers)
+        self.required = required
+        self.forbidden = forbidden
+
+    def check(self, path: SmartPath, stat_result: os.stat_result | None) -> bool:
+        mode = stat_result.st_mode
+        return mode & self.required == self.required and not mode & self.forbidden
+
+    @property
+    def description(self) -> str:
+        return f"mode with {self.required:04o} and without {self.forbidden:04o}"
+
+
+class OwnerRule(Rule):
+    """The path must belong to the given user and/or group ids."""
+
+    name = "owner"
+
+    def __init__(
+        self,
+        uid: int | None = None,
+        gid: int | None = None,
+        identifiers: re.Pattern | str | None = None,
+    ):
+        super().__init__(identifiers)
+        self.uid = uid
+        self.gid = gid
+
+    def check(self, path: SmartPath, stat_result: os.stat_result | None) -> bool:
+        return (self.uid is None or stat_result.st_uid == self.uid) and (
+            self.gid is None or stat_result.st_gid == self.gid
+        )
+
+    @property
+    def description(self) -> str:
+        return " and ".join(
+            f"{name} {value}"
+            for name, value in (("uid", self.uid), ("gid", self.gid))
+            if value is not None
+        )
+
+
+class FileCountRule(Rule):
+    """Directories must directly contain between min_count and max_count files.
+
+    The files are counted from the children found by the exploration,
+    without walking the directory again. The directories whose content was not explored
+    (symbolic links recorded or skipped, directories already explored under another path)
+    are not checked.
+    """
+
+    name = "file_count"
+    applies_to_files = False
+    needs_stat = False
+
+    def __init__(
+        self,
+        min_count: int | None = None,
+        max_count: int | None = None,
+        identifiers: re.Pattern | str | None = None,
+    ):
+        super().__init__(identifiers)
+        self.min_count = min_count
+        self.max_count = max_count
+
+    def applies(self, path: SmartPath, identifier: str) -> bool:
+        return super().applies(path, identifier) and path.explored
+
+    def check(self, path: SmartPath, stat_result: os.stat_result | None) -> bool:
+        count = sum(isinstance(child, SmartFilePath) for child in path.children)
+        return (self.min_count is None or count >= self.min_count) and (
+            self.max_count is None or count <= self.max_count
+        )
+
+    @property
+    def description(self) -> str:
+        return " and ".join(
+            f"{name} {value} files"
+            for name, value in (("at least", self.min_count), ("at most", self.max_count))
+            if value is not None
+        )
+
+
+def create_rules(
+    identifiers: str | None = None,
+    min_size: int | None = None,
+    required_permissions: int | None = None,
+    forbidden_permissions: int | None = None,
+    uid: int | None = None,
+    gid: int | None = None,
+    min_file_count: int | None = None,
+    max_file_count: int | None = None,
+) -> list[Rule]:
+    """Create the rules whose values are given, the ones left to None are not checked.
+
+    Parameters
+    ----------
+    identifiers: string
+        Regular expression the identifiers of the checked paths must fully match.
+        If None or empty, every path is checked.
+
+    min_size, required_permissions, forbidden_permissions, uid, gid, min_file_count,
+    max_file_count:
+        See MinSizeRule, PermissionRule, OwnerRule and FileCountRule.
+
+    Returns
+    -------
+    list of Rule
+    """
+    identifiers = re.compile(identifiers) if identifiers else None
+    rules = []
+    if min_size is not None:
+        rules.append(MinSizeRule(min_size, identifiers))
+    if required_permissions is not None or forbidden_permissions is not None:
+        rules.append(
+            PermissionRule(required_permissions or 0, forbidden_permissions or 0, identifiers)
+        )
+    if uid is not None or gid is not None:
+        rules.append(OwnerRule(uid, gid, identifiers))
+    if min_file_count is not None or max_file_count is not None:
+        rules.append(FileCountRule(min_file_count, max_file_count, identifiers))
+    return rules
+
+
+class FileChecker:
+    """Evaluate all the rules on each path during the exploration, in a single pass.
+
+    It has the same write_row() as the CsvStreamer so it can be given to get_data_from_paths()
+    as a row writer: each path is checked as soon as it is measured, after its children
+    were listed, with the stat result already fetched for its measures.
+    The path is stat'ed at most once for all the rules.
+
+    Attributes
+    ----------
+    rules: list of Rule
+        The checks made.
+
+    results: dict
+        The number of paths checked and failed by each rule, for each identifier,
+        with the first failing paths:
+
+        .. code-block:: python
+
+            results={
+                'identifier1': {
+                    'min_size': {'checked': 12, 'failed': 1, 'failures': ['path1']},
+                    'permissions': {'checked': 12, 'failed': 0, 'failures': []}},
+                'identifier2': {...}
+            }
+
+    max_failures: int
+        Number of failing paths kept per identifier and rule.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    def __init__(self, rules: list[Rule], max_failures: int = CHECK_MAX_FAILURES):
+        self.rules = rules
+        self.max_failures = max_failures
+        self.results = {}
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+
+    def write_row(self, path: SmartPath, identifier: str, stats: dict) -> None:
+        """Check the path with every rule that applies to it."""
+        stat_result = None
+        for rule in self.rules:
+            if not rule.applies(path, identifier):
+                continue
+            if rule.needs_stat and stat_result is None:
+                try:
+                    stat_result = path.stat()
+                except OSError as e:
+                    self.logger.warning(f"Could not check {path.path}: {e}")
+                    return
+            result = self.results.setdefault(identifier, {}).setdefault(
+                rule.name, {"checked": 0, "failed": 0, "failures": []}
+            )
+            result["checked"] += 1
+            if not rule.check(path, stat_result):
+                result["failed"] += 1
+                if len(result["failures"]) < self.max_failures:
+                    result["failures"].append(str(path.path))
+
+    def failed_count(self) -> int:
+        """Return the number of failed checks over all identifiers and rules."""
+        return sum(result["failed"] for rules in self.results.values() for result in rules.values())
+
+    def write_report(self, output: TextIO, root: Path | str | None = None) -> int:
+        """Write the result of each rule for each identifier as text.
+
+        Returns
+        -------
+        int
+            The number of characters written.
+        """
+        written = output.write(f"***** Checks of '{root}' *****\n" if root is not None else "")
+        descriptions = {rule.name: rule.description for rule in self.rules}
+        for identifier in sorted(self.results):
+            written += output.write(f"\nIn '{identifier}':\n")
+            for name, result in self.results[identifier].items():
+                written += output.write(
+                    f"    {name} ({descriptions[name]}): "
+                    f"{result['failed']} of {result['checked']} failed\n"
+                )
+                for failure in result["failures"]:
+                    written += output.write(f"        {failure}\n")
+                if result["failed"] > len(result["failures"]):
+                    written += output.write(
+                        f"        ... and {result['failed'] - len(result['failures'])} more\n"
+                    )
+        return written
+
+    def close(self) -> None:
+        self.logger.info(
+            f"{self.failed_count()} failed checks over {len(self.results)} identifiers"
+        )
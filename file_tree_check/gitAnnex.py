@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+# Part of the symbolic link target of the files whose content is managed by git-annex
+ANNEX_OBJECTS = "annex/objects/"
+
+
+def annex_key(target: str | None) -> str | None:
+    """Return the git-annex key a symbolic link target points to, None if it is not annexed.
+
+    Annexed files are links to '.git/annex/objects/<hash dirs>/<key>/<key>',
+    e.g. 'SHA256E-s27071--5f3c...e1.nii.gz'.
+    """
+    if target is None or ANNEX_OBJECTS not in target.replace("\\", "/"):
+        return None
+    key = target.replace("\\", "/").rstrip("/").rsplit("/", 1)[-1]
+    return key or None
+
+
+def annex_key_size(key: str) -> int | None:
+    """Return the size in bytes of the content of a git-annex key, None if it is not in the key.
+
+    The key is made of the backend and optional fields separated by dashes, followed by
+    '--' and the name, e.g. 'SHA256E-s27071--5f3c.nii.gz' or 'MD5-s1048576-S1024-C1--d41d'.
+    The size is the field starting with 's'.
+    """
+    fields = key.split("--", 1)[0].split("-")
+    for field in fields[1:]:
+        if field.startswith("s") and field[1:].isdigit():
+            return int(field[1:])
+    return None
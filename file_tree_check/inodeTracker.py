@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .smartPath import SmartPath
+
+# What to do with the symbolic links to directories found during the exploration
+SYMLINK_POLICIES = ("follow", "skip", "record")
+
+
+class InodeTracker:
+    """Keep the (st_dev, st_ino) of the directories explored, so none is explored twice.
+
+    Directories reached a second time, through a symbolic link, a bind mount or a symbolic
+    link loop, are still part of the outputs but their content is not explored again.
+    Symbolic links to directories are handled according to symlink_policy:
+
+    - "follow": explored like directories, unless their target was already explored.
+    - "skip": left out of the outputs.
+    - "record": part of the outputs, but their content is not explored.
+
+    With hard_links_once, files with several hard links are found by their inode
+    and only the first one found is counted in sizes, the others have their hard_link_of
+    attribute set to it (see the file_size and allocated_size measures).
+    The tracker is thread safe, so it can be shared with the asynchronous traversal.
+
+    Attributes
+    ----------
+    symlink_policy: string
+        One of SYMLINK_POLICIES.
+
+    hard_links_once: bool
+        Whether to find the files that are hard links to a file already found.
+
+    redundant: list of pathlib.Path
+        The directories whose content was already explored under another path.
+
+    recorded: list of pathlib.Path
+        The symbolic links to directories not explored because of the "record" policy.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    def __init__(self, symlink_policy: str = "follow", hard_links_once: bool = False):
+        if symlink_policy not in SYMLINK_POLICIES:
+            raise ValueError(
+                f"Unknown symlink policy {symlink_policy}, expected one of {SYMLINK_POLICIES}"
+            )
+        self.symlink_policy = symlink_policy
+        self.hard_links_once = hard_links_once
+        self.redundant = []
+        self.recorded = []
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+        self._directories = set()
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def copy(self) -> InodeTracker:
+        """Return a tracker with the same policies and nothing visited yet."""
+        return InodeTracker(self.symlink_policy, self.hard_links_once)
+
+    def keeps(self, path: Path, is_dir: bool) -> bool:
+        """Return whether an entry is part of the outputs, False for skipped links."""
+        return not (is_dir and self.symlink_policy == "skip" and os.path.islink(path))
+
+    def claim_directory(self, path: Path, stat_result: os.stat_result | None = None) -> bool:
+        """Return whether the content of a directory is to be explored.
+
+        The first time a directory's (st_dev, st_ino) is claimed it is marked visited.
+        Directories that can not be stat'ed are explored, for the exploration to report them.
+        """
+        if self.symlink_policy != "follow" and os.path.islink(path):
+            with self._lock:
+                self.recorded.append(path)
+            self.logger.debug(f"Not exploring the symbolic link {path}")
+            return False
+        return self._claim_inode(path, stat_result)
+
+    def _claim_inode(self, path: Path, stat_result: os.stat_result | None) -> bool:
+        if stat_result is None:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                return True
+        with self._lock:
+            key = (stat_result.st_dev, stat_result.st_ino)
+            if key in self._directories:
+                self.redundant.append(path)
+                self.logger.info(f"Not exploring {path}, its content was already explored")
+                return False
+            self._directories.add(key)
+            return True
+
+    def visit_root(self, root: SmartPath) -> None:
+        """Mark the root of the exploration visited, it is explored whatever the policy."""
+        try:
+            self._claim_inode(root.path, root.stat())
+        except OSError:
+            pass
+
+    def explore(self, directory: SmartPath) -> bool:
+        """Return whether the content of a directory found by the exploration is to be explored."""
+        try:
+            stat_result = directory.stat()
+        except OSError:
+            stat_result = None
+        return self.claim_directory(directory.path, stat_result)
+
+    def track_file(self, file: SmartPath) -> None:
+        """Set the hard_link_of attribute of a file if another link to it was already found."""
+        if not self.hard_links_once:
+            return
+        try:
+            stat_result = file.stat()
+        except OSError:
+            return
+        if stat_result.st_nlink < 2:
+            return
+        with self._lock:
+            first = self._files.setdefault((stat_result.st_dev, stat_result.st_ino), file.path)
+        if first != file.path:
+            file.hard_link_of = first
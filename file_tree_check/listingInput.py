@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import re
+import stat
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Iterable
+
+from file_tree import FileTree
+
+from .asyncTraversal import _generate_prefetched
+from .csvStreamer import SORT_CHUNK_ROWS
+from .smartDirectoryPath import SmartDirectoryPath
+
+# Size in bytes of the read and write buffers of the listing files
+LISTING_BUFFER_SIZE = 1024 * 1024
+# Permission bits given to the paths when the listing does not have them
+DEFAULT_DIRECTORY_MODE = 0o755
+DEFAULT_FILE_MODE = 0o644
+
+# Component sorting before any name, placed between the parent and the name of an entry
+_GROUP_SEPARATOR = ("", "")
+
+
+def listing_sort_key(relative_path: str) -> tuple:
+    """Return the key sorting a listing entry into its directory's group.
+
+    The key is the parent's components, a separator sorting before any name, then the name.
+    Sorting by it puts the entries of each directory next to each other,
+    and the groups of directories in the order generate_tree() explores them:
+    a directory's group comes right after the group of its parent, followed by the groups
+    of its subdirectories. Names are compared in lowercase like select_children() does.
+
+    Parameters
+    ----------
+    relative_path: string
+        Path of the entry relative to the root, with '/' separators, '' for the root itself.
+    """
+    if not relative_path:
+        return ()
+    parts = relative_path.split("/")
+    return tuple((part.lower(), part) for part in parts[:-1]) + (
+        _GROUP_SEPARATOR,
+        (parts[-1].lower(), parts[-1]),
+    )
+
+
+def _group_key(relative_path: str) -> tuple:
+    """Return the part of listing_sort_key() shared by the entries of a directory."""
+    parts = relative_path.split("/") if relative_path else []
+    return tuple((part.lower(), part) for part in parts) + (_GROUP_SEPARATOR,)
+
+
+def parse_listing_line(line: str) -> tuple[str, bool, os.stat_result]:
+    r"""Read the path, type, size, modification time and optional mode of a listing line.
+
+    The fields are separated by tabs, as printed by
+    find <root> -printf '%p\t%y\t%s\t%T@\t%m\n' (or lfs find with the same --printf).
+    The type is 'd' for directories, anything else is a file.
+    The mode is in octal, the default permissions are used when it is missing.
+
+    Returns
+    -------
+    tuple
+        The path, whether it is a directory and a stat result with the values of the line.
+    """
+    fields = line.rstrip("\n").split("\t")
+    if len(fields) < 4:
+        raise ValueError(f"Expected at least 4 tab separated fields, got {len(fields)}")
+    path, entry_type, size, mtime = fields[:4]
+    is_dir = entry_type == "d"
+    if len(fields) > 4 and fields[4]:
+        permissions = int(fields[4], 8)
+    else:
+        permissions = DEFAULT_DIRECTORY_MODE if is_dir else DEFAULT_FILE_MODE
+    mode = (stat.S_IFDIR if is_dir else stat.S_IFREG) | permissions
+    mtime = float(mtime)
+    # (mode, ino, dev, nlink, uid, gid, size, atime, mtime, ctime)
+    stat_result = os.stat_result((mode, 0, 0, 1, 0, 0, int(size), mtime, mtime, mtime))
+    return path.rstrip("/") or "/", is_dir, stat_result
+
+
+def _relative_path(path: str, root: str) -> str | None:
+    """Return the path relative to the root with '/' separators, None if it is outside."""
+    if path == root:
+        return ""
+    prefix = root if root.endswith("/") else root + "/"
+    return path[len(prefix) :] if path.startswith(prefix) else None
+
+
+def _line_path(line: str) -> str:
+    return line.split("\t", 1)[0].rstrip("/") or "/"
+
+
+def sort_listing(
+    listing_path: str | Path,
+    output_path: str | Path,
+    root: str | Path,
+    chunk_rows: int = SORT_CHUNK_ROWS,
+) -> None:
+    """Sort a listing file into the order read by generate_tree_from_listing().
+
+    See sort_listing_lines().
+    """
+    with open(listing_path, buffering=LISTING_BUFFER_SIZE) as listing:
+        sort_listing_lines(listing, output_path, root, chunk_rows)
+
+
+def sort_listing_lines(
+    lines: Iterable[str],
+    output_path: str | Path,
+    root: str | Path,
+    chunk_rows: int = SORT_CHUNK_ROWS,
+) -> None:
+    """Write the lines of a listing to a file, in the order read by generate_tree_from_lines().
+
+    Like external_sort_csv(), the lines are sorted by chunks of chunk_rows in memory,
+    saved to temporary files next to the output and merged,
+    so memory use is bounded by chunk_rows regardless of the size of the listing.
+    Lines outside of the root are left out.
+    """
+    root = str(root).rstrip("/") or "/"
+    output_path = Path(output_path)
+
+    def sort_key(line: str) -> tuple:
+        return listing_sort_key(_relative_path(_line_path(line), root))
+
+    chunk_paths = []
+    try:
+        chunk = []
+        for line in lines:
+            if _relative_path(_line_path(line), root) is None:
+                continue
+            chunk.append(line if line.endswith("\n") else line + "\n")
+            if len(chunk) >= chunk_rows:
+                chunk_paths.append(_write_sorted_chunk(chunk, sort_key, output_path.parent))
+                chunk = []
+        if chunk or not chunk_paths:
+            chunk_paths.append(_write_sorted_chunk(chunk, sort_key, output_path.parent))
+        chunk_files = [open(path, buffering=LISTING_BUFFER_SIZE) for path in chunk_paths]
+        try:
+            with open(output_path, "w", buffering=LISTING_BUFFER_SIZE) as output:
+                output.writelines(heapq.merge(*chunk_files, key=sort_key))
+        finally:
+            for chunk_file in chunk_files:
+                chunk_file.close()
+    finally:
+        for chunk_path in chunk_paths:
+            os.remove(chunk_path)
+
+
+def _write_sorted_chunk(chunk: list[str], sort_key, directory: Path) -> str:
+    chunk.sort(key=sort_key)
+    file_descriptor, chunk_path = tempfile.mkstemp(suffix=".listing", dir=directory)
+    with open(file_descriptor, "w", buffering=LISTING_BUFFER_SIZE) as chunk_file:
+        chunk_file.writelines(chunk)
+    return chunk_path
+
+
+class _ListingReader:
+    """Give the entries of each directory from a sorted listing, like the _Prefetcher does.
+
+    The listing is read forward only: the group of entries of a directory is read when
+    its listing is asked for, the groups of the directories not explored on the way
+    (filtered out, beyond the depth limit) are skipped.
+    Only the group being read is held in memory.
+    """
+
+    def __init__(self, lines, root: str):
+        self.root = root
+        self.root_path = Path(root)
+        self.root_stat = None
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+        self._entries = self._parse(lines)
+        self._next = next(self._entries, None)
+
+    def _parse(self, lines):
+        for number, line in enumerate(lines, start=1):
+            try:
+                path, is_dir, stat_result = parse_listing_line(line)
+            except ValueError as e:
+                self.logger.warning(f"Skipping line {number} of the listing: {e}")
+                continue
+            relative_path = _relative_path(path, self.root)
+            if relative_path is None:
+                continue
+            if not relative_path:
+                self.root_stat = stat_result
+                continue
+            yield listing_sort_key(relative_path)[:-1], (Path(path), is_dir, stat_result)
+
+    def listing(self, path: Path, depth: int) -> list[tuple[Path, bool, os.stat_result]]:
+        """Return the entries of a directory, empty if it has none or was already passed."""
+        relative_path = path.relative_to(self.root_path).as_posix()
+        group = _group_key("" if relative_path == "." else relative_path)
+        while self._next is not None and self._next[0] < group:
+            self._next = next(self._entries, None)
+        entries = []
+        while self._next is not None and self._next[0] == group:
+            entries.append(self._next[1])
+            self._next = next(self._entries, None)
+        return entries
+
+    def close(self) -> None:
+        pass
+
+
+def generate_tree_from_listing(
+    listing_path: str | Path,
+    root: str | Path,
+    criteria: re.Pattern | None = None,
+    filter_files: bool = False,
+    filter_dir: bool = False,
+    filter_hidden: bool = False,
+    depth_limit: int = None,
+    ignore: list = None,
+    file_tree: FileTree = None,
+    digests: bool = False,
+    digest_measures: list[str] = (),
+    presorted: bool = False,
+    chunk_rows: int = SORT_CHUNK_ROWS,
+):
+    """Create a SmartPath generator like generate_tree(), from a listing file instead of a walk.
+
+    The listing has a line per file and directory with its path, type, size,
+    modification time and optionally its mode (see parse_listing_line()),
+    e.g. a nightly 'find' or 'lfs find' dump. The filesystem is not touched:
+    the stat result and the directory listing of each path are the ones of the listing,
+    so the measures using the "stat" and "listing" inputs are taken from it.
+    The paths, their parents and is_last are the same as with generate_tree().
+
+    Parameters
+    ----------
+    listing_path: string or pathlib.Path
+        Path to the listing file.
+
+    root: string or pathlib.Path
+        The directory to explore, written like the paths of the listing.
+        Lines outside of it are ignored.
+
+    criteria, filter_files, filter_dir, filter_hidden, depth_limit, ignore, file_tree,
+    digests, digest_measures:
+        See generate_tree().
+
+    presorted: bool
+        Whether the listing is already in the order of sort_listing(),
+        otherwise it is sorted first into a temporary file.
+
+    chunk_rows: int
+        Maximum number of lines held in memory while sorting the listing.
+
+    Yields
+    ------
+    SmartPath
+        Each file and directory of the listing, in the same order as generate_tree().
+    """
+    with open(listing_path, buffering=LISTING_BUFFER_SIZE) as lines:
+        yield from generate_tree_from_lines(
+            lines,
+            root,
+            criteria=criteria,
+            filter_files=filter_files,
+            filter_dir=filter_dir,
+            filter_hidden=filter_hidden,
+            depth_limit=depth_limit,
+            ignore=ignore,
+            file_tree=file_tree,
+            digests=digests,
+            digest_measures=digest_measures,
+            presorted=presorted,
+            chunk_rows=chunk_rows,
+        )
+
+
+def generate_tree_from_lines(
+    lines: Iterable[str],
+    root: str | Path,
+    criteria: re.Pattern | None = None,
+    filter_files: bool = False,
+    filter_dir: bool = False,
+    filter_hidden: bool = False,
+    depth_limit: int = None,
+    ignore: list = None,
+    file_tree: FileTree = None,
+    digests: bool = False,
+    digest_measures: list[str] = (),
+    presorted: bool = False,
+    chunk_rows: int = SORT_CHUNK_ROWS,
+):
+    """Create a SmartPath generator like generate_tree(), from the lines of a listing.
+
+    This is generate_tree_from_listing() for lines that are not in a file,
+    e.g. made from the members of an archive (see archiveInput).
+    Unless presorted, the lines are sorted into a temporary file first.
+    """
+    ignore = ignore if ignore is not None else []
+    root_name = str(root).rstrip("/") or "/"
+    with ExitStack() as stack:
+        if not presorted:
+            sorted_path = Path(stack.enter_context(tempfile.TemporaryDirectory())) / "listing"
+            sort_listing_lines(lines, sorted_path, root_name, chunk_rows)
+            lines = stack.enter_context(open(sorted_path, buffering=LISTING_BUFFER_SIZE))
+        reader = _ListingReader(lines, root_name)
+        smart_root = SmartDirectoryPath(
+            root, parent_smart_path=None, is_last=False, file_tree=file_tree
+        )
+        # The root's own line sorts first and was read with the first entry
+        smart_root._stat = reader.root_stat
+        yield from _generate_prefetched(
+            smart_root,
+            reader,
+            criteria,
+            filter_files,
+            filter_dir,
+            filter_hidden,
+            depth_limit,
+            ignore,
+            file_tree,
+            digests,
+            digest_measures,
+        )
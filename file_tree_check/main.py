@@ -4,15 +4,39 @@ from __future__ import annotations
 
 import logging
 import re
+import sys
 from pathlib import Path
 
 from file_tree import FileTree
 
 from file_tree_check._parser import Parser
+from file_tree_check.archiveInput import generate_tree_from_archive
+from file_tree_check.asyncTraversal import (
+    generate_tree_async,
+    select_children,
+    unexplored,
+)
+from file_tree_check.backgroundWriter import (
+    WRITER_QUEUE_SIZE,
+    BackgroundRowWriter,
+    BackgroundWriter,
+)
+from file_tree_check.checksum import ChecksumCache, Checksummer
+from file_tree_check.columnarWriter import ColumnarWriter
+from file_tree_check.configurationList import ConfigurationList, PathTable
+from file_tree_check.csvStreamer import CsvStreamer, external_sort_csv
+from file_tree_check.duplicateFinder import DuplicateFinder
+from file_tree_check.fileChecker import FileChecker, create_rules
+from file_tree_check.inodeTracker import InodeTracker
+from file_tree_check.listingInput import generate_tree_from_listing
+from file_tree_check.measureRegistry import MEASURES
+from file_tree_check.pipeWriter import PipeWriter
+from file_tree_check.sidecarReader import SidecarCache, SidecarReader
 from file_tree_check.smartDirectoryPath import SmartDirectoryPath
 from file_tree_check.smartFilePath import SmartFilePath
 from file_tree_check.smartPath import SmartPath
-from file_tree_check.statBuilder import StatBuilder
+from file_tree_check.snapshotDiff import diff_main
+from file_tree_check.statBuilder import SUMMARY_BUFFER_SIZE, StatBuilder
 
 # Edit the following line to point to the config file location in your current installation:
 CONFIG_PATH = Path(__file__).parent / "config.ini"
@@ -20,6 +44,8 @@ LOGGER_NAME = "file_tree_check"
 LOGGER_FILE_FORMAT = "%(asctime)s %(name)-12s %(levelname)-8s %(message)s"
 LOGGER_CONSOLE_FORMAT = "%(name)-12s %(levelname)-8s %(message)s"
 FILENAME_MAX_LENGTH = 60
+# Size in bytes of the write buffer of the file tree output
+TREE_BUFFER_SIZE = 1024 * 1024
 
 
 def _create_logger(
@@ -84,6 +110,9 @@ def generate_tree(
     depth_limit: int = None,
     ignore: list = None,
     file_tree: FileTree = None,
+    digests: bool = False,
+    digest_measures: list[str] = (),
+    inode_tracker: InodeTracker | None = None,
 ):  # noqa
     """Create a SmartFilePath or SmartDirectoryPath generator object. # noqa: D410 D411 D400
 
@@ -141,6 +170,20 @@ def generate_tree(
         The FileTree object that will be used to template the file structure and assign
         identities to each file and directory.
 
+    digests: bool
+        Whether to compute the digest of each directory's subtree (see SmartPath.compute_digest())
+        once all its children have been explored.
+        Since a directory is yielded before its children, its digest is only available
+        after the end of the iteration.
+
+    digest_measures: list of string
+        The name of the measures whose values are part of the digests.
+
+    inode_tracker: InodeTracker
+        Keeps the inode of the directories explored so none is explored twice,
+        handles the symbolic links to directories and finds the hard links to files.
+        If None, every directory found is explored, symbolic links included.
+
     Yields
     ------
     generator object
@@ -161,6 +204,8 @@ def generate_tree(
         is_last=False,
         file_tree=file_tree,
     )
+    if inode_tracker is not None:
+        inode_tracker.visit_root(smart_root)
     yield from generate_tree_actual(
         smart_root,
         smart_root.is_last,
@@ -171,6 +216,9 @@ def generate_tree(
         depth_limit,
         ignore,
         file_tree,
+        digests,
+        digest_measures,
+        inode_tracker,
     )
 
 
@@ -184,51 +232,33 @@ def generate_tree_actual(
     depth_limit: int = None,
     ignore: list = None,
     file_tree: FileTree = None,
+    digests: bool = False,
+    digest_measures: list[str] = (),
+    inode_tracker: InodeTracker | None = None,
 ):
     logger = logging.getLogger(LOGGER_NAME)
     if depth_limit is not None and smart_root.depth >= depth_limit:
         return
+    if unexplored(smart_root, inode_tracker, digests, digest_measures):
+        yield smart_root
+        return
 
-    if criteria is not None:
-        filtered_children = [
-            path
-            for path in smart_root.path.iterdir()
-            if criteria.match(str(path.name)) is not None
-            or (path.is_dir() and not filter_dir)
-            or (path.is_file() and not filter_files)
-        ]
-        children = sorted(filtered_children, key=lambda s: str(s).lower())
-    else:
-        children = sorted(list(smart_root.path.iterdir()), key=lambda s: str(s).lower())
-
-    count = 1
-    for path in children:
-        try:
-            # Check if this path is the last children in its parent's directory
-            is_last = count == len(children)
-            # If the children is a directory, another instance of the method is called and
-            # its output is propagated up the generator
-            skip = any(path.name == ignore_name for ignore_name in ignore) or (
-                path.name.startswith(".") and filter_hidden
-            )
-            if not skip:
-                if path.is_dir():
-                    smart_child = SmartDirectoryPath(path, smart_root, is_last, file_tree)
-                # If the children is a file, generate a single instance of SmartPath
-                #  associated to its path
-                else:
-                    smart_child = SmartFilePath(path, smart_root, is_last, file_tree)
-                smart_root.add_children(smart_child)
-                count += 1
-
-        except FileNotFoundError as e:
-            logger.warning("FileNotFoundError", e)
-            continue
+    # The children are created by the same function as the asynchronous traversal
+    select_children(
+        smart_root,
+        [(path, path.is_dir(), None) for path in smart_root.path.iterdir()],
+        criteria,
+        filter_files,
+        filter_dir,
+        filter_hidden,
+        ignore,
+        file_tree,
+        inode_tracker,
+    )
     yield smart_root
     for child in smart_root.children:
         try:
-            path = child.path
-            if path.is_dir():
+            if isinstance(child, SmartDirectoryPath):
                 yield from generate_tree_actual(
                     child,
                     is_last=is_last,
@@ -239,12 +269,20 @@ def generate_tree_actual(
                     ignore=ignore,
                     depth_limit=depth_limit,
                     file_tree=file_tree,
+                    digests=digests,
+                    digest_measures=digest_measures,
+                    inode_tracker=inode_tracker,
                 )
             else:
+                if inode_tracker is not None:
+                    inode_tracker.track_file(child)
                 yield child
         except FileNotFoundError as e:
             logger.warning("FileNotFoundError", e)
             continue
+    # Every child directory was explored and has its digest, the subtree can be hashed
+    if digests:
+        smart_root.compute_digest(digest_measures)
 
 
 def get_data_from_paths(
@@ -252,8 +290,11 @@ def get_data_from_paths(
     output_path: Path | None = None,
     measures: list[str] = [],
     configuration: Configuration | None = None,
-    pipe_file_data: bool = False,
     tree: FileTree | None = None,
+    row_writers: list[CsvStreamer | ColumnarWriter] = (),
+    collapse_tree: bool = False,
+    background_writers: bool = False,
+    writer_queue_size: int = WRITER_QUEUE_SIZE,
 ) -> tuple[dict, dict]:
     """Iterate over each file/directory in the generator to get measure. # noqa: D410 D411 D400
 
@@ -291,19 +332,26 @@ def get_data_from_paths(
         - depth_limit: int passed to add_configuration() to limit depth of analysis relative
           to root.
 
-    pipe_file_data: bool
-        Whether to output the data from each file found directly
-        to the standard output during the execution.
-        By default this will print in the console which is not recommended for large dataset.
-        If the script is followed by a pipe, this will pass the data to the other script or command.
-        Only outputs files because directories shouldn't be relevant for the custom tests.
-        Outputted format is  a single string per file in the format:
-        'path,identifier,file_size,modified_time'.
-        File_size is in bytes, modified_time is in seconds (epoch time).
-
     tree: FileTree
         The FileTree object used for templating not used currently.
 
+    row_writers: list of CsvStreamer, ColumnarWriter or PipeWriter
+        Outputs to which the row of each file/directory is given as soon as
+        the path is measured instead of waiting for the end of the exploration.
+
+    collapse_tree: bool
+        Whether to write the file tree output with collapsed_tree_lines() once the exploration
+        is complete, instead of a line per path during the exploration.
+        The paths must be generated with their digests (see generate_tree()).
+
+    background_writers: bool
+        Whether the file tree lines and the rows of the row writers
+        are written by dedicated threads (see BackgroundWriter), so the exploration
+        does not wait for slow outputs. Otherwise they are written by the exploring thread.
+
+    writer_queue_size: int
+        Maximum number of batches waiting for each writer thread before the exploration waits.
+
     Returns
     -------
     stat_dict: dict
@@ -342,51 +390,169 @@ def get_data_from_paths(
 
     """
     configurations = {}
+    path_table = PathTable()
     stat_dict = {measure_name: {} for measure_name in measures}
-    if output_path is None:
-        for path in paths:
-            stat_dict, configurations = data_from_paths_helper(
-                path=path,
-                measures=measures,
-                configuration=configuration,
-                pipe_file_data=pipe_file_data,
-                stat_dict=stat_dict,
-                configurations=configurations,
-                tree=tree,
-            )
-    else:
-        with open(output_path, "w", encoding="utf-8") as f:
+    background = []
+    if background_writers:
+        row_writers = [
+            BackgroundRowWriter(row_writer, writer_queue_size) for row_writer in row_writers
+        ]
+        background += row_writers
+    try:
+        if output_path is None or collapse_tree:
+            root = None
             for path in paths:
+                if root is None:
+                    root = path
                 stat_dict, configurations = data_from_paths_helper(
                     path=path,
                     measures=measures,
                     configuration=configuration,
-                    pipe_file_data=pipe_file_data,
                     stat_dict=stat_dict,
                     configurations=configurations,
                     tree=tree,
+                    row_writers=row_writers,
+                    path_table=path_table,
+                )
+            if output_path is not None and root is not None:
+                with open(output_path, "w", encoding="utf-8", buffering=TREE_BUFFER_SIZE) as f:
+                    f.writelines(collapsed_tree_lines(root, measures, FILENAME_MAX_LENGTH))
+        else:
+            with open(output_path, "w", encoding="utf-8", buffering=TREE_BUFFER_SIZE) as f:
+                tree_writer = (
+                    BackgroundWriter(f.write, "tree", writer_queue_size)
+                    if background_writers
+                    else None
                 )
-                f.write(path.displayable(measures=measures, name_max_length=FILENAME_MAX_LENGTH))
+                write_line = f.write if tree_writer is None else tree_writer.write
+                try:
+                    for path in paths:
+                        stat_dict, configurations = data_from_paths_helper(
+                            path=path,
+                            measures=measures,
+                            configuration=configuration,
+                            stat_dict=stat_dict,
+                            configurations=configurations,
+                            tree=tree,
+                            row_writers=row_writers,
+                            path_table=path_table,
+                        )
+                        write_line(
+                            path.displayable(measures=measures, name_max_length=FILENAME_MAX_LENGTH)
+                        )
+                finally:
+                    if tree_writer is not None:
+                        tree_writer.close()
+    finally:
+        for writer in background:
+            writer.close()
 
     return stat_dict, configurations
 
 
+def collapsed_tree_lines(
+    root: SmartPath, measures: list[str] = (), name_max_length: int = FILENAME_MAX_LENGTH
+):
+    """Yield the lines of the file tree output, folding the repeated identical subtrees.
+
+    Among the subdirectories of a directory, the ones with the same identifier and digest
+    as a previous one are not written. The first of them is written with its content,
+    followed by a line such as "... and 9,431 more `sub-*` with identical structure".
+    Detecting the identical subtrees only compares their digests,
+    so the paths must have been generated with digests=True (see generate_tree()).
+    Other lines are the same as the ones of SmartPath.displayable().
+
+    Parameters
+    ----------
+    root: SmartPath
+        The root of the file structure, whose children were all explored.
+
+    measures: list of string
+        The name of the measures displayed on each line.
+
+    name_max_length: int
+        The length of the name column.
+
+    Yields
+    ------
+    string
+        Each line of the file tree, ending with a new line.
+    """
+    yield root.display(measures, name_max_length)
+    yield from _collapsed_children_lines(root, "", measures, name_max_length)
+
+
+def _collapsed_children_lines(
+    directory: SmartPath, prefix: str, measures: list[str], name_max_length: int
+):
+    # Each entry is a child to display and the number of identical subtrees it stands for
+    entries = []
+    representatives = {}
+    for child in directory.children:
+        if isinstance(child, SmartDirectoryPath) and child.digest is not None:
+            key = (child.identifier, child.digest)
+            if key in representatives:
+                representatives[key][1] += 1
+                continue
+            entry = representatives[key] = [child, 0]
+        else:
+            entry = [child, 0]
+        entries.append(entry)
+
+    for index, (child, repeats) in enumerate(entries):
+        is_last = index == len(entries) - 1
+        # The line about the folded subtrees comes after the representative
+        child_is_last = is_last and not repeats
+        connector = (
+            SmartPath.display_filename_prefix_last
+            if child_is_last
+            else SmartPath.display_filename_prefix_middle
+        )
+        yield f"{prefix}{connector} {child.display(measures, name_max_length)}"
+        yield from _collapsed_children_lines(
+            child,
+            prefix
+            + (
+                SmartPath.display_parent_prefix_middle
+                if child_is_last
+                else SmartPath.display_parent_prefix_last
+            ),
+            measures,
+            name_max_length,
+        )
+        if repeats:
+            connector = (
+                SmartPath.display_filename_prefix_last
+                if is_last
+                else SmartPath.display_filename_prefix_middle
+            )
+            pattern = re.sub(r"\{[^}]*\}", "*", child.identifier)
+            yield (
+                f"{prefix}{connector} ... and {repeats:,} more `{pattern}` "
+                "with identical structure\n"
+            )
+
+
 def data_from_paths_helper(
     path: SmartPath,
     measures: list[str] = [],
     configuration: Configuration | None = None,
-    pipe_file_data: bool = False,
     stat_dict: dict = {},
     configurations: dict = {},
     tree: FileTree | None = None,
+    row_writers: list[CsvStreamer | ColumnarWriter] = (),
+    path_table: PathTable | None = None,
 ) -> tuple[dict, dict]:
     """Must be data from paths helper function.
 
-    Calls add_stats method and add_configuration if specified. Also pipes
-    data to standard out if specified.
+    Calls add_stats method and add_configuration if specified,
+    and gives the path's row to the row writers if specified.
     """
     identity = path.identifier
-    stat_dict = path.add_stats(stat_dict, identity, measures=measures)
+    stats = path.get_stats(measures)
+    stat_dict = path.add_stats(stat_dict, identity, measures=measures, stats=stats)
+    for row_writer in row_writers:
+        row_writer.write_row(path, identity, stats)
     if configuration.get_configurations:
         configurations = add_configuration(
             path,
@@ -396,9 +562,9 @@ def data_from_paths_helper(
             start_depth=configuration.start_depth,
             end_depth=configuration.end_depth,
             tree=tree,
+            path_table=path_table,
+            keep_subtrees=configuration.compare_subtrees,
         )
-    if pipe_file_data and isinstance(path, SmartFilePath):
-        print(f"{path.path},{path.identifier}," f"{path.file_size},{path.modified_time}")
     return stat_dict, configurations
 
 
@@ -410,6 +576,8 @@ def add_configuration(
     start_depth: int | None = None,
     end_depth: int | None = None,
     tree: FileTree | None = None,
+    path_table: PathTable | None = None,
+    keep_subtrees: bool = False,
 ) -> dict:
     """For each directory look at how it's content is structured and save \
        that structure as a configuration.
@@ -458,6 +626,16 @@ def add_configuration(
     end_depth: int
         The end of the depth range.
 
+    path_table: PathTable
+        Where the paths of the configurations are stored.
+        Sharing one between calls stores the common part of the paths only once.
+        If None, each identifier's configurations use their own.
+
+    keep_subtrees: bool
+        Whether to also keep the directory in the subtrees attribute of its identifier's
+        ConfigurationList, so whole subtrees can be grouped by digest at the end of the
+        exploration.
+
     Returns
     -------
     configurations: dict
@@ -483,35 +661,14 @@ def add_configuration(
             return configurations
 
     if path_unique_identifier not in configurations:
-        configurations[path_unique_identifier] = []
-    children_list = [child.identifier for child in path.children]
-    children_list.sort()
-
-    # Compare that organisation with others already found
-    # The list of children is the key of the dict and the value
-    # is a list of every path with that configuration
-    if len(configurations[path_unique_identifier]) == 0:
-        # configurations has a list of every configuration associated
-        # to every identifier, each element of the list
-        # is a dict containing the list of children and the path to all directories
-        # following this configuration
-        configurations[path_unique_identifier] = [
-            {"structure": children_list, "paths": [str(path.path)]}
-        ]
-    else:
-        # Searching if current configuration has already been seen
-        for configuration in configurations[path_unique_identifier]:
-            if configuration["structure"] == children_list:
-                # If the configuration is known, add the current path
-                # to the list of that configuration
-                configuration["paths"].append(str(path.path))
-                return configurations
-        # if no match were found, a new configuration is added
-        # to the identifier's list of configurations
-        configurations[path_unique_identifier].append(
-            {"structure": children_list, "paths": [str(path.path)]}
-        )
-
+        configurations[path_unique_identifier] = ConfigurationList(path_table)
+    children_list = sorted(child.identifier for child in path.children)
+
+    # Compare that organisation with others already found,
+    # the sorted list of children is used as key to find a matching configuration
+    configurations[path_unique_identifier].add_path(children_list, path)
+    if keep_subtrees:
+        configurations[path_unique_identifier].subtrees.append(path)
     return configurations
 
 
@@ -533,9 +690,180 @@ class Configuration:
             self.end_depth = None
         self.limit_depth = pars.limit_depth
         self.depth_limit = pars.depth_limit if self.limit_depth else None
+        self.compare_subtrees = pars.compare_subtrees
+
+
+def create_plots(stat_builder: StatBuilder, pars: Parser) -> None:
+    """Create the distribution plots with the pipeline selected in the configuration.
+
+    The fast pipeline only saves the plots,
+    so the regular one is used when the plots are not saved.
+    """
+    image_path = Path(pars.plots_path) if pars.save_plots else None
+    if pars.fast_plots and image_path is not None:
+        stat_builder.create_histograms(
+            image_path,
+            plots_per_measure=pars.num_plots,
+            figure_per_measure=pars.figure_per_measure,
+            processes=pars.plot_processes,
+        )
+    else:
+        stat_builder.create_plots(
+            plots_per_measure=pars.num_plots,
+            save_path=image_path,
+            show_plot=pars.print_plots,
+        )
+
+
+def create_paths(pars: Parser, tree: FileTree):
+    """Create the SmartPath generator of the traversal selected in the configuration."""
+    options = dict(
+        criteria=pars.search_expression,
+        filter_files=pars.filter_files,
+        filter_dir=pars.filter_directories,
+        depth_limit=pars.depth_limit,
+        filter_hidden=pars.filter_hidden,
+        ignore=pars.filter_custom_list,
+        file_tree=tree,
+        digests=pars.compare_subtrees or pars.collapse_tree,
+        digest_measures=pars.measures if pars.subtree_measures else (),
+    )
+    if pars.archive_path is not None:
+        # The paths and their stats come from the member headers, nothing is extracted
+        paths = generate_tree_from_archive(pars.archive_path, pars.archive_root, **options)
+    elif pars.listing_path is not None:
+        # The paths and their stats come from the listing, the filesystem is not walked
+        paths = generate_tree_from_listing(
+            pars.listing_path, pars.root_path, presorted=pars.listing_sorted, **options
+        )
+    elif pars.async_traversal:
+        paths = generate_tree_async(
+            pars.root_path,
+            concurrency=pars.traversal_concurrency,
+            prefetch_stats=pars.pipe_data
+            or pars.run_checks
+            or any("stat" in MEASURES[measure].inputs for measure in pars.measures),
+            inode_tracker=InodeTracker(pars.symlink_policy, pars.hard_links_once),
+            **options,
+        )
+    else:
+        paths = generate_tree(
+            pars.root_path,
+            inode_tracker=InodeTracker(pars.symlink_policy, pars.hard_links_once),
+            **options,
+        )
+    if "checksum" in pars.measures:
+        # The files are hashed ahead of their measures, on a process pool
+        checksummer = Checksummer(
+            processes=pars.checksum_processes,
+            cache=(
+                ChecksumCache(pars.checksum_cache_path)
+                if pars.checksum_cache_path is not None
+                else None
+            ),
+        )
+        paths = checksummer.checksum_paths(paths)
+    if pars.sidecar_keys:
+        # The sidecars are read ahead of their measures, on a process pool
+        sidecar_reader = SidecarReader(
+            pars.sidecar_keys,
+            processes=pars.sidecar_processes,
+            cache=(
+                SidecarCache(pars.sidecar_cache_path)
+                if pars.sidecar_cache_path is not None
+                else None
+            ),
+        )
+        paths = sidecar_reader.read_paths(paths)
+    return paths
+
+
+def create_checker(pars: Parser) -> FileChecker | None:
+    """Create the FileChecker with the rules of the configuration, if checks are enabled."""
+    if not pars.run_checks:
+        return None
+    return FileChecker(
+        create_rules(
+            identifiers=pars.check_identifiers,
+            min_size=pars.check_min_size,
+            required_permissions=pars.check_required_permissions,
+            forbidden_permissions=pars.check_forbidden_permissions,
+            uid=pars.check_uid,
+            gid=pars.check_gid,
+            min_file_count=pars.check_min_file_count,
+            max_file_count=pars.check_max_file_count,
+        )
+    )
+
+
+def create_duplicate_finder(pars: Parser, tree: FileTree) -> DuplicateFinder | None:
+    """Create the DuplicateFinder of the configuration, if duplicates are searched."""
+    if not pars.find_duplicates:
+        return None
+    return DuplicateFinder(
+        min_size=pars.duplicate_min_size,
+        boundary_placeholder=pars.duplicate_boundary_placeholder,
+        boundary_depth=pars.duplicate_boundary_depth,
+        file_tree=tree,
+        processes=pars.checksum_processes,
+        cache=(
+            ChecksumCache(pars.checksum_cache_path)
+            if pars.checksum_cache_path is not None
+            else None
+        ),
+    )
+
+
+def write_reports(
+    pars: Parser, checker: FileChecker | None, duplicate_finder: DuplicateFinder | None
+) -> None:
+    """Write the reports of the checks and duplicates collected during the exploration."""
+    logger = logging.getLogger(LOGGER_NAME)
+    if checker is not None:
+        logger.debug("Writing checks report")
+        with open(pars.checks_path, "w", buffering=SUMMARY_BUFFER_SIZE) as f:
+            checker.write_report(f, pars.root_path)
+    if duplicate_finder is not None:
+        logger.debug("Writing duplicates report")
+        try:
+            with open(pars.duplicates_path, "w", buffering=SUMMARY_BUFFER_SIZE) as f:
+                duplicate_finder.write_report(f, pars.root_path)
+        finally:
+            if duplicate_finder.cache is not None:
+                duplicate_finder.cache.close()
+
+
+def create_row_writers(
+    pars: Parser, tree: FileTree, collectors: list[FileChecker | DuplicateFinder | None] = ()
+) -> list[CsvStreamer | ColumnarWriter | PipeWriter | FileChecker | DuplicateFinder]:
+    """Create the outputs written during the exploration selected in the configuration.
+
+    The collectors given (checker, duplicate finder) are added to them,
+    so they receive each path during the exploration. None values are skipped.
+    """
+    row_writers = [collector for collector in collectors if collector is not None]
+    if pars.pipe_data:
+        row_writers.append(PipeWriter(record_format=pars.pipe_format, file_tree=tree))
+    if pars.csv_path is not None and pars.stream_csv:
+        row_writers.append(CsvStreamer(pars.csv_path, pars.measures))
+    if pars.create_columnar and pars.columnar_path is not None:
+        row_writers.append(
+            ColumnarWriter(
+                pars.columnar_path,
+                pars.measures,
+                file_tree=tree,
+                file_format=pars.columnar_format,
+            )
+        )
+    return row_writers
 
 
 def main():
+    # 'tree_check diff old.csv new.csv' compares two scans instead of exploring a directory
+    if len(sys.argv) > 1 and sys.argv[1] == "diff":
+        diff_main(sys.argv[2:])
+        return
+
     pars = Parser()
     pars = pars.make_parser(Path(CONFIG_PATH))
 
@@ -579,25 +907,30 @@ def main():
     )
     logger.debug("Launching exploration of target directory.")
 
-    paths = generate_tree(
-        pars.root_path,
-        criteria=pars.search_expression,
-        filter_files=pars.filter_files,
-        filter_dir=pars.filter_directories,
-        depth_limit=pars.depth_limit,
-        filter_hidden=pars.filter_hidden,
-        ignore=pars.filter_custom_list,
-        file_tree=tree,
-    )
+    paths = create_paths(pars, tree)
 
-    stat_dict, configurations = get_data_from_paths(
-        paths,
-        output_path=pars.tree_path,
-        measures=pars.measures,
-        configuration=configuration,
-        pipe_file_data=pars.pipe_data,
-        tree=tree,
-    )
+    checker = create_checker(pars)
+    duplicate_finder = create_duplicate_finder(pars, tree)
+    row_writers = create_row_writers(pars, tree, [checker, duplicate_finder])
+    try:
+        stat_dict, configurations = get_data_from_paths(
+            paths,
+            output_path=pars.tree_path,
+            measures=pars.measures,
+            configuration=configuration,
+            tree=tree,
+            row_writers=row_writers,
+            collapse_tree=pars.collapse_tree,
+            background_writers=pars.background_writers,
+            writer_queue_size=pars.writer_queue_size,
+        )
+    finally:
+        for row_writer in row_writers:
+            row_writer.close()
+    if pars.csv_path is not None and pars.stream_csv and pars.sort_csv:
+        logger.debug("Sorting streamed CSV")
+        external_sort_csv(pars.csv_path)
+    write_reports(pars, checker, duplicate_finder)
     logger.info(
         f"Retrieved {len(stat_dict)} measures for "
         f"{len(list(stat_dict.values())[0])} different directory name"
@@ -612,18 +945,29 @@ def main():
 
     if pars.create_plots:
         logger.debug("Giving the data to the graphic creator")
-        image_path = Path(pars.image_path) if pars.save_plots else None
-
-        stat_builder.create_plots(
-            plots_per_measure=pars.num_plots,
-            save_path=image_path,
-            show_plot=pars.print_plots,
-        )
+        create_plots(stat_builder, pars)
     if pars.summary_path is not None:
         logger.debug("Creating summary")
-        with open(pars.summary_path, "w") as f:
-            f.write(stat_builder.create_summary(Path(pars.root_path), configurations))
-    if pars.csv_path is not None:
+        with open(pars.summary_path, "w", buffering=SUMMARY_BUFFER_SIZE) as f:
+            stat_builder.write_summary(
+                f,
+                Path(pars.root_path),
+                configurations,
+                max_outliers=pars.summary_max_outliers,
+                list_common=pars.summary_list_common,
+                cluster_similarity=pars.cluster_similarity if pars.cluster_configurations else 0,
+                compare_subtrees=pars.compare_subtrees,
+            )
+    if pars.create_json_summary and pars.json_summary_path is not None:
+        logger.debug("Creating JSON summary")
+        with open(pars.json_summary_path, "w", buffering=SUMMARY_BUFFER_SIZE) as f:
+            stat_builder.write_json_summary(
+                f,
+                Path(pars.root_path),
+                configurations,
+                max_outliers=pars.summary_max_outliers,
+            )
+    if pars.csv_path is not None and not pars.stream_csv:
         logger.debug("Creating CSV")
         stat_builder.create_csv(pars.csv_path)
 
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import logging
+import os
+import stat
+import zlib
+from typing import TYPE_CHECKING, Any, Callable
+
+from .checksum import hash_file
+from .gitAnnex import annex_key, annex_key_size
+from .niftiHeader import NIFTI2_HEADER_SIZE, NIFTI_SUFFIXES, parse_nifti_header
+
+if TYPE_CHECKING:
+    from .smartPath import SmartPath
+
+# The raw data a measure can be computed from
+MEASURE_INPUTS = ("stat", "listing", "header", "link")
+# Size in bytes of a block counted by st_blocks
+STAT_BLOCK_SIZE = 512
+# Size in bytes of the compressed chunks read to decompress the header of gzipped files
+GZIP_READ_SIZE = 4096
+
+
+class Measure:
+    """A measure that can be taken on files and/or directories, computed from raw inputs.
+
+    Attributes
+    ----------
+    name: string
+        Name of the measure, used in the configuration, the outputs and stat_dict.
+
+    compute: callable
+        Called with the SmartPath and a dictionary of the inputs declared,
+        e.g. {'stat': os.stat_result}, returning the value of the measure.
+
+    inputs: tuple of string
+        The raw inputs the measure is computed from, among MEASURE_INPUTS:
+
+        - "stat": the stat result of the path.
+        - "listing": the (name, is_dir) of each entry of a directory.
+        - "header": the first header_size bytes of a file, decompressed for '.gz' files.
+        - "link": the target of a symbolic link, None if the path is not one.
+
+    files: bool
+        Whether the measure is taken on files, its value is None for files otherwise.
+
+    directories: bool
+        Whether the measure is taken on directories, its value is None for directories otherwise.
+
+    header_size: int
+        Number of bytes needed at the beginning of files, with the "header" input.
+
+    arrow_type: string
+        Arrow type alias of the measure's column in the columnar output.
+
+    suffixes: tuple of string
+        Endings of the names of the files the measure is taken on, all files if empty.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        compute: Callable[[SmartPath, dict], Any],
+        inputs: tuple[str, ...] = (),
+        files: bool = True,
+        directories: bool = True,
+        header_size: int = 0,
+        arrow_type: str = "int64",
+        suffixes: tuple[str, ...] = (),
+    ):
+        unknown = set(inputs) - set(MEASURE_INPUTS)
+        if unknown:
+            raise ValueError(f"Unknown inputs {sorted(unknown)} for measure {name}")
+        self.name = name
+        self.compute = compute
+        self.inputs = tuple(inputs)
+        self.files = files
+        self.directories = directories
+        self.header_size = header_size
+        self.arrow_type = arrow_type
+        self.suffixes = tuple(suffixes)
+
+    def applies(self, path: SmartPath) -> bool:
+        """Return whether the measure is taken on this path."""
+        if path.is_directory:
+            return self.directories
+        return self.files and (not self.suffixes or path.path.name.endswith(self.suffixes))
+
+
+# The registered measures, in the order their values are given by compute_measures()
+MEASURES: dict[str, Measure] = {}
+
+
+def register_measure(measure: Measure) -> Measure:
+    """Add a measure to the registry so it can be selected like the built-in ones."""
+    MEASURES[measure.name] = measure
+    return measure
+
+
+def list_directory(path: SmartPath) -> list[tuple[str, bool]]:
+    """Return the name of each entry of a directory and whether it is a directory.
+
+    Like os.walk(), symbolic links to directories count as directories
+    and entries that cannot be stat'ed count as files.
+    The listing fetched ahead of time by the traversal is used if there is one.
+    """
+    if path._listing is not None:
+        return path._listing
+    entries = []
+    with os.scandir(path.path) as iterator:
+        for entry in iterator:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, is_dir))
+    return entries
+
+
+def read_header(path: SmartPath, size: int) -> bytes:
+    """Return the first size bytes of a file, or all of it if it is shorter.
+
+    Files ending with '.gz' are decompressed as they are read, only the compressed chunks
+    needed to get size bytes are read and decompressed.
+    A ValueError is raised if they are not valid gzip files.
+    """
+    with open(path.path, "rb") as file:
+        if not path.path.name.endswith(".gz"):
+            return file.read(size)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        header = b""
+        try:
+            while len(header) < size and not decompressor.eof:
+                chunk = file.read(GZIP_READ_SIZE)
+                if not chunk:
+                    break
+                header += decompressor.decompress(chunk, size - len(header))
+                # Output held back by max_length is drained before reading more
+                while decompressor.unconsumed_tail and len(header) < size:
+                    header += decompressor.decompress(
+                        decompressor.unconsumed_tail, size - len(header)
+                    )
+        except zlib.error as e:
+            raise ValueError(f"{path.path} is not a valid gzip file: {e}") from e
+        return header
+
+
+def read_link(path: SmartPath) -> str | None:
+    """Return the target of a symbolic link without following it, None if it is not a link."""
+    try:
+        return os.readlink(path.path)
+    except OSError:
+        return None
+
+
+def compute_measures(path: SmartPath, measures: list[str]) -> dict:
+    """Take the given measures on a path, fetching each raw input a single time.
+
+    The inputs declared by the measures are fetched first, once each
+    (a single stat, a single listing, a single read of the largest header needed,
+    a single readlink),
+    then every measure is computed from them.
+    The stat result is the one kept by SmartPath.stat(), shared with the other users.
+
+    Parameters
+    ----------
+    path: SmartPath
+        The file or directory to measure.
+
+    measures: list of string
+        The name of the measures to take, registered in MEASURES.
+
+    Returns
+    -------
+    dict
+        The value of each measure keyed by its name, in the order of the registry.
+        Measures that do not apply to the path have a None value.
+    """
+    unknown = [name for name in measures if name not in MEASURES]
+    if unknown:
+        raise ValueError(f"Unknown measures: {unknown}, expected some of {list(MEASURES)}")
+    selected = [
+        measure for name, measure in MEASURES.items() if name in measures and measure.applies(path)
+    ]
+    logger = logging.getLogger(f"file_tree_check.{__name__}")
+    inputs = {}
+    needed = {name for measure in selected for name in measure.inputs}
+    if "stat" in needed:
+        inputs["stat"] = path.stat()
+    if "listing" in needed:
+        inputs["listing"] = list_directory(path)
+    if "link" in needed:
+        inputs["link"] = read_link(path)
+    if "header" in needed:
+        try:
+            inputs["header"] = read_header(
+                path, max(measure.header_size for measure in selected if "header" in measure.inputs)
+            )
+        except (OSError, ValueError) as e:
+            # Unreadable, vanished or not on disk (listing and archive inputs)
+            logger.warning(f"Could not read the header of {path.path}: {e}")
+            inputs["header"] = b""
+    stats = {name: None for name in MEASURES if name in measures}
+    for measure in selected:
+        try:
+            stats[measure.name] = measure.compute(path, inputs)
+        except (ValueError, IndexError) as e:
+            logger.warning(f"Could not measure {measure.name} of {path.path}: {e}")
+    return stats
+
+
+def _counted_size(path: SmartPath, size: int) -> int:
+    """Return the size of a path, 0 for the hard links to a file already counted."""
+    return 0 if path.hard_link_of is not None else int(size)
+
+
+FILE_SIZE = register_measure(
+    Measure(
+        "file_size",
+        lambda path, inputs: _counted_size(path, inputs["stat"].st_size),
+        inputs=("stat",),
+    )
+)
+register_measure(
+    Measure(
+        "file_count",
+        lambda path, inputs: sum(not is_dir for _, is_dir in inputs["listing"]),
+        inputs=("listing",),
+        files=False,
+    )
+)
+register_measure(
+    Measure(
+        "dir_count",
+        lambda path, inputs: sum(is_dir for _, is_dir in inputs["listing"]),
+        inputs=("listing",),
+        files=False,
+    )
+)
+register_measure(
+    Measure("modified_time", lambda path, inputs: int(inputs["stat"].st_mtime), inputs=("stat",))
+)
+# Space actually allocated on disk, smaller than file_size for sparse or truncated files
+register_measure(
+    Measure(
+        "allocated_size",
+        lambda path, inputs: _counted_size(
+            path, getattr(inputs["stat"], "st_blocks", 0) * STAT_BLOCK_SIZE
+        ),
+        inputs=("stat",),
+    )
+)
+register_measure(
+    Measure("link_count", lambda path, inputs: inputs["stat"].st_nlink, inputs=("stat",))
+)
+register_measure(Measure("uid", lambda path, inputs: inputs["stat"].st_uid, inputs=("stat",)))
+register_measure(Measure("gid", lambda path, inputs: inputs["stat"].st_gid, inputs=("stat",)))
+# Permission bits, written in octal like for chmod
+register_measure(
+    Measure(
+        "mode",
+        lambda path, inputs: f"{stat.S_IMODE(inputs['stat'].st_mode):04o}",
+        inputs=("stat",),
+        arrow_type="string",
+    )
+)
+
+
+def _checksum(path: SmartPath, inputs: dict) -> str | None:
+    """Return the checksum computed ahead by a Checksummer, or hash the file now."""
+    if path.checksum is None:
+        try:
+            path.checksum = hash_file(path.path)
+        except OSError as e:
+            logging.getLogger(f"file_tree_check.{__name__}").warning(
+                f"Could not compute the checksum of {path.path}: {e}"
+            )
+    return path.checksum
+
+
+# Checksum of the content of files, see checksum.Checksummer to compute them on a process pool
+register_measure(Measure("checksum", _checksum, directories=False, arrow_type="string"))
+
+
+def _nifti_field(field: str) -> Callable[[SmartPath, dict], str | None]:
+    """Return the compute function of the measure of a NIfTI header field.
+
+    The header is parsed once per path and kept in the inputs for the other NIfTI measures.
+    Tuples are written joined by 'x', e.g. '256x256x176', so they are compared as a whole.
+    """
+
+    def compute(path: SmartPath, inputs: dict) -> str | None:
+        if "nifti" not in inputs:
+            inputs["nifti"] = parse_nifti_header(inputs["header"])
+        if inputs["nifti"] is None:
+            return None
+        value = inputs["nifti"][field]
+        if isinstance(value, tuple):
+            return "x".join(f"{item:g}" for item in value)
+        return value
+
+    return compute
+
+
+# Dimensions, voxel sizes and datatype read from the header of NIfTI images,
+# the rest of the files is never read
+register_measure(
+    Measure(
+        "nifti_shape",
+        _nifti_field("shape"),
+        inputs=("header",),
+        directories=False,
+        header_size=NIFTI2_HEADER_SIZE,
+        arrow_type="string",
+        suffixes=NIFTI_SUFFIXES,
+    )
+)
+register_measure(
+    Measure(
+        "nifti_voxel_size",
+        _nifti_field("voxel_size"),
+        inputs=("header",),
+        directories=False,
+        header_size=NIFTI2_HEADER_SIZE,
+        arrow_type="string",
+        suffixes=NIFTI_SUFFIXES,
+    )
+)
+register_measure(
+    Measure(
+        "nifti_datatype",
+        _nifti_field("datatype"),
+        inputs=("header",),
+        directories=False,
+        header_size=NIFTI2_HEADER_SIZE,
+        arrow_type="string",
+        suffixes=NIFTI_SUFFIXES,
+    )
+)
+
+
+def _annex_file_size(path: SmartPath, inputs: dict) -> int | None:
+    """Return the size in the git-annex key of an annexed file, or its stat'ed size otherwise.
+
+    Annexed files are not stat'ed, their content might not be present or be slow to reach.
+    """
+    key = annex_key(inputs["link"])
+    size = annex_key_size(key) if key is not None else None
+    if size is not None:
+        return size
+    try:
+        return _counted_size(path, path.stat().st_size)
+    except OSError as e:
+        if key is None:
+            raise
+        logging.getLogger(f"file_tree_check.{__name__}").warning(
+            f"No size in the key of {path.path} and its content is not present: {e}"
+        )
+        return None
+
+
+# Replaces FILE_SIZE when the sizes of annexed files are taken from their key
+ANNEX_FILE_SIZE = Measure("file_size", _annex_file_size, inputs=("link",))
+
+
+def set_annex_sizes(enabled: bool) -> None:
+    """Take the file_size measure of git-annex managed files from their key, or stat them."""
+    register_measure(ANNEX_FILE_SIZE if enabled else FILE_SIZE)
+
+
+# Whether the content of annexed files is present locally, files not annexed always are
+register_measure(
+    Measure(
+        "annex_present",
+        lambda path, inputs: annex_key(inputs["link"]) is None or os.path.exists(path.path),
+        inputs=("link",),
+        directories=False,
+        arrow_type="bool",
+    )
+)
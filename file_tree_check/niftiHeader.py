@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import struct
+
+# Name endings of the files read as NIfTI images
+NIFTI_SUFFIXES = (".nii", ".nii.gz")
+# Size in bytes of a NIfTI-1 and of a NIfTI-2 header
+NIFTI1_HEADER_SIZE = 348
+NIFTI2_HEADER_SIZE = 540
+
+# Name of the NIfTI datatype codes
+NIFTI_DATATYPES = {
+    1: "bool",
+    2: "uint8",
+    4: "int16",
+    8: "int32",
+    16: "float32",
+    32: "complex64",
+    64: "float64",
+    128: "rgb24",
+    256: "int8",
+    512: "uint16",
+    768: "uint32",
+    1024: "int64",
+    1280: "uint64",
+    1536: "float128",
+    1792: "complex128",
+    2048: "complex256",
+    2304: "rgba32",
+}
+
+# Format and offset of the fields read in each header version, keyed on sizeof_hdr
+_LAYOUTS = {
+    NIFTI1_HEADER_SIZE: {"datatype": ("h", 70), "dim": ("8h", 40), "pixdim": ("8f", 76)},
+    NIFTI2_HEADER_SIZE: {"datatype": ("h", 12), "dim": ("8q", 16), "pixdim": ("8d", 104)},
+}
+
+
+def parse_nifti_header(data: bytes) -> dict | None:
+    """Read the dimensions, voxel sizes and datatype from the start of a NIfTI-1 or NIfTI-2 file.
+
+    The version and byte order are found from the sizeof_hdr field.
+
+    Parameters
+    ----------
+    data: bytes
+        The first bytes of the (decompressed) file, at least NIFTI2_HEADER_SIZE for NIfTI-2.
+
+    Returns
+    -------
+    dict or None
+        The header fields, None if the data is not a complete NIfTI header:
+
+        .. code-block:: python
+
+            {'shape': (256, 256, 176), 'voxel_size': (1.0, 1.0, 1.2), 'datatype': 'int16'}
+    """
+    if len(data) < 4:
+        return None
+    for byte_order in "<>":
+        (header_size,) = struct.unpack_from(byte_order + "i", data)
+        if header_size in _LAYOUTS and len(data) >= header_size:
+            break
+    else:
+        return None
+    fields = {
+        name: struct.unpack_from(byte_order + field_format, data, offset)
+        for name, (field_format, offset) in _LAYOUTS[header_size].items()
+    }
+    dimensions = fields["dim"][0]
+    if not 1 <= dimensions <= 7:
+        return None
+    (datatype,) = fields["datatype"]
+    return {
+        "shape": tuple(fields["dim"][1 : dimensions + 1]),
+        "voxel_size": tuple(round(float(size), 4) for size in fields["pixdim"][1 : dimensions + 1]),
+        "datatype": NIFTI_DATATYPES.get(datatype, str(datatype)),
+    }
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from .smartPath import SmartPath
+
+# Default maximum number of paths held back while their result is computed by the pool
+POOL_WINDOW = 256
+# Number of new rows written to a cache between two commits
+CACHE_COMMIT_ROWS = 1000
+
+
+class StatCache:
+    """Values kept in an SQLite database between runs, keyed on the stat result of a file.
+
+    A value is reused while the file has the same device, inode, size and modification
+    time (in nanoseconds), so only new or modified files are processed again.
+    A file can have several named values (e.g. one per algorithm or per key),
+    each stored in its own row, so adding a name only processes the files for that name.
+    New values are committed by batches and when the cache is closed.
+
+    Subclasses set the table and the names of its name and value columns.
+
+    Attributes
+    ----------
+    path: pathlib.Path
+        Path to the database file, created if needed.
+
+    hits: int
+        Number of files whose values were all found in the cache.
+
+    misses: int
+        Number of files with values missing from the cache.
+    """
+
+    table = "stat_cache"
+    columns = ("name", "value")
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._connection = sqlite3.connect(str(self.path))
+        name, value = self.columns
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            f"device INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER, "
+            f"{name} TEXT, {value} TEXT, "
+            f"PRIMARY KEY (device, inode, size, mtime_ns, {name}))"
+        )
+
+    @staticmethod
+    def _key(stat_result: os.stat_result) -> tuple:
+        return (
+            stat_result.st_dev,
+            stat_result.st_ino,
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+        )
+
+    def get(self, stat_result: os.stat_result, names: list[str]) -> dict[str, Any] | None:
+        """Return the values of the file with this stat result, None if any is not cached."""
+        name, value = self.columns
+        rows = dict(
+            self._connection.execute(
+                f"SELECT {name}, {value} FROM {self.table} WHERE device = ? AND inode = ? "
+                "AND size = ? AND mtime_ns = ?",
+                self._key(stat_result),
+            ).fetchall()
+        )
+        if not all(name in rows for name in names):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {name: rows[name] for name in names}
+
+    def put(self, stat_result: os.stat_result, values: dict[str, Any]) -> None:
+        """Store the values of the file with this stat result."""
+        self._connection.executemany(
+            f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?, ?)",
+            [self._key(stat_result) + (name, value) for name, value in values.items()],
+        )
+        self._pending += len(values)
+        if self._pending >= CACHE_COMMIT_ROWS:
+            self._connection.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        self._connection.commit()
+        self._connection.close()
+        self._connection = None
+
+
+class PathPool(ABC):
+    """Run a worker function on some of the paths found during the exploration, on a process pool.
+
+    process_paths() wraps the SmartPath generator: the paths selected by wants() are sent
+    to the pool as soon as they are found, and each path is yielded, in the original order,
+    once the result of the worker is given to assign().
+    Up to `window` paths are held back, so the work on many files overlaps
+    with the exploration and with each other. Results found by cached() are not computed.
+
+    Subclasses implement wants(), arguments(), cached(), assign() and cache_result().
+
+    Attributes
+    ----------
+    worker: callable
+        Module level function run on the pool with the arguments() of each path.
+
+    processes: int
+        Number of processes running the worker. With 1, it runs in the exploring process.
+
+    cache: StatCache or None
+        Where the results are kept between runs.
+
+    window: int
+        Maximum number of paths held back while their result is computed.
+
+    processed_count: int
+        Number of paths the worker was run on.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    # Exceptions of the worker logged as a failure, the result of the path is then None
+    errors: tuple[type[Exception], ...] = (OSError,)
+    # What the worker does, for the failure messages
+    action = "process"
+
+    def __init__(
+        self,
+        worker: Callable,
+        processes: int = 1,
+        cache: StatCache | None = None,
+        window: int = POOL_WINDOW,
+    ):
+        self.worker = worker
+        self.processes = processes
+        self.cache = cache
+        self.window = window
+        self.processed_count = 0
+        self.logger = logging.getLogger(f"file_tree_check.{type(self).__module__}")
+
+    @abstractmethod
+    def wants(self, path: SmartPath) -> bool:
+        """Whether the worker is to be run on the path."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def arguments(self, path: SmartPath) -> tuple:
+        """Return the arguments of the worker for the path, sent to another process."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def cached(self, path: SmartPath) -> Any | None:
+        """Return the result of the path found in the cache, None if there is none."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def assign(self, path: SmartPath, result: Any | None) -> None:
+        """Keep the result on the path, None if the worker failed."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def cache_result(self, path: SmartPath, result: Any) -> None:
+        """Store the result of the path in the cache."""
+        raise NotImplementedError()
+
+    def _store(self, path: SmartPath, result: Any | None) -> None:
+        self.processed_count += 1
+        self.assign(path, result)
+        if result is not None and self.cache is not None:
+            try:
+                self.cache_result(path, result)
+            except self.errors as e:
+                self.logger.warning(f"Could not cache the result of {path.path}: {e}")
+
+    def _from_cache(self, path: SmartPath) -> bool:
+        """Assign the cached result of the path, return whether there was one."""
+        if self.cache is None:
+            return False
+        try:
+            result = self.cached(path)
+        except self.errors as e:
+            # Left to the worker, which fails the same way and gives the path a None result
+            self.logger.warning(f"Could not look up {path.path} in the cache: {e}")
+            return False
+        if result is None:
+            return False
+        self.assign(path, result)
+        return True
+
+    def _run(self, path: SmartPath) -> Any | None:
+        try:
+            return self.worker(*self.arguments(path))
+        except self.errors as e:
+            self.logger.warning(f"Could not {self.action} {path.path}: {e}")
+            return None
+
+    def process_paths(self, paths):
+        """Yield the given paths with the result of the worker assigned to the wanted ones.
+
+        Parameters
+        ----------
+        paths: iterable containing SmartPath objects
+            Expected to be the generator created by generate_tree().
+
+        Yields
+        ------
+        SmartPath
+            The same paths in the same order. The cache is closed once they are exhausted.
+        """
+        try:
+            if self.processes <= 1:
+                for path in paths:
+                    if self.wants(path) and not self._from_cache(path):
+                        self._store(path, self._run(path))
+                    yield path
+            else:
+                yield from self._process_paths_pool(paths)
+        finally:
+            self.close()
+
+    def _process_paths_pool(self, paths):
+        pending: deque[tuple[SmartPath, Future | None]] = deque()
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            for path in paths:
+                future = None
+                if self.wants(path) and not self._from_cache(path):
+                    future = executor.submit(self.worker, *self.arguments(path))
+                pending.append((path, future))
+                # Paths are released in order, as soon as the oldest one is done
+                while pending and (
+                    len(pending) > self.window or pending[0][1] is None or pending[0][1].done()
+                ):
+                    yield self._release(*pending.popleft())
+            while pending:
+                yield self._release(*pending.popleft())
+
+    def _release(self, path: SmartPath, future: Future | None) -> SmartPath:
+        if future is not None:
+            try:
+                result = future.result()
+            except self.errors as e:
+                self.logger.warning(f"Could not {self.action} {path.path}: {e}")
+                result = None
+            self._store(path, result)
+        return path
+
+    def close(self) -> None:
+        """Close the cache, called once process_paths() is exhausted."""
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import logging
+import struct
+import sys
+from typing import BinaryIO
+
+from file_tree import FileTree
+
+from .smartFilePath import SmartFilePath
+from .smartPath import SmartPath
+
+# Size in bytes of the write buffer of the piped data
+PIPE_BUFFER_SIZE = 1024 * 1024
+PIPE_FORMATS = ("csv", "ndjson", "binary")
+# Written once at the beginning of the binary stream, the last byte is the protocol version
+BINARY_MAGIC = b"FTC\x01"
+# Length of the rest of the record, file_size, modified_time and number of strings
+_BINARY_HEADER = struct.Struct(">IQqH")
+_BINARY_STRING_LENGTH = struct.Struct(">I")
+# Written in the binary format when the file_size or modified_time is unknown,
+# e.g. an annexed file whose content is missing
+BINARY_UNKNOWN_SIZE = 2**64 - 1
+BINARY_UNKNOWN_TIME = -(2**63)
+
+
+class PipeWriter:
+    """Write the data of each file found to the standard output, for downstream custom checks.
+
+    The records are written as bytes through a large buffer instead of a print() per file,
+    and the file's size and modification time come from its measures or its stat result,
+    the one kept by the path (prefetched, or from a listing or an archive).
+    Unknown values are left empty in csv, null in ndjson and written as
+    BINARY_UNKNOWN_SIZE and BINARY_UNKNOWN_TIME in binary.
+    Directories are skipped. The formats are:
+
+    - "csv": one line per file, 'path,identifier,file_size,modified_time',
+      the same as the original pipe_data output.
+    - "ndjson": one JSON object per line with the keys path, identifier, file_size,
+      modified_time and placeholders (the values of the file_tree placeholders).
+    - "binary": the 4 bytes BINARY_MAGIC, then for each file a record made of a big-endian
+      header (uint32 length of the rest of the record, uint64 file_size,
+      int64 modified_time, uint16 number of strings) followed by the strings,
+      each as an uint32 length and its UTF-8 bytes: path, identifier,
+      then the name and value of each placeholder.
+
+    The formats are described in the "Piping protocol" section of the usage documentation.
+    It has the same write_row() as the CsvStreamer, so it can be given to
+    get_data_from_paths() as a row writer.
+
+    Attributes
+    ----------
+    record_format: string
+        One of PIPE_FORMATS.
+
+    record_count: int
+        Number of records written so far.
+
+    logger: logging.Logger
+        Logger to save info and debug message.
+    """
+
+    def __init__(
+        self,
+        output: BinaryIO | None = None,
+        record_format: str = "csv",
+        file_tree: FileTree | None = None,
+        buffer_size: int = PIPE_BUFFER_SIZE,
+    ):
+        if record_format not in PIPE_FORMATS:
+            raise ValueError(
+                f"Unknown pipe format: {record_format}, expected one of {PIPE_FORMATS}"
+            )
+        self.logger = logging.getLogger(f"file_tree_check.{__name__}")
+        self.record_format = record_format
+        self.file_tree = file_tree
+        self.record_count = 0
+        self._owns_output = output is None
+        if output is None:
+            # Anything already printed must come before the records
+            sys.stdout.flush()
+            output = open(sys.stdout.fileno(), "wb", buffering=buffer_size, closefd=False)
+        self._output = output
+        self._encode = getattr(self, f"_encode_{record_format}")
+        if record_format == "binary":
+            self._output.write(BINARY_MAGIC)
+
+    def write_row(self, path: SmartPath, identifier: str, stats: dict) -> None:
+        """Write the record of a file, directories are skipped.
+
+        Parameters
+        ----------
+        path: SmartPath
+            The file/directory the record is about.
+
+        identifier: string
+            The path's identifier.
+
+        stats: dict
+            The measures already taken on this path, file_size and modified_time are reused
+            if present, otherwise they come from the path's stat result.
+        """
+        if not isinstance(path, SmartFilePath):
+            return
+        file_size, modified_time = stats.get("file_size"), stats.get("modified_time")
+        if "file_size" not in stats or "modified_time" not in stats:
+            try:
+                stat_result = path.stat()
+            except OSError as e:
+                self.logger.warning(f"Could not stat {path.path}: {e}")
+            else:
+                if "file_size" not in stats:
+                    file_size = stat_result.st_size
+                if "modified_time" not in stats:
+                    modified_time = int(stat_result.st_mtime)
+        self._output.write(self._encode(path, identifier, file_size, modified_time))
+        self.record_count += 1
+
+    def _placeholders(self, path: SmartPath) -> dict:
+        return path.get_placeholders(self.file_tree) if self.file_tree is not None else {}
+
+    def _encode_csv(self, path: SmartPath, identifier: str, file_size, modified_time) -> bytes:
+        file_size = "" if file_size is None else file_size
+        modified_time = "" if modified_time is None else modified_time
+        return f"{path.path},{identifier},{file_size},{modified_time}\n".encode(
+            "utf-8", "surrogateescape"
+        )
+
+    def _encode_ndjson(self, path: SmartPath, identifier: str, file_size, modified_time) -> bytes:
+        record = {
+            "path": str(path.path),
+            "identifier": identifier,
+            "file_size": file_size,
+            "modified_time": modified_time,
+            "placeholders": self._placeholders(path),
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        return line.encode("utf-8", "surrogateescape")
+
+    def _encode_binary(self, path: SmartPath, identifier: str, file_size, modified_time) -> bytes:
+        strings = [str(path.path), identifier]
+        for name, value in sorted(self._placeholders(path).items()):
+            strings += [name, value]
+        body = b"".join(
+            _BINARY_STRING_LENGTH.pack(len(data)) + data
+            for data in (string.encode("utf-8", "surrogateescape") for string in strings)
+        )
+        header = _BINARY_HEADER.pack(
+            _BINARY_HEADER.size - 4 + len(body),
+            BINARY_UNKNOWN_SIZE if file_size is None else file_size,
+            BINARY_UNKNOWN_TIME if modified_time is None else modified_time,
+            len(strings),
+        )
+        return header + body
+
+    def close(self) -> None:
+        if self._output is None:
+            return
+        self._output.flush()
+        if self._owns_output:
+            self._output.close()
+        self._output = None
+        self.logger.info(f"Piped {self.record_count} records in the {self.record_format} format")
+
+
+def read_binary_records(stream: BinaryIO):
+    """Read the records written by PipeWriter in the binary format.
+
+    Meant for Python consumers of the piped data, and as the reference of the format.
+
+    Yields
+    ------
+    dict
+        The path, identifier, file_size, modified_time and placeholders of each file,
+        like the records of the ndjson format (None for the unknown values).
+    """
+    magic = stream.read(len(BINARY_MAGIC))
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"Not a file_tree_check binary stream: {magic!r}")
+    while True:
+        header = stream.read(_BINARY_HEADER.size)
+        if not header:
+            return
+        length, file_size, modified_time, string_count = _BINARY_HEADER.unpack(header)
+        body = stream.read(length - (_BINARY_HEADER.size - 4))
+        strings = []
+        offset = 0
+        for _ in range(string_count):
+            (size,) = _BINARY_STRING_LENGTH.unpack_from(body, offset)
+            offset += _BINARY_STRING_LENGTH.size
+            strings.append(body[offset : offset + size].decode("utf-8", "surrogateescape"))
+            offset += size
+        yield {
+            "path": strings[0],
+            "identifier": strings[1],
+            "file_size": None if file_size == BINARY_UNKNOWN_SIZE else file_size,
+            "modified_time": None if modified_time == BINARY_UNKNOWN_TIME else modified_time,
+            "placeholders": dict(zip(strings[2::2], strings[3::2])),
+        }
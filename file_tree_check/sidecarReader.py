@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from .measureRegistry import MEASURES, Measure, register_measure
+from .pathPool import POOL_WINDOW, PathPool, StatCache
+
+if TYPE_CHECKING:
+    from .smartPath import SmartPath
+
+# Name endings of the sidecar files
+SIDECAR_SUFFIXES = (".json",)
+# Prefix of the name of the measure of each sidecar key
+SIDECAR_MEASURE_PREFIX = "sidecar_"
+# Maximum number of paths held back while their sidecar is read by the pool
+SIDECAR_WINDOW = POOL_WINDOW
+
+
+def sidecar_value(document: dict, key: str) -> str | None:
+    """Return the value of a key of a parsed sidecar, None if it is missing.
+
+    Nested keys are separated by dots, e.g. 'SliceTiming' or 'Manufacturer.Model'.
+    Values that are not strings are written as JSON (e.g. '2.0', '[0.0, 0.5]'),
+    so every value can be compared and stored the same way.
+    """
+    value = document
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+
+
+def read_sidecar(path: str | Path, keys: list[str]) -> dict[str, str | None]:
+    """Parse a JSON sidecar and return the value of each of the keys."""
+    with open(path, encoding="utf-8") as file:
+        document = json.load(file)
+    return {key: sidecar_value(document, key) for key in keys}
+
+
+class SidecarCache(StatCache):
+    """Values of sidecar keys kept in an SQLite database between runs.
+
+    Like the ChecksumCache, values are keyed on the device, inode, size and modification
+    time (in nanoseconds) of the sidecar, so unchanged sidecars are not read again.
+    Each key is stored separately, adding a key only reads the sidecars for that key.
+
+    Attributes
+    ----------
+    path: pathlib.Path
+        Path to the database file, created if needed.
+
+    hits: int
+        Number of sidecars whose values were all found in the cache.
+
+    misses: int
+        Number of sidecars with values missing from the cache.
+    """
+
+    table = "sidecars"
+    columns = ("key", "value")
+
+
+class SidecarReader(PathPool):
+    """Read the keys of the JSON sidecars found during the exploration on a process pool.
+
+    read_paths() wraps the SmartPath generator the same way Checksummer.checksum_paths() does
+    (see PathPool): sidecars are sent to the pool as soon as they are found,
+    and each path is yielded, in the original order, once the values of its keys are stored
+    in its sidecar attribute. Sidecars whose values are all found in the cache are not read.
+
+    Attributes
+    ----------
+    keys: list of string
+        The keys read from each sidecar.
+
+    processes, cache, window, logger:
+        See PathPool.
+    """
+
+    errors = (OSError, ValueError)
+    action = "read the sidecar"
+
+    def __init__(
+        self,
+        keys: list[str],
+        processes: int = 1,
+        cache: SidecarCache | None = None,
+        window: int = SIDECAR_WINDOW,
+    ):
+        super().__init__(read_sidecar, processes, cache, window)
+        self.keys = list(keys)
+
+    @property
+    def read_count(self) -> int:
+        """Number of sidecars read."""
+        return self.processed_count
+
+    @staticmethod
+    def is_sidecar(path: SmartPath) -> bool:
+        return not path.is_directory and path.path.name.endswith(SIDECAR_SUFFIXES)
+
+    def wants(self, path: SmartPath) -> bool:
+        return self.is_sidecar(path) and path.sidecar is None
+
+    def arguments(self, path: SmartPath) -> tuple:
+        return str(path.path), self.keys
+
+    def cached(self, path: SmartPath) -> dict[str, str | None] | None:
+        return self.cache.get(path.stat(), self.keys)
+
+    def assign(self, path: SmartPath, result: dict[str, str | None] | None) -> None:
+        # Unreadable sidecars have no value for any key and are read again next time
+        path.sidecar = result if result is not None else {key: None for key in self.keys}
+
+    def cache_result(self, path: SmartPath, result: dict[str, str | None]) -> None:
+        self.cache.put(path.stat(), result)
+
+    def read_paths(self, paths):
+        """Yield the given paths with the keys of each sidecar read.
+
+        Parameters
+        ----------
+        paths: iterable containing SmartPath objects
+            Expected to be the generator created by generate_tree().
+
+        Yields
+        ------
+        SmartPath
+            The same paths in the same order, sidecars having their sidecar attribute set.
+            The cache is closed once the paths are exhausted.
+        """
+        return self.process_paths(paths)
+
+    def close(self) -> None:
+        """Close the cache, called once read_paths() is exhausted."""
+        if self.cache is not None:
+            self.logger.info(f"Read {self.read_count} sidecars, {self.cache.hits} found in cache")
+        else:
+            self.logger.info(f"Read {self.read_count} sidecars")
+        super().close()
+
+
+def _sidecar_key(key: str) -> Callable[[SmartPath, dict], str | None]:
+    """Return the compute function of the measure of a sidecar key.
+
+    The value is the one read ahead by a SidecarReader, or the sidecar is read now.
+    """
+
+    def compute(path: SmartPath, inputs: dict) -> str | None:
+        if path.sidecar is None or key not in path.sidecar:
+            try:
+                values = read_sidecar(path.path, [key])
+            except OSError as e:
+                logging.getLogger(f"file_tree_check.{__name__}").warning(
+                    f"Could not read the sidecar {path.path}: {e}"
+                )
+                return None
+            path.sidecar = {**(path.sidecar or {}), **values}
+        return path.sidecar[key]
+
+    return compute
+
+
+def register_sidecar_measures(keys: list[str]) -> list[str]:
+    """Register a measure for each sidecar key, taken on the JSON files.
+
+    Returns
+    -------
+    list of string
+        The name of the measures, the keys prefixed by SIDECAR_MEASURE_PREFIX.
+    """
+    names = []
+    for key in keys:
+        name = SIDECAR_MEASURE_PREFIX + key
+        if name not in MEASURES:
+            register_measure(
+                Measure(
+                    name,
+                    _sidecar_key(key),
+                    directories=False,
+                    arrow_type="string",
+                    suffixes=SIDECAR_SUFFIXES,
+                )
+            )
+        names.append(name)
+    return names
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-import os
 from pathlib import Path
 
 from file_tree import FileTree
 
+from .measureRegistry import compute_measures
 from .smartPath import SmartPath
 
 
 class SmartDirectoryPath(SmartPath):
     """The Child class of SmartPath for directories (folder)."""
 
+    is_directory = True
+
     def __init__(
         self,
         path: Path,
@@ -19,6 +21,8 @@ class SmartDirectoryPath(SmartPath):
         file_tree: FileTree | None = None,
     ):
         self.children = []
+        # False when the traversal left the content unexplored, children is then empty
+        self.explored = True
         super().__init__(path, parent_smart_path, is_last, file_tree)
 
     @property
@@ -27,14 +31,12 @@ class SmartDirectoryPath(SmartPath):
 
         Does not count subdirectories or files contained in them.
         """
-        files = next(os.walk(self.path))[2]
-        return len(files)
+        return compute_measures(self, ["file_count"])["file_count"]
 
     @property
     def dir_count(self) -> int:
         """The number of directory found directly under this one."""
-        directories = next(os.walk(self.path))[1]
-        return len(directories)
+        return compute_measures(self, ["dir_count"])["dir_count"]
 
     def add_children(self, child: SmartPath) -> None:
         self.children.append(child)
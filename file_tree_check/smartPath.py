@@ -1,12 +1,45 @@
 from __future__ import annotations
 
+import hashlib
+import os
 import re
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from pathlib import Path
 
 from file_tree import FileTree, Template
 from file_tree.template import Literal
 
+from .measureRegistry import compute_measures
+
+# Size in bytes of the subtree digests
+DIGEST_SIZE = 16
+
+
+@lru_cache(maxsize=None)
+def placeholder_pattern(template: str) -> tuple[re.Pattern, tuple[str, ...]]:
+    """Compile a file_tree template into a regex capturing the value of each placeholder.
+
+    Required placeholders ``{name}`` become capturing groups
+    and optional parts ``[...]`` become optional groups.
+    Groups are numbered since placeholder names are not always valid group names,
+    the returned tuple gives the placeholder name of each group.
+    Compiled patterns are cached since the same few templates are used for every path.
+    """
+    names = []
+    regex = ""
+    for part in re.split(r"(\{.*?\}|\[|\])", template):
+        if part.startswith("{") and part.endswith("}"):
+            names.append(part[1:-1])
+            regex += "(.+?)"
+        elif part == "[":
+            regex += "(?:"
+        elif part == "]":
+            regex += ")?"
+        else:
+            regex += re.escape(part)
+    return re.compile(regex), tuple(names)
+
 
 class SmartPath(ABC):
     """A SmartPath object is tied to a singular path (file or directory) \
@@ -31,6 +64,22 @@ class SmartPath(ABC):
     depth: int
         The path's depth in the file structure relative to the initial target directory.
 
+    digest: bytes or None
+        Hash of the structure of the subtree under this path, see compute_digest().
+        None until computed.
+
+    checksum: string or None
+        Checksum of the content of a file, when the checksum measure is taken.
+        None until computed.
+
+    sidecar: dict or None
+        Value of each key read from a JSON sidecar, when sidecar keys are measured.
+        None until read.
+
+    hard_link_of: pathlib.Path or None
+        The first path found of the file this one is a hard link to, when hard links
+        are counted once (see inodeTracker.InodeTracker). None otherwise.
+
     Credit to stack overflow abstrus for the visual part
     """
 
@@ -39,6 +88,8 @@ class SmartPath(ABC):
     display_filename_prefix_last = "└──"
     display_parent_prefix_middle = "    "
     display_parent_prefix_last = "│   "
+    # Whether the path is a directory, set by SmartDirectoryPath
+    is_directory = False
 
     def __init__(
         self,
@@ -52,6 +103,20 @@ class SmartPath(ABC):
         # self.add_parent()
         self.is_last = is_last
         self.depth: int = self.parent.depth + 1 if self.parent else 0
+        self.digest: bytes | None = None
+        # Checksum of the file's content, see checksum.Checksummer
+        self.checksum: str | None = None
+        # Values of the keys of a JSON sidecar, see sidecarReader.SidecarReader
+        self.sidecar: dict[str, str | None] | None = None
+        # Set for the second and next hard links to a file, see inodeTracker.InodeTracker
+        self.hard_link_of: Path | None = None
+        self._children_prefix: str | None = None
+        # Kept by stat(), or set when the stat result was fetched ahead of time
+        self._stat: os.stat_result | None = None
+        # Name of each entry and whether it is a directory, when fetched ahead of time
+        self._listing: list[tuple[str, bool]] | None = None
+        # Measures taken by add_stats(), reused by compute_digest() then released
+        self._stats: dict | None = None
         self.identifier: str = self.get_identifier(
             self.path,
             self.parent,
@@ -127,6 +192,34 @@ class SmartPath(ABC):
         #             self.unique_config(tree, template[1])
         return temp_late[0] if temp_late is not None else path.name
 
+    def get_placeholders(self, tree: FileTree) -> dict[str, str]:
+        """Return the value of the file_tree placeholders found in this path.
+
+        Values are extracted from the path's name using the template of its identifier
+        and are merged with the ones of its parents, so a file inherits e.g. the subject
+        of the directory it is in. When a placeholder is found both in a parent and in
+        this path, the parent's value is kept.
+        Optional placeholders that are not used are left out.
+        The result is computed once and kept for later calls and for the children.
+        """
+        if getattr(self, "_placeholders", None) is not None:
+            return self._placeholders
+        placeholders = dict(self.parent.get_placeholders(tree)) if self.parent else {}
+        try:
+            template = tree.get_template(self.identifier)
+        except KeyError:
+            template = None
+        if template is not None and template.unique_part not in (None, "."):
+            pattern, names = placeholder_pattern(template.unique_part)
+            match = pattern.fullmatch(self.path.name)
+            if match is not None:
+                for name, value in zip(names, match.groups()):
+                    # The value found in a parent takes precedence
+                    if value is not None and name not in placeholders:
+                        placeholders[name] = value
+        self._placeholders = placeholders
+        return placeholders
+
     def unique_config(
         self, tree: FileTree | None, template: Template | None, path: str | Path
     ) -> dict:
@@ -144,7 +237,13 @@ class SmartPath(ABC):
                 children[template[0]] = template[1]
         return children
 
-    def add_stats(self, stat_dict: dict, identifier: str, measures: list[str] = []) -> dict:
+    def add_stats(
+        self,
+        stat_dict: dict,
+        identifier: str,
+        measures: list[str] = [],
+        stats: dict | None = None,
+    ) -> dict:
         """For each measure desired adds the value from this path to the dictionary.
 
         Parameters
@@ -176,6 +275,10 @@ class SmartPath(ABC):
             The name of the measures to be used in the outputs.
             Each corresponds to a dictionary nested in stat_dict.
 
+        stats: dict, default=None
+            The values already measured for this path, as returned by get_stats().
+            If None, the measures are taken by this call.
+
         Returns
         -------
         dict
@@ -185,23 +288,153 @@ class SmartPath(ABC):
             if identifier not in stat_dict[measure]:
                 stat_dict[measure][identifier] = {}
 
-        if "file_size" in measures:
-            stat_dict["file_size"][identifier][self.path] = self.file_size
-        if "file_count" in measures:
-            stat_dict["file_count"][identifier][self.path] = self.file_count
-        if "dir_count" in measures:
-            stat_dict["dir_count"][identifier][self.path] = self.dir_count
-        if "modified_time" in measures:
-            stat_dict["modified_time"][identifier][self.path] = self.modified_time
+        if stats is None:
+            stats = self.get_stats(measures)
+        for measure, value in stats.items():
+            stat_dict[measure][identifier][self.path] = value
+        self._stats = stats
         return stat_dict
 
+    def get_stats(self, measures: list[str] = []) -> dict:
+        """Take each of the desired measures on this path.
+
+        The measures are the ones registered in measureRegistry.MEASURES,
+        each raw input they need (stat, listing, header) is fetched a single time.
+
+        Parameters
+        ----------
+        measures: list of string
+            The name of the measures to take.
+
+        Returns
+        -------
+        dict
+            The value of each measure, keyed by the measure name.
+        """
+        return compute_measures(self, measures)
+
+    def compute_digest(self, measures: list[str] = ()) -> bytes:
+        """Hash the structure of the subtree under this path, from its children's digests.
+
+        The digest covers the identifier and digest of each child,
+        and optionally the value of some measures of this path.
+        Two directories with the same digest therefore have identical subtrees
+        (same identifiers at every level, and same measure values if measures are given),
+        so whole subtrees can be compared by comparing their digests only.
+        The name of the path itself is not part of its digest,
+        e.g. 'sub-01' and 'sub-02' have the same digest when their content is identical.
+
+        Children whose digest was not computed yet are hashed first,
+        but the walk normally computes each directory's digest after the ones of its children
+        so each path is hashed a single time.
+        The measures already taken by add_stats() are used instead of being taken again.
+
+        Parameters
+        ----------
+        measures: list of string
+            The name of the measures whose value are part of the digest.
+
+        Returns
+        -------
+        bytes
+            The digest, also stored in the digest attribute.
+        """
+        hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        if self._stats is not None and all(measure in self._stats for measure in measures):
+            # In the order of the registry, like get_stats()
+            stats = {
+                measure: value for measure, value in self._stats.items() if measure in measures
+            }
+        else:
+            stats = self.get_stats(measures)
+        self._stats = None
+        for measure, value in stats.items():
+            hasher.update(f"{measure}={value}\0".encode())
+        children_digests = sorted(
+            (
+                child.identifier,
+                child.digest if child.digest is not None else child.compute_digest(measures),
+            )
+            for child in self.children
+        )
+        for identifier, digest in children_digests:
+            hasher.update(identifier.encode())
+            hasher.update(b"\0")
+            hasher.update(digest)
+        self.digest = hasher.digest()
+        return self.digest
+
+    def diff(self, other: SmartPath) -> list[tuple[str, str]]:
+        """List the differences between the subtree under this path and the one under other.
+
+        Digests must have been computed. Subtrees with equal digests are skipped without
+        being explored, so only the branches that differ are visited.
+        Children are matched by identifier, first with children having the same digest,
+        then with the ones having the same name, then in order.
+
+        Returns
+        -------
+        list of tuple of two strings
+            The relative path and the kind of each difference:
+            "removed" for paths only under this path (relative to this path),
+            "added" for paths only under other (relative to other) and
+            "changed" for files whose measures differ (relative to this path).
+        """
+        differences = []
+        if self.digest == other.digest:
+            return differences
+        if not self.children and not other.children:
+            return [(".", "changed")]
+        remaining = {}
+        for child in other.children:
+            remaining.setdefault(child.identifier, []).append(child)
+        unmatched = []
+        for child in self.children:
+            candidates = remaining.get(child.identifier, [])
+            match = next((item for item in candidates if item.digest == child.digest), None)
+            if match is None:
+                unmatched.append(child)
+            else:
+                candidates.remove(match)
+        for child in unmatched:
+            candidates = remaining.get(child.identifier, [])
+            if not candidates:
+                differences.append((child.path.name, "removed"))
+                continue
+            match = next(
+                (item for item in candidates if item.path.name == child.path.name), candidates[0]
+            )
+            candidates.remove(match)
+            differences += [
+                (
+                    child.path.name if relative == "." else f"{child.path.name}/{relative}",
+                    kind,
+                )
+                for relative, kind in child.diff(match)
+            ]
+        for candidates in remaining.values():
+            differences += [(child.path.name, "added") for child in candidates]
+        return differences
+
+    def stat(self) -> os.stat_result:
+        """Return the stat result of the path.
+
+        The path is stat'ed the first time and the result is kept,
+        so the measures and the checks share a single stat call.
+        The result can also have been fetched ahead of time (see asyncTraversal).
+        """
+        if self._stat is None:
+            self._stat = self.path.stat()
+        return self._stat
+
     @property
-    def file_size(self) -> int:
-        return int(self.path.stat().st_size)
+    def file_size(self) -> int | None:
+        """The size measure of the path, taken from the git-annex key in annex mode."""
+        return compute_measures(self, ["file_size"])["file_size"]
 
     @property
     def modified_time(self) -> int:
-        return int(self.path.stat().st_mtime)
+        return int(self.stat().st_mtime)
 
     @abstractmethod
     def file_count(self):
@@ -225,6 +458,28 @@ class SmartPath(ABC):
         """
         return str(self.path.name).ljust(name_max_length - self.depth * 3)
 
+    @property
+    def children_prefix(self) -> str:
+        """Return the separators at the beginning of the tree lines of this path's children.
+
+        It is this path's own prefix followed by '    ' if it is the last in its directory,
+        or '│   ' otherwise. The prefix is built from the parent's one the first time
+        it is needed and kept, so each line of the tree is built in constant time
+        instead of going up the whole parent hierarchy.
+        """
+        if self._children_prefix is None:
+            if self.parent is None:
+                self._children_prefix = ""
+            else:
+                # If the path was last in it's directory,
+                # the separator is '   ' otherwise it is '│   '
+                self._children_prefix = self.parent.children_prefix + (
+                    self.display_parent_prefix_middle
+                    if self.is_last
+                    else self.display_parent_prefix_last
+                )
+        return self._children_prefix
+
     def displayable(self, measures=(), name_max_length: int = 60) -> str:
         """Return a string corresponding to a single line \
            in the file structure tree visualisation."""
@@ -240,22 +495,9 @@ class SmartPath(ABC):
             else self.display_filename_prefix_middle
         )
 
-        # Display the info about the file/directory after the prefix chose above
-        parts = [f"{_filename_prefix!s} {self.display(measures, name_max_length)!s}"]
-
-        # Now that the display for the current directory is ready, we need to add
-        # the separator for each target_depth level
-        parent = self.parent
-        # Going up the parent hierarchy
-        while parent and parent.parent is not None:
-            # If the parent was last in it's directory,
-            # the separator is '   ' otherwise it is '│   '
-            parts.append(
-                self.display_parent_prefix_middle
-                if parent.is_last
-                else self.display_parent_prefix_last
-            )
-            parent = parent.parent
-
-        # Putting it all together in a single string
-        return "".join(reversed(parts))
+        # The separators of each depth level come from the parent,
+        # followed by the display of the info about the file/directory
+        return (
+            f"{self.parent.children_prefix}{_filename_prefix!s} "
+            f"{self.display(measures, name_max_length)!s}"
+        )
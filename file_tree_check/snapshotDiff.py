@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import TextIO
+
+from .csvStreamer import CSV_BUFFER_SIZE, SORT_CHUNK_ROWS, external_sort_csv
+
+DIFF_HEADER = ["Status", "Identifier", "Path", "Measure", "Old", "New"]
+DIFF_STATUSES = ("added", "removed", "changed")
+
+
+def is_sorted_by_path(csv_path: str | Path) -> bool:
+    """Check with a single streamed pass whether the rows of a CSV output are sorted by path."""
+    with open(csv_path, newline="", buffering=CSV_BUFFER_SIZE) as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader, None)
+        previous = None
+        for row in reader:
+            if previous is not None and row[0] < previous:
+                return False
+            previous = row[0]
+    return True
+
+
+def _same_value(old: str, new: str) -> bool:
+    """Compare two values read from CSV files, numerically when possible.
+
+    The same measure can be written as '4096' by one output and '4096.0' by another.
+    """
+    if old == new:
+        return True
+    try:
+        return float(old) == float(new)
+    except ValueError:
+        return False
+
+
+def diff_rows(old_csv: str | Path, new_csv: str | Path):
+    """Yield the differences between two CSV outputs sorted by path, with a merge-join.
+
+    Both files are read one row at a time, in parallel, so memory use does not depend
+    on their size. The measures compared are the columns found in both files.
+
+    Parameters
+    ----------
+    old_csv: pathlib.Path or string
+        The CSV output of the earlier scan, sorted by path (see is_sorted_by_path()).
+
+    new_csv: pathlib.Path or string
+        The CSV output of the later scan, sorted by path.
+
+    Yields
+    ------
+    list of string
+        One row per difference, with the columns of DIFF_HEADER.
+        Added and removed paths have a single row with an empty measure.
+        Changed paths have a row per changed measure, and an 'Identifier' row
+        if their identifier changed.
+    """
+    with open(old_csv, newline="", buffering=CSV_BUFFER_SIZE) as old_file, open(
+        new_csv, newline="", buffering=CSV_BUFFER_SIZE
+    ) as new_file:
+        old_reader = csv.reader(old_file)
+        new_reader = csv.reader(new_file)
+        old_header = next(old_reader, ["Path", "Identifier"])
+        new_header = next(new_reader, ["Path", "Identifier"])
+        measures = [
+            (measure, old_header.index(measure), new_header.index(measure))
+            for measure in old_header[2:]
+            if measure in new_header[2:]
+        ]
+        old_row = next(old_reader, None)
+        new_row = next(new_reader, None)
+        while old_row is not None or new_row is not None:
+            if new_row is None or (old_row is not None and old_row[0] < new_row[0]):
+                yield ["removed", old_row[1], old_row[0], "", "", ""]
+                old_row = next(old_reader, None)
+            elif old_row is None or new_row[0] < old_row[0]:
+                yield ["added", new_row[1], new_row[0], "", "", ""]
+                new_row = next(new_reader, None)
+            else:
+                if old_row[1] != new_row[1]:
+                    yield ["changed", new_row[1], new_row[0], "Identifier", old_row[1], new_row[1]]
+                for measure, old_index, new_index in measures:
+                    if not _same_value(old_row[old_index], new_row[new_index]):
+                        yield [
+                            "changed",
+                            new_row[1],
+                            new_row[0],
+                            measure,
+                            old_row[old_index],
+                            new_row[new_index],
+                        ]
+                old_row = next(old_reader, None)
+                new_row = next(new_reader, None)
+
+
+def write_diff_csv(
+    old_csv: str | Path,
+    new_csv: str | Path,
+    output_path: str | Path,
+    chunk_rows: int = SORT_CHUNK_ROWS,
+) -> dict:
+    """Write the differences between two CSV outputs to a CSV, grouped by identifier.
+
+    Inputs that are not sorted by path (like the Data.csv grouped by identifier)
+    are first sorted to temporary files with external_sort_csv(),
+    and the differences found by diff_rows() are then sorted by identifier the same way.
+    Memory use is bounded by chunk_rows and the merge buffers, not by the size of the scans.
+
+    Parameters
+    ----------
+    old_csv: pathlib.Path or string
+        The CSV output of the earlier scan.
+
+    new_csv: pathlib.Path or string
+        The CSV output of the later scan.
+
+    output_path: pathlib.Path or string
+        Where to write the differences, with the columns of DIFF_HEADER.
+
+    chunk_rows: int
+        Maximum number of rows held in memory at once by the sorts.
+
+    Returns
+    -------
+    dict
+        The number of added, removed and changed paths for each identifier:
+
+        .. code-block:: python
+
+            {'identifier1': {'added': 2, 'removed': 0, 'changed': 1}, ...}
+    """
+    logger = logging.getLogger(f"file_tree_check.{__name__}")
+    output_path = Path(output_path)
+    temporary_paths = []
+    counts = {}
+    try:
+        inputs = []
+        for csv_path in (old_csv, new_csv):
+            if is_sorted_by_path(csv_path):
+                inputs.append(csv_path)
+                continue
+            logger.debug(f"Sorting {csv_path} by path")
+            file_descriptor, sorted_path = tempfile.mkstemp(suffix=".csv", dir=output_path.parent)
+            os.close(file_descriptor)
+            temporary_paths.append(sorted_path)
+            external_sort_csv(
+                csv_path, key_columns=(0,), chunk_rows=chunk_rows, output_path=sorted_path
+            )
+            inputs.append(sorted_path)
+
+        with open(output_path, "w", newline="", buffering=CSV_BUFFER_SIZE) as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow(DIFF_HEADER)
+            previous_path = None
+            for row in diff_rows(*inputs):
+                writer.writerow(row)
+                # A changed path has one row per measure but is counted once
+                if row[0] != "changed" or row[2] != previous_path:
+                    identifier_counts = counts.setdefault(row[1], dict.fromkeys(DIFF_STATUSES, 0))
+                    identifier_counts[row[0]] += 1
+                previous_path = row[2]
+    finally:
+        for temporary_path in temporary_paths:
+            os.remove(temporary_path)
+    external_sort_csv(output_path, key_columns=(1, 2, 0), chunk_rows=chunk_rows)
+    logger.info(
+        f"Differences written to {output_path}: "
+        + ", ".join(
+            f"{sum(item[status] for item in counts.values())} {status}" for status in DIFF_STATUSES
+        )
+    )
+    return counts
+
+
+def write_diff_report(output: TextIO, diff_csv: str | Path, counts: dict) -> int:
+    """Write the differences grouped by identifier as text, from the CSV of write_diff_csv().
+
+    Returns
+    -------
+    int
+        The number of characters written.
+    """
+    written = 0
+    current_identifier = None
+    with open(diff_csv, newline="", buffering=CSV_BUFFER_SIZE) as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader, None)
+        for status, identifier, path, measure, old, new in reader:
+            if identifier != current_identifier:
+                current_identifier = identifier
+                written += output.write(
+                    f"\nIn '{identifier}': "
+                    + ", ".join(
+                        f"{counts[identifier][item]} {item}"
+                        for item in DIFF_STATUSES
+                        if counts[identifier][item]
+                    )
+                    + "\n"
+                )
+            if status == "changed":
+                written += output.write(f"    {status}: {path}  {measure}: {old} -> {new}\n")
+            else:
+                written += output.write(f"    {status}: {path}\n")
+    return written
+
+
+def diff_main(argv: list[str] | None = None) -> None:
+    """Entry point of 'tree_check diff', comparing the CSV outputs of two scans."""
+    parser = argparse.ArgumentParser(
+        prog="tree_check diff",
+        description="Report the paths added, removed and changed between two scans.",
+    )
+    parser.add_argument("old", type=Path, help="Path to the CSV output of the earlier scan.")
+    parser.add_argument("new", type=Path, help="Path to the CSV output of the later scan.")
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Path to the text report, printed if not given."
+    )
+    parser.add_argument(
+        "-oc", "--output_csv", type=Path, help="Path where to keep the differences as CSV."
+    )
+    parser.add_argument(
+        "-cr",
+        "--chunk_rows",
+        type=int,
+        default=SORT_CHUNK_ROWS,
+        help="Maximum number of rows sorted in memory at once.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.output_csv is not None:
+        diff_csv = args.output_csv
+    else:
+        file_descriptor, diff_csv = tempfile.mkstemp(suffix=".csv")
+        os.close(file_descriptor)
+    try:
+        counts = write_diff_csv(args.old, args.new, diff_csv, chunk_rows=args.chunk_rows)
+        header = f"***** Differences between '{args.old}' and '{args.new}' *****\n"
+        if args.output is None:
+            sys.stdout.write(header)
+            write_diff_report(sys.stdout, diff_csv, counts)
+        else:
+            with open(args.output, "w", buffering=CSV_BUFFER_SIZE) as output:
+                output.write(header)
+                write_diff_report(output, diff_csv, counts)
+    finally:
+        if args.output_csv is None:
+            os.remove(diff_csv)
@@ -1,18 +1,136 @@
 from __future__ import annotations
 
 import csv
+import heapq
+import io
+import json
 import logging
 import os
 import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Number
 from pathlib import Path
+from typing import Any, TextIO
 
 import numpy as np
 import seaborn as sns
 from matplotlib import pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .configurationList import cluster_configurations, group_subtrees, structure_delta
 
 # Modify for a different figure size, (width, height)
 FIG_SIZE = (20, 12)
+# Size in bytes of the write buffer used for the summary output
+SUMMARY_BUFFER_SIZE = 1024 * 1024
+# Number of bins of the distribution plots
+HISTOGRAM_BINS = 20
+
+
+def top_outliers(outliers: list[tuple[Any, Any]], mode: Any, count: int) -> list[tuple[Any, Any]]:
+    """Select the count (path, value) pairs whose value is furthest from the mode.
+
+    Values that can not be subtracted from the mode (e.g. None) are considered the furthest.
+    Uses a bounded heap so the cost is O(n log count) rather than sorting every outlier.
+    """
+
+    def deviation(item: tuple[Any, Any]) -> float:
+        try:
+            return abs(item[1] - mode)
+        except TypeError:
+            return float("inf")
+
+    return heapq.nlargest(count, outliers, key=deviation)
+
+
+def top_identifiers(measure_dict: dict, count: int) -> list[str]:
+    """Select the count identifiers with the most paths that have at least one non-zero value.
+
+    The identifiers are taken from a heap in order of number of paths until enough
+    are found, so only the identifiers inspected pay the cost of checking their values
+    instead of sorting the whole measure dictionary.
+    """
+    heap = [
+        (-len(paths), index, identifier)
+        for index, (identifier, paths) in enumerate(measure_dict.items())
+    ]
+    heapq.heapify(heap)
+    selected = []
+    while heap and len(selected) < count:
+        _, _, identifier = heapq.heappop(heap)
+        # Do not show on plot when all values are 0 or None
+        if any(value != 0 and value is not None for value in measure_dict[identifier].values()):
+            selected.append(identifier)
+    return selected
+
+
+def is_numeric_measure(measure_dict: dict) -> bool:
+    """Whether every value of a measure is a number or None, so its distribution can be plotted."""
+    return all(
+        isinstance(value, Number) or value is None
+        for paths in measure_dict.values()
+        for value in paths.values()
+    )
+
+
+def histogram(values) -> tuple[np.ndarray, np.ndarray]:
+    """Bin the non None values in HISTOGRAM_BINS bins, returning the counts and bin edges."""
+    array = np.fromiter((value for value in values if value is not None), dtype=float)
+    return np.histogram(array, bins=HISTOGRAM_BINS)
+
+
+def render_histograms(
+    histograms: list[list[tuple[str, str, np.ndarray, np.ndarray]]],
+    save_path: str | Path,
+    plots_per_measure: int,
+    title: str = "Distribution in the file structure",
+) -> str:
+    """Draw precomputed histograms on a grid and save the figure with the Agg backend.
+
+    Each row of histograms is a list of (measure name, identifier, counts, bin edges).
+    Only matplotlib's Figure and Agg canvas are used, so no display is needed
+    and the function can run in a separate process.
+    """
+    figure = Figure(figsize=FIG_SIZE)
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(len(histograms), int(plots_per_measure), squeeze=False)
+    figure.suptitle(title)
+    for row, measure_histograms in enumerate(histograms):
+        for column, (measure_name, identifier, counts, edges) in enumerate(measure_histograms):
+            axes[row, column].stairs(counts, edges, fill=True)
+            axes[row, column].set_xlabel(measure_name, color="b")
+            axes[row, column].set_title(identifier, color="r")
+    figure.tight_layout()
+    figure.savefig(save_path)
+    return str(save_path)
+
+
+class _RelativePaths(dict):
+    """Mapping from the paths found in stat_dict to their string relative to the root.
+
+    Each relative path is computed the first time it is needed and reused afterwards.
+    Paths produced by the walk all start with the root,
+    so the prefix is sliced off instead of calling os.path.relpath for each of them.
+    """
+
+    def __init__(self, root: Path):
+        super().__init__()
+        self.root = root
+        self.root_string = str(root)
+        self.prefix = os.path.join(self.root_string, "")
+
+    def __missing__(self, path) -> str:
+        path_string = str(path)
+        if path_string.startswith(self.prefix):
+            relative_path = path_string[len(self.prefix) :]
+        elif path_string == self.root_string:
+            relative_path = "."
+        else:
+            relative_path = os.path.relpath(path, self.root)
+        self[path] = relative_path
+        return relative_path
 
 
 class StatBuilder:
@@ -92,6 +210,19 @@ class StatBuilder:
                     stat_dict["modified_time"][identifier][item[0]] = mean
         return stat_dict
 
+    def plotted_measures(self) -> list[str]:
+        """Return the measures whose distribution can be plotted, skipping the textual ones.
+
+        Measures like checksum or mode have text values, they are only in the summary.
+        """
+        measures = []
+        for measure_name in self.measures:
+            if is_numeric_measure(self.stat_dict[measure_name]):
+                measures.append(measure_name)
+            else:
+                self.logger.debug(f"Measure {measure_name} is not numeric and is not plotted")
+        return measures
+
     def create_plots(self, save_path=None, show_plot=True, plots_per_measure=8):
         """Create a comparison plot for each measure given in a single figure.
 
@@ -120,11 +251,12 @@ class StatBuilder:
         """
         sns.set(style="darkgrid")
         self.logger.debug("Creating subplots objects")
-        height = len(self.measures)
-        fig, axes = plt.subplots(height, int(plots_per_measure), figsize=FIG_SIZE)
+        measures = self.plotted_measures()
+        height = len(measures)
+        fig, axes = plt.subplots(height, int(plots_per_measure), figsize=FIG_SIZE, squeeze=False)
         fig.suptitle("Distribution in the file structure")
         self.logger.debug("Iterating over the measures in the data")
-        for measure_index, measure_name in enumerate(self.measures):
+        for measure_index, measure_name in enumerate(measures):
             i = 0
             self.logger.debug(f"Iterating over the directories in the measure {measure_name}")
             # Sort the measure dict (containing 'identifier': {'path': value})
@@ -163,14 +295,123 @@ class StatBuilder:
             self.logger.debug("Displaying plots")
             plt.show()
 
+    def create_histograms(
+        self,
+        save_path: str | Path,
+        plots_per_measure: int = 8,
+        figure_per_measure: bool = False,
+        processes: int = 1,
+    ) -> list[str]:
+        """Create the same distribution plots as create_plots() with a faster pipeline.
+
+        The identifiers with the most paths are found with a partial selection,
+        their values are binned with numpy.histogram and only the bin counts are drawn,
+        with matplotlib's Agg backend. No window is opened, the plots are only saved.
+
+        Parameters
+        ----------
+        save_path:  pathlib.Path or string
+            The path to where the graphs should be saved.
+            When using figure_per_measure, the measure name is added to the file name,
+            e.g. "plots_file_size.png".
+        plots_per_measure: int
+            How many identifiers will be included in the plots,
+            starting from the ones with the highest number of occurrences.
+        figure_per_measure: bool, default=False
+            Whether to save a figure for each measure instead of a single one with one row
+            per measure.
+        processes: int, default=1
+            Number of processes used to render the figures when using figure_per_measure.
+
+        Returns
+        -------
+        list of string
+            The paths to the saved figures.
+        """
+        plots_per_measure = int(plots_per_measure)
+        measures = self.plotted_measures()
+        histograms = []
+        for measure_name in measures:
+            self.logger.debug(f"Binning the values of measure {measure_name}")
+            measure_dict = self.stat_dict[measure_name]
+            histograms.append(
+                [
+                    (measure_name, identifier, *histogram(measure_dict[identifier].values()))
+                    for identifier in top_identifiers(measure_dict, plots_per_measure)
+                ]
+            )
+
+        save_path = Path(save_path)
+        if not figure_per_measure:
+            saved = [render_histograms(histograms, save_path, plots_per_measure)]
+        else:
+            jobs = [
+                (
+                    [measure_histograms],
+                    save_path.with_name(f"{save_path.stem}_{measure_name}{save_path.suffix}"),
+                    plots_per_measure,
+                    f"Distribution of {measure_name} in the file structure",
+                )
+                for measure_name, measure_histograms in zip(measures, histograms)
+            ]
+            if processes > 1:
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    saved = list(executor.map(render_histograms, *zip(*jobs)))
+            else:
+                saved = [render_histograms(*job) for job in jobs]
+        self.logger.info(f"Saved plots at path(s) {', '.join(saved)}")
+        return saved
+
     def create_summary(self, root: Path, configurations: dict) -> str:
-        """Produce the 'Summary' text file output.
+        """Produce the 'Summary' text file output as a single string.
+
+        Convenience wrapper around write_summary() for callers that need the text in memory.
+        For large file structures prefer write_summary() with an open file,
+        which streams the summary without ever holding all of it.
+
+        Parameters
+        ----------
+        root:  pahlib.Path
+            Path to the root directory (target directory) of the file structure.
+
+        configurations: dict
+            Contains the file configurations found for each file/directory
+            identifier. See write_summary() for the structure.
+
+        Returns
+        -------
+        string
+            The entire generated summary text as a single string.
+        """
+        output = io.StringIO()
+        self.write_summary(output, root, configurations)
+        return output.getvalue()
+
+    def write_summary(
+        self,
+        output: TextIO,
+        root: Path,
+        configurations: dict,
+        max_outliers: int = 0,
+        list_common: bool = True,
+        cluster_similarity: float = 0.0,
+        compare_subtrees: bool = False,
+    ) -> int:
+        """Write the 'Summary' text file output to an open text stream.
 
         This output highlights common file configurations
         if requested and will point to outliers for each measure and file/directory type.
+        Each identifier's paths are visited a single time and the lines are written
+        as they are produced, so the memory used does not grow with the size of the summary.
+        For large file structures, max_outliers and list_common keep the size of the summary
+        proportional to the number of identifiers rather than the number of paths.
 
         Parameters
         ----------
+        output: file object
+            Text stream the summary is written to, typically a file opened by main.py
+            with a buffer of SUMMARY_BUFFER_SIZE bytes.
+
         root:  pahlib.Path
             Path to the root directory (target directory) of the file structure.
 
@@ -194,82 +435,283 @@ class StatBuilder:
                         [{'structure': [], 'paths': []}, ...]
                     }
 
+        max_outliers: int, default=0
+            How many outliers to list per identifier.
+            If 0, every outlier is listed in the order they were found.
+            Otherwise only the ones furthest from the most common value are listed,
+            along with the total number of outliers.
+
+        list_common: bool, default=True
+            Whether to list every path having the most common value.
+            If False, only the number of such paths is written.
+
+        cluster_similarity: float, default=0.0
+            If above 0, configurations with similar structures are grouped in clusters
+            (see configurationList.cluster_configurations) and each cluster is written
+            with its core structure and the difference of each of its configurations.
+
+        compare_subtrees: bool, default=False
+            Whether to group the directories of each identifier by the digest of their
+            whole subtree (see configurationList.group_subtrees), and write the differences
+            of each group with the most common one.
+            Requires the directories to be kept in the configurations by add_configuration().
+
         Returns
         -------
-        string
-            The entire generated summary text as a single string,
-            to be handled by main.py for saving or printing.
+        int
+            The number of characters written.
         """
         self.logger.debug("Initializing summary output")
-        output = (
+        written = output.write(
             f"***** Analysis of file structure at: '{root.name}' *****\n"
             f"Created: {time.ctime()}\nTarget directory: {root}\n\n"
         )
 
         if configurations is not None:
-            for identifier, configuration_list in configurations.items():
-                output += f"\nConfigurations for directory **{identifier}**:"
-                sorted_config_list = list(
-                    sorted(
-                        configuration_list,
-                        key=lambda item: len(item["paths"]),
-                        reverse=True,
-                    )
+            if cluster_similarity > 0:
+                written += self._write_configuration_clusters(
+                    output, configurations, cluster_similarity
                 )
-                for i in range(len(sorted_config_list)):
-                    output += (
-                        f"\n     Configuration #{i + 1} was found in "
-                        f"{len(sorted_config_list[i]['paths'])} directories. "
-                        "Contains the following: \n            "
-                        f"{sorted_config_list[i]['structure']}"
-                    )
+            else:
+                written += self._write_configurations(output, configurations)
+            if compare_subtrees:
+                written += self._write_subtrees(output, root, configurations)
 
+        relative_paths = _RelativePaths(root)
         for measure_name in self.measures:
             self.logger.debug(f"Calculating most common occurrences for measure {measure_name}")
-            output += f"\n\nOccurrences for measure :     **{measure_name}**\n"
-            sorted_folders = dict(
-                sorted(
-                    self.stat_dict[measure_name].items(),
-                    key=lambda item: len(item[1]),
-                    reverse=True,
-                )
+            written += output.write(f"\n\nOccurrences for measure :     **{measure_name}**\n")
+            sorted_folders = sorted(
+                self.stat_dict[measure_name].items(),
+                key=lambda item: len(item[1]),
+                reverse=True,
             )
-            for folder_name, paths in sorted_folders.items():
-                most_common_value, most_common_counter = 0, 0
-
-                counter = Counter()
-                for path, value in paths.items():
-                    counter[value] += 1
-                most_common_value = counter.most_common(1)[0][0]
-                most_common_counter = counter.most_common(1)[0][1]
-
+            for folder_name, paths in sorted_folders:
+                most_common_value, most_common_counter = Counter(paths.values()).most_common(1)[0]
                 if most_common_value is None:
                     continue
 
-                output += (
+                written += output.write(
                     f"    In '{folder_name}':\n        "
                     f"{measure_name} of {most_common_value} "
                     f"found {most_common_counter} times\n"
                 )
-                output += "          Common:\n"
+                if list_common:
+                    written += output.write("          Common:\n")
+                else:
+                    written += output.write(f"          Common: {most_common_counter} paths\n")
+                # Common paths are written as they are found,
+                # outliers are kept aside to be written after them
+                outliers = []
                 for path, value in paths.items():
-                    if value == most_common_value:
-                        output += f"          {str(os.path.relpath(path,root))}  has: {value}\n"
-                if most_common_counter < len(paths):
-                    output += "          Outliers:\n"
-                    for path, value in paths.items():
-                        if value != most_common_value:
-                            output += (
-                                f"            {str(os.path.relpath(path,root))}  has: {value}\n"
-                            )
+                    if value != most_common_value:
+                        outliers.append((path, value))
+                    elif list_common:
+                        written += output.write(f"          {relative_paths[path]}  has: {value}\n")
+                if not outliers:
+                    continue
+                if 0 < max_outliers < len(outliers):
+                    written += output.write(
+                        f"          Outliers: showing {max_outliers} of {len(outliers)}, "
+                        f"furthest from {most_common_value} first\n"
+                    )
+                    outliers = top_outliers(outliers, most_common_value, max_outliers)
+                else:
+                    written += output.write("          Outliers:\n")
+                written += output.write(
+                    "".join(
+                        f"            {relative_paths[path]}  has: {value}\n"
+                        for path, value in outliers
+                    )
+                )
             self.logger.info(
                 f"Found {len(sorted_folders)} directories/files for measure {measure_name}"
             )
         self.logger.info(
             f"Summary created with {len(self.measures)} measures, "
-            f"file is {len(output)} characters long."
+            f"file is {written} characters long."
         )
-        return output
+        return written
+
+    def _write_configurations(self, output: TextIO, configurations: dict) -> int:
+        written = 0
+        for identifier, configuration_list in configurations.items():
+            written += output.write(f"\nConfigurations for directory **{identifier}**:")
+            sorted_config_list = sorted(
+                configuration_list,
+                key=lambda item: len(item["paths"]),
+                reverse=True,
+            )
+            for i, configuration in enumerate(sorted_config_list):
+                written += output.write(
+                    f"\n     Configuration #{i + 1} was found in "
+                    f"{len(configuration['paths'])} directories. "
+                )
+                # Other configurations are described by their difference
+                # with the most common one when that is shorter
+                minus, plus = structure_delta(
+                    configuration["structure"], sorted_config_list[0]["structure"]
+                )
+                if i > 0 and len(minus) + len(plus) < len(configuration["structure"]):
+                    written += output.write(
+                        "Contains the same as #1"
+                        + (f" minus {minus}" if minus else "")
+                        + (f" plus {plus}" if plus else "")
+                    )
+                else:
+                    written += output.write(
+                        f"Contains the following: \n            {configuration['structure']}"
+                    )
+        return written
+
+    def _write_configuration_clusters(
+        self, output: TextIO, configurations: dict, similarity: float
+    ) -> int:
+        written = 0
+        for identifier, configuration_list in configurations.items():
+            self.logger.debug(f"Clustering the configurations of {identifier}")
+            clusters = cluster_configurations(configuration_list, similarity)
+            written += output.write(
+                f"\nConfiguration clusters for directory **{identifier}**: "
+                f"{len(configuration_list)} configurations in {len(clusters)} clusters"
+            )
+            for i, cluster in enumerate(clusters):
+                written += output.write(
+                    f"\n     Cluster #{i + 1} groups {len(cluster['members'])} configurations "
+                    f"found in {cluster['count']} directories. Core structure: \n            "
+                    f"{cluster['core']}"
+                )
+                for member in cluster["members"]:
+                    difference = (
+                        (f" minus {member['minus']}" if member["minus"] else "")
+                        + (f" plus {member['plus']}" if member["plus"] else "")
+                    ) or " same as the core"
+                    written += output.write(
+                        f"\n          {len(member['configuration']['paths'])} directories:"
+                        f"{difference}"
+                    )
+        return written
+
+    def _write_subtrees(self, output: TextIO, root: Path, configurations: dict) -> int:
+        written = 0
+        relative_paths = _RelativePaths(root)
+        for identifier, configuration_list in configurations.items():
+            groups = group_subtrees(getattr(configuration_list, "subtrees", []))
+            if not groups:
+                continue
+            written += output.write(
+                f"\nSubtrees of directory **{identifier}**: "
+                f"{len(groups)} distinct subtrees in "
+                f"{sum(len(group['paths']) for group in groups)} directories"
+            )
+            for i, group in enumerate(groups):
+                written += output.write(
+                    f"\n     Subtree #{i + 1} found in {len(group['paths'])} directories, "
+                    f"first at {relative_paths[group['paths'][0].path]}"
+                )
+                if i > 0:
+                    written += output.write(
+                        "".join(
+                            f"\n          {kind}: {relative}"
+                            for relative, kind in group["differences"]
+                        )
+                    )
+        return written
+
+    def write_json_summary(
+        self, output: TextIO, root: Path, configurations: dict, max_outliers: int = 0
+    ) -> None:
+        """Write a structured version of the summary as JSON to an open text stream.
+
+        For each measure and identifier, the JSON contains the most common value (mode),
+        the number of paths, how many of them have the mode, the number of outliers
+        and the outliers furthest from the mode.
+        Configurations are reduced to their structure, the number of directories having it
+        and the identifiers it is missing (minus) or has in addition (plus)
+        compared to the most common configuration.
+
+        .. code-block:: python
+
+            {
+                "root": "/path/to/root",
+                "created": "Mon Oct 19 18:10:00 2026",
+                "configurations": {
+                    "identifier1": [
+                        {"structure": ["identifier3", ...], "count": 2, "minus": [], "plus": []},
+                        ...
+                    ]
+                },
+                "measures": {
+                    "measure1": {
+                        "identifier1": {
+                            "mode": 4, "count": 8, "mode_count": 7, "outlier_count": 1,
+                            "top_outliers": [{"path": "relative/path", "value": 1}]
+                        }
+                    }
+                }
+            }
+
+        Parameters
+        ----------
+        output: file object
+            Text stream the JSON document is written to.
+
+        root:  pahlib.Path
+            Path to the root directory (target directory) of the file structure.
+
+        configurations: dict
+            Contains the file configurations found for each file/directory
+            identifier. See write_summary() for the structure.
+
+        max_outliers: int, default=0
+            How many outliers to list per identifier, furthest from the mode first.
+            If 0, every outlier is listed.
+        """
+        relative_paths = _RelativePaths(root)
+        summary = {"root": str(root), "created": time.ctime(), "configurations": {}}
+        if configurations is not None:
+            for identifier, configuration_list in configurations.items():
+                sorted_config_list = sorted(
+                    configuration_list, key=lambda item: len(item["paths"]), reverse=True
+                )
+                summary["configurations"][identifier] = []
+                for configuration in sorted_config_list:
+                    minus, plus = structure_delta(
+                        configuration["structure"], sorted_config_list[0]["structure"]
+                    )
+                    summary["configurations"][identifier].append(
+                        {
+                            "structure": list(configuration["structure"]),
+                            "count": len(configuration["paths"]),
+                            "minus": minus,
+                            "plus": plus,
+                        }
+                    )
+
+        summary["measures"] = {}
+        for measure_name in self.measures:
+            measure_summary = summary["measures"][measure_name] = {}
+            for identifier, paths in self.stat_dict[measure_name].items():
+                most_common_value, most_common_counter = Counter(paths.values()).most_common(1)[0]
+                if most_common_value is None:
+                    continue
+                outliers = [
+                    (path, value) for path, value in paths.items() if value != most_common_value
+                ]
+                measure_summary[identifier] = {
+                    "mode": most_common_value,
+                    "count": len(paths),
+                    "mode_count": most_common_counter,
+                    "outlier_count": len(outliers),
+                    "top_outliers": [
+                        {"path": relative_paths[path], "value": value}
+                        for path, value in top_outliers(
+                            outliers, most_common_value, max_outliers or len(outliers)
+                        )
+                    ],
+                }
+        json.dump(summary, output, indent=2)
+        self.logger.info(f"JSON summary created with {len(self.measures)} measures")
 
     def create_csv(self, output_path: str | Path):
         """Produce the CSV (comma-separated value) file output at the target path.
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from file_tree_check.archiveInput import archive_listing, generate_tree_from_archive
+from file_tree_check.main import generate_tree
+
+MEASURES = ["file_size", "file_count", "dir_count", "modified_time"]
+
+
+@pytest.fixture
+def demo_path():
+    return Path(__file__).parent.parent / "Demo"
+
+
+@pytest.fixture(params=["w:gz", "w", "zip"])
+def demo_archive(request, tmp_path, demo_path):
+    # The Demo directory archived under a 'Demo' directory
+    if request.param == "zip":
+        archive_path = tmp_path / "Demo.zip"
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for path in sorted([demo_path, *demo_path.rglob("*")]):
+                archive.write(path, Path("Demo", path.relative_to(demo_path)))
+    else:
+        archive_path = tmp_path / "Demo.tar"
+        with tarfile.open(archive_path, request.param) as archive:
+            archive.add(demo_path, arcname="Demo")
+    return archive_path
+
+
+def describe(paths, root: Path) -> list[tuple]:
+    # The directories have a size of 0 in archives, zip times are rounded to 2 seconds
+    return [
+        (
+            path.path.relative_to(root).as_posix(),
+            path.is_last,
+            path.identifier,
+            {
+                name: value
+                for name, value in path.get_stats(MEASURES).items()
+                if name != "modified_time" and not (name == "file_size" and path.is_directory)
+            },
+        )
+        for path in paths
+    ]
+
+
+def test_generate_tree_from_archive(demo_archive, demo_path):
+    options = dict(ignore=["code"], depth_limit=4)
+    expected = describe(generate_tree(demo_path, **options), demo_path)
+
+    paths = describe(
+        generate_tree_from_archive(demo_archive, "Demo", chunk_rows=5, **options),
+        demo_archive / "Demo",
+    )
+
+    assert paths == expected
+
+
+def test_implicit_directories(tmp_path):
+    # Only files, with their directories in their names
+    archive_path = tmp_path / "dataset.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("./sub-01/anat/sub-01_T1w.nii.gz", bytes(10))
+        archive.writestr("sub-01/func/sub-01_bold.nii.gz", bytes(20))
+        archive.writestr("bad\tname.txt", b"")
+
+    paths = list(generate_tree_from_archive(archive_path, ignore=[]))
+
+    assert [path.path.relative_to(archive_path).as_posix() for path in paths] == [
+        ".",
+        "sub-01",
+        "sub-01/anat",
+        "sub-01/anat/sub-01_T1w.nii.gz",
+        "sub-01/func",
+        "sub-01/func/sub-01_bold.nii.gz",
+    ]
+    assert [path.get_stats(["file_size"])["file_size"] for path in paths] == [0, 0, 0, 10, 0, 20]
+    # The content of the members can not be read
+    assert paths[3].get_stats(["nifti_shape"]) == {"nifti_shape": None}
+    assert len(list(archive_listing(archive_path))) == 6
+
+
+def test_not_an_archive(tmp_path):
+    path = tmp_path / "listing.tsv"
+    path.write_text("not an archive\n")
+
+    with pytest.raises(ValueError):
+        list(generate_tree_from_archive(path))
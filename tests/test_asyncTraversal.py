@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import re
+import time
+from pathlib import Path
+
+import pytest
+from file_tree import FileTree
+
+from file_tree_check.asyncTraversal import (
+    PREFETCH_WINDOW_FACTOR,
+    LatencyFilesystem,
+    LocalFilesystem,
+    generate_tree_async,
+)
+from file_tree_check.main import generate_tree
+
+
+@pytest.fixture
+def demo_path():
+    return Path(__file__).parent.parent / "Demo"
+
+
+@pytest.fixture
+def duck_tree():
+    return FileTree.read(
+        Path(__file__).parent.parent / "file_tree_check" / "trees" / "duck_demo.tree"
+    )
+
+
+def describe(paths):
+    return [
+        (path.path, path.identifier, path.depth, path.is_last, path.displayable(["file_size"]))
+        for path in paths
+    ]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"depth_limit": 2},
+        {"ignore": ["pond-2", "momma_duck-3.1.txt"]},
+        {"criteria": re.compile(r".*yellow.*"), "filter_files": True},
+    ],
+)
+def test_generate_tree_async(demo_path, duck_tree, options):
+    options = {"ignore": [], **options}
+    expected = describe(generate_tree(demo_path, file_tree=duck_tree, **options))
+
+    paths = list(generate_tree_async(demo_path, file_tree=duck_tree, concurrency=4, **options))
+
+    assert describe(paths) == expected
+    assert all(path._stat is not None for path in paths[1:])
+
+
+def test_generate_tree_async_digests(demo_path, duck_tree):
+    expected = list(generate_tree(demo_path, ignore=[], file_tree=duck_tree, digests=True))
+
+    paths = list(generate_tree_async(demo_path, ignore=[], file_tree=duck_tree, digests=True))
+
+    assert [path.digest for path in paths] == [path.digest for path in expected]
+    assert paths[0].digest is not None
+
+
+def test_generate_tree_async_latency(demo_path, duck_tree):
+    filesystem = LatencyFilesystem(latency=0.02)
+
+    start = time.perf_counter()
+    paths = list(
+        generate_tree_async(
+            demo_path, ignore=[], file_tree=duck_tree, concurrency=32, filesystem=filesystem
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    assert len(paths) == 41
+    # 12 listings and 40 stats, made one at a time they would take more than 1 s
+    assert filesystem.call_count == 52
+    assert elapsed < filesystem.call_count * filesystem.latency / 2
+
+
+def test_generate_tree_async_window(tmp_path):
+    # A wide tree, the listings fetched ahead are bounded by the window
+    for subject in range(30):
+        for session in range(2):
+            (tmp_path / f"sub-{subject:02d}" / f"ses-{session}").mkdir(parents=True)
+    listed = []
+
+    class CountingFilesystem(LocalFilesystem):
+        def list_directory(self, path):
+            listed.append(path)
+            return super().list_directory(path)
+
+    paths = generate_tree_async(
+        tmp_path, ignore=[], concurrency=1, filesystem=CountingFilesystem(), prefetch_stats=False
+    )
+    assert next(paths).path == tmp_path
+    time.sleep(0.2)
+
+    assert len(listed) <= 1 + PREFETCH_WINDOW_FACTOR
+
+    assert describe(paths) == describe(generate_tree(tmp_path, ignore=[]))[1:]
+    # Each directory is listed once
+    assert len(listed) == len(set(listed)) == 1 + 30 * 3
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from file_tree_check.backgroundWriter import BackgroundRowWriter, BackgroundWriter
+
+
+def test_BackgroundWriter():
+    written = []
+    writer = BackgroundWriter(written.append, "test", queue_size=2, batch_size=3)
+    for item in range(10):
+        writer.write(item)
+    writer.close()
+
+    assert written == list(range(10))
+    assert writer.item_count == 10
+    assert writer.max_queue_depth <= 2
+
+
+def test_BackgroundWriter_stall():
+    release = threading.Event()
+    written = []
+
+    def slow_sink(item):
+        release.wait()
+        written.append(item)
+
+    writer = BackgroundWriter(slow_sink, "test", queue_size=1, batch_size=1)
+    timer = threading.Timer(0.05, release.set)
+    timer.start()
+    for item in range(4):
+        writer.write(item)
+    writer.close()
+
+    assert written == list(range(4))
+    assert writer.stall_count > 0
+    assert writer.stall_time > 0
+
+
+def test_BackgroundWriter_error():
+    def failing_sink(item):
+        raise OSError("disk full")
+
+    writer = BackgroundWriter(failing_sink, "test", queue_size=1, batch_size=1)
+    writer.write("line")
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
+
+
+def test_BackgroundRowWriter():
+    class RowWriter:
+        def __init__(self):
+            self.rows = []
+
+        def write_row(self, path, identifier, stats):
+            self.rows.append((path, identifier, stats))
+
+    row_writer = RowWriter()
+    writer = BackgroundRowWriter(row_writer, batch_size=2)
+    writer.write_row("path1", "identifier", {"file_size": 1})
+    writer.write_row("path2", "identifier", {})
+    writer.write_row("path3", "other", {})
+    writer.close()
+
+    assert row_writer.rows == [
+        ("path1", "identifier", {"file_size": 1}),
+        ("path2", "identifier", {}),
+        ("path3", "other", {}),
+    ]
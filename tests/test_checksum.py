@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+
+from file_tree_check.checksum import ChecksumCache, Checksummer, hash_file
+from file_tree_check.main import generate_tree
+
+
+@pytest.fixture
+def demo_path():
+    return Path(__file__).parent.parent / "Demo"
+
+
+@pytest.mark.parametrize("mmap_size", [0, 1])
+def test_hash_file(tmp_path, mmap_size):
+    path = tmp_path / "image.nii"
+    content = bytes(range(256)) * 1000
+    path.write_bytes(content)
+
+    checksum = hash_file(path, chunk_size=4096, mmap_size=mmap_size)
+
+    assert checksum == hashlib.blake2b(content).hexdigest()
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_checksum_paths(tmp_path, demo_path, processes):
+    expected = list(generate_tree(demo_path, ignore=[]))
+
+    checksummer = Checksummer(processes, ChecksumCache(tmp_path / "checksums.sqlite"), window=4)
+    paths = list(checksummer.checksum_paths(generate_tree(demo_path, ignore=[])))
+
+    assert [path.path for path in paths] == [path.path for path in expected]
+    files = [path for path in paths if not path.is_directory]
+    assert [path.checksum for path in files] == [hash_file(path.path) for path in files]
+    assert all(path.checksum is None for path in paths if path.is_directory)
+    assert checksummer.hashed_count == len(files)
+
+    # Unchanged files are found in the cache instead of being hashed again
+    checksummer = Checksummer(processes, ChecksumCache(tmp_path / "checksums.sqlite"))
+    paths = list(checksummer.checksum_paths(generate_tree(demo_path, ignore=[])))
+
+    assert checksummer.hashed_count == 0
+    assert checksummer.cache.hits == len(files)
+    assert [path.checksum for path in paths if not path.is_directory] == [
+        path.checksum for path in files
+    ]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_checksum_paths_vanished(tmp_path, processes):
+    root = tmp_path / "data"
+    root.mkdir()
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (root / name).write_text(name)
+    paths = list(generate_tree(root, ignore=[]))
+    (root / "b.txt").unlink()
+
+    checksummer = Checksummer(processes, ChecksumCache(tmp_path / "checksums.sqlite"))
+    paths = list(checksummer.checksum_paths(paths))
+
+    # The file deleted since it was found is logged and left without checksum
+    assert {path.path.name: path.checksum for path in paths if not path.is_directory} == {
+        "a.txt": hash_file(root / "a.txt"),
+        "b.txt": None,
+        "c.txt": hash_file(root / "c.txt"),
+    }
+    assert ChecksumCache(tmp_path / "checksums.sqlite").get(os.stat(root / "a.txt")) is not None
+
+
+def test_checksum_measure(demo_path):
+    path = next(path for path in generate_tree(demo_path, ignore=[]) if not path.is_directory)
+
+    assert path.get_stats(["checksum"]) == {"checksum": hash_file(path.path)}
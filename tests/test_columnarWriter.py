@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from file_tree import FileTree
+
+from file_tree_check.columnarWriter import ColumnarWriter
+from file_tree_check.main import generate_tree
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def demo_path():
+    return Path(__file__).parent.parent / "Demo"
+
+
+@pytest.fixture
+def duck_tree():
+    return FileTree.read(
+        Path(__file__).parent.parent / "file_tree_check" / "trees" / "duck_demo.tree"
+    )
+
+
+def write_demo(output_path, demo_path, duck_tree, file_format):
+    writer = ColumnarWriter(
+        output_path,
+        ["file_count", "file_size"],
+        file_tree=duck_tree,
+        file_format=file_format,
+        row_group_size=4,
+    )
+    for path in generate_tree(demo_path, ignore=[], file_tree=duck_tree):
+        writer.write_row(path, path.identifier, path.get_stats(writer.measures))
+    writer.close()
+    return writer
+
+
+def test_ColumnarWriter_arrow(tmp_path, demo_path, duck_tree):
+    writer = write_demo(tmp_path / "Data.arrow", demo_path, duck_tree, "arrow")
+
+    table = pa.ipc.open_file(str(tmp_path / "Data.arrow")).read_all()
+    assert table.num_rows == writer.row_count == 41
+    assert table.schema.names == [
+        "path",
+        "identifier",
+        "baby_duck",
+        "color",
+        "momma_duck",
+        "pond",
+        "file_count",
+        "file_size",
+    ]
+    assert pa.types.is_dictionary(table.schema.field("identifier").type)
+    row = table.slice(3, 1).to_pylist()[0]
+    assert row["identifier"] == "baby_duck_jpg"
+    assert (row["pond"], row["momma_duck"], row["baby_duck"], row["color"]) == (
+        "1",
+        "1.1",
+        "1.1.1",
+        "yellow",
+    )
+    assert row["file_count"] is None
+
+
+def test_ColumnarWriter_parquet(tmp_path, demo_path, duck_tree):
+    pq = pytest.importorskip("pyarrow.parquet")
+    write_demo(tmp_path / "Data.parquet", demo_path, duck_tree, "parquet")
+
+    metadata = pq.ParquetFile(tmp_path / "Data.parquet").metadata
+    assert metadata.num_rows == 41
+    assert metadata.num_row_groups == 11
+    table = pq.read_table(tmp_path / "Data.parquet", columns=["identifier", "file_size"])
+    assert table.column("file_size").to_pylist()[3] == 27071
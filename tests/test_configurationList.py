@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from file_tree_check.configurationList import (
+    ConfigurationList,
+    PathTable,
+    cluster_configurations,
+    group_subtrees,
+    structure_delta,
+    structure_tokens,
+)
+from file_tree_check.smartDirectoryPath import SmartDirectoryPath
+
+
+@pytest.fixture
+def test_path():
+    return Path(__file__).parent / "test_data"
+
+
+@pytest.fixture
+def subjects(test_path):
+    root = SmartDirectoryPath(test_path / "dataset1", parent_smart_path=None, is_last=False)
+    return [
+        SmartDirectoryPath(test_path / "dataset1" / name, parent_smart_path=root, is_last=False)
+        for name in ("sub-01", "sub-02", "sub-03")
+    ]
+
+
+def test_PathTable(test_path, subjects):
+    path_table = PathTable()
+
+    indices = [path_table.add(subject) for subject in subjects]
+
+    # The root is stored once and shared by the subjects
+    assert len(path_table) == 4
+    assert path_table.add(subjects[0]) == indices[0]
+    assert [path_table.get(index) for index in indices] == [
+        str(test_path / "dataset1" / name) for name in ("sub-01", "sub-02", "sub-03")
+    ]
+
+
+def test_ConfigurationList(subjects):
+    configurations = ConfigurationList()
+
+    configurations.add_path(["anat", "dwi"], subjects[0])
+    configurations.add_path(["anat"], subjects[2])
+    configurations.add_path(["anat", "dwi"], subjects[1])
+
+    assert [configuration["structure"] for configuration in configurations] == [
+        ["anat", "dwi"],
+        ["anat"],
+    ]
+    assert list(configurations[0]["paths"]) == [str(subjects[0].path), str(subjects[1].path)]
+    assert configurations.index[("anat",)] is configurations[1]
+
+
+def test_structure_delta():
+    minus, plus = structure_delta(["anat", "func", "func"], ["anat", "dwi", "func"])
+
+    assert minus == ["dwi"]
+    assert plus == ["func"]
+
+
+def test_structure_tokens():
+    assert structure_tokens(["a", "a", "b"]) == ["a#1", "a#2", "b#1"]
+
+
+def test_cluster_configurations():
+    anat_dwi = [f"anat_{i}" for i in range(10)] + [f"dwi_{i}" for i in range(10)]
+    configuration_list = [
+        {"structure": anat_dwi, "paths": ["sub-01", "sub-02", "sub-03"]},
+        {"structure": anat_dwi[:-1], "paths": ["sub-04"]},
+        {"structure": anat_dwi + ["extra"], "paths": ["sub-05"]},
+        {"structure": ["func"], "paths": ["sub-06"]},
+    ]
+
+    clusters = cluster_configurations(configuration_list, similarity=0.8)
+
+    assert [cluster["count"] for cluster in clusters] == [5, 1]
+    assert clusters[0]["core"] == sorted(anat_dwi)
+    assert [(member["minus"], member["plus"]) for member in clusters[0]["members"]] == [
+        ([], []),
+        (["dwi_9"], []),
+        ([], ["extra"]),
+    ]
+    assert clusters[1]["core"] == ["func"]
+
+
+@pytest.mark.parametrize("representatives", [2, 64])
+@pytest.mark.parametrize("order", [[0, 1, 2], [2, 1, 0], [1, 0, 2]])
+def test_cluster_configurations_order(monkeypatch, order, representatives):
+    # All share the first band, only the last two are similar enough (5 of 6 values)
+    signatures = np.array([[0, 0, 0, 1, 1, 1], [0, 0, 0, 2, 2, 2], [0, 0, 0, 2, 2, 3]])
+    configuration_list = [{"structure": [name], "paths": [name]} for name in ("a", "b", "c")]
+    monkeypatch.setattr(
+        "file_tree_check.configurationList.LSH_BUCKET_REPRESENTATIVES", representatives
+    )
+    monkeypatch.setattr(
+        "file_tree_check.configurationList.minhash_signatures",
+        lambda token_sets, num_perm: signatures[order],
+    )
+
+    clusters = cluster_configurations(
+        [configuration_list[index] for index in order], similarity=0.7, num_perm=6
+    )
+
+    assert sorted(
+        sorted(member["configuration"]["paths"][0] for member in cluster["members"])
+        for cluster in clusters
+    ) == [["a"], ["b", "c"]]
+
+
+def test_group_subtrees(test_path):
+    root = SmartDirectoryPath(test_path, parent_smart_path=None, is_last=False)
+    first = SmartDirectoryPath(test_path / "dataset1", parent_smart_path=root, is_last=False)
+    second = SmartDirectoryPath(test_path / "derivatives1", parent_smart_path=root, is_last=True)
+    third = SmartDirectoryPath(test_path / "dataset1", parent_smart_path=root, is_last=False)
+    for path in (first, second, third):
+        path.compute_digest()
+    second.add_children(
+        SmartDirectoryPath(
+            test_path / "derivatives1" / "sub", parent_smart_path=second, is_last=True
+        )
+    )
+    second.compute_digest()
+
+    groups = group_subtrees([first, second, third])
+
+    assert [group["paths"] for group in groups] == [[first, third], [second]]
+    assert groups[0]["digest"] == first.digest.hex()
+    assert groups[0]["differences"] == []
+    assert groups[1]["differences"] == [("sub", "added")]
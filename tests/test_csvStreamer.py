@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from file_tree_check.csvStreamer import CsvStreamer, external_sort_csv
+from file_tree_check.smartDirectoryPath import SmartDirectoryPath
+from file_tree_check.smartFilePath import SmartFilePath
+
+
+@pytest.fixture
+def test_path():
+    return Path(__file__).parent / "test_data"
+
+
+def read_rows(csv_path):
+    with open(csv_path, newline="") as csv_file:
+        return list(csv.reader(csv_file))
+
+
+def test_CsvStreamer(test_path, tmp_path):
+    root = SmartDirectoryPath(test_path, parent_smart_path=None, is_last=False)
+    tree_file = SmartFilePath(test_path / "filetree.tree", parent_smart_path=root, is_last=True)
+    csv_streamer = CsvStreamer(tmp_path / "Data.csv", ["file_count", "file_size"])
+
+    csv_streamer.write_row(root, "test_data", root.get_stats(["file_count"]))
+    csv_streamer.write_row(tree_file, "tree", tree_file.get_stats(["file_count", "file_size"]))
+    csv_streamer.close()
+
+    assert csv_streamer.row_count == 2
+    assert read_rows(tmp_path / "Data.csv") == [
+        ["Path", "Identifier", "file_count", "file_size"],
+        [str(test_path), "test_data", "1", ""],
+        [str(tree_file.path), "tree", "", str(tree_file.file_size)],
+    ]
+
+
+def test_external_sort_csv(tmp_path):
+    csv_path = tmp_path / "Data.csv"
+    rows = [
+        ["Path", "Identifier", "file_size"],
+        ["/b/2", "b", "3"],
+        ["/a/1", "a", "1"],
+        ["/b/1", "b", "2"],
+        ["/a/2", "a", "4"],
+        ["/c/1", "c", "5"],
+    ]
+    with open(csv_path, "w", newline="") as csv_file:
+        csv.writer(csv_file).writerows(rows)
+
+    external_sort_csv(csv_path, chunk_rows=2)
+
+    assert read_rows(csv_path) == [
+        ["Path", "Identifier", "file_size"],
+        ["/a/1", "a", "1"],
+        ["/a/2", "a", "4"],
+        ["/b/1", "b", "2"],
+        ["/b/2", "b", "3"],
+        ["/c/1", "c", "5"],
+    ]
+    assert list(tmp_path.iterdir()) == [csv_path]
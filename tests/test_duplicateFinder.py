@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from file_tree_check import duplicateFinder
+from file_tree_check.duplicateFinder import DuplicateFinder, sample_checksum
+from file_tree_check.main import generate_tree
+
+
+@pytest.fixture
+def duplicate_tree(tmp_path):
+    content = bytes(range(256)) * 64
+    files = {
+        # Identical files in two subjects
+        "sub-01/anat/T1w.nii": content,
+        "sub-02/anat/T1w.nii": content,
+        # Same size, beginning and end but different in the middle
+        "sub-01/dwi/dwi.nii": content[:8000] + b"a" + content[8001:],
+        "sub-02/dwi/dwi.nii": content[:8000] + b"b" + content[8001:],
+        # Same size but a different beginning
+        "sub-03/anat/T1w.nii": b"c" + content[1:],
+        # Small identical files in the same subject
+        "sub-03/anat/T1w.json": b"{}",
+        "sub-03/dwi/dwi.json": b"{}",
+        "sub-03/dwi/empty.txt": b"",
+        "sub-04/dwi/empty.txt": b"",
+    }
+    for name, data in files.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_bytes(data)
+    return tmp_path
+
+
+def test_sample_checksum(duplicate_tree):
+    size = (duplicate_tree / "sub-01/dwi/dwi.nii").stat().st_size
+
+    assert sample_checksum(duplicate_tree / "sub-01/dwi/dwi.nii", size, 1024) == sample_checksum(
+        duplicate_tree / "sub-02/dwi/dwi.nii", size, 1024
+    )
+    assert sample_checksum(duplicate_tree / "sub-01/anat/T1w.nii", size, 1024) != sample_checksum(
+        duplicate_tree / "sub-03/anat/T1w.nii", size, 1024
+    )
+
+
+def test_find_duplicates(duplicate_tree):
+    finder = DuplicateFinder(sample_size=1024)
+    for path in generate_tree(duplicate_tree, ignore=[]):
+        finder.write_row(path, path.path.name, {})
+
+    groups = finder.find()
+
+    # Sorted by identifiers
+
+    assert [(group["paths"], group["crosses_boundary"]) for group in groups] == [
+        (
+            [
+                (str(duplicate_tree / "sub-03/anat/T1w.json"), "T1w.json", "sub-03"),
+                (str(duplicate_tree / "sub-03/dwi/dwi.json"), "dwi.json", "sub-03"),
+            ],
+            False,
+        ),
+        (
+            [
+                (str(duplicate_tree / "sub-01/anat/T1w.nii"), "T1w.nii", "sub-01"),
+                (str(duplicate_tree / "sub-02/anat/T1w.nii"), "T1w.nii", "sub-02"),
+            ],
+            True,
+        ),
+    ]
+    # Empty files are ignored and only the 4 files whose samples collide are read in full
+    assert finder.counts == {"files": 7, "same_size": 7, "sampled": 7, "hashed": 4}
+
+    output = io.StringIO()
+    finder.write_report(output)
+    assert "2 groups of duplicates among 7 files, 1 crossing units\n" in output.getvalue()
+
+
+def test_unreadable_files_are_skipped(duplicate_tree, monkeypatch):
+    finder = DuplicateFinder(sample_size=1024)
+    for path in generate_tree(duplicate_tree, ignore=[]):
+        # An annexed file whose content and size are unknown has no file_size
+        stats = {"file_size": None} if path.path.name == "dwi.json" else {}
+        finder.write_row(path, path.path.name, stats)
+    hash_file = duplicateFinder.hash_file
+
+    def hash_deleted(path):
+        # The file was deleted after its sample was read
+        if path.endswith("sub-02/anat/T1w.nii"):
+            raise FileNotFoundError(path)
+        return hash_file(path)
+
+    monkeypatch.setattr(duplicateFinder, "hash_file", hash_deleted)
+
+    groups = finder.find()
+
+    assert groups == []
+    assert finder.counts["files"] == 6
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import io
 from pathlib import Path
 
 import pytest
 
-from file_tree_check.fileChecker import get_total_file_count
+from file_tree_check.fileChecker import (
+    FileChecker,
+    Rule,
+    check_permissions,
+    create_rules,
+    get_total_file_count,
+)
+from file_tree_check.inodeTracker import InodeTracker
+from file_tree_check.main import generate_tree
 
 
 @pytest.fixture
@@ -19,3 +28,85 @@ def test_get_total_file_count(test_path, modality, expected):
     )
 
     assert total_file_count == expected
+
+
+@pytest.fixture
+def checked_tree(tmp_path):
+    for subject, sizes in (("sub-01", (10, 20)), ("sub-02", (0, 20, 30))):
+        for index, size in enumerate(sizes):
+            (tmp_path / subject).mkdir(exist_ok=True)
+            (tmp_path / subject / f"image-{index}.nii").write_bytes(b"x" * size)
+    (tmp_path / "sub-02" / "image-2.nii").chmod(0o666)
+    return tmp_path
+
+
+def test_check_permissions(checked_tree):
+    path = checked_tree / "sub-01" / "image-0.nii"
+    path.chmod(0o640)
+
+    assert check_permissions(path, (4, 4, 0))
+    assert check_permissions(path, (6, 4, 0))
+    assert not check_permissions(path, (4, 4, 4))
+    # 5 (r-x) is greater than 4 but the execute bit is missing
+    assert not check_permissions(path, (5, 0, 0))
+
+
+def test_file_checker(checked_tree):
+    checker = FileChecker(
+        create_rules(
+            identifiers="image|sub",
+            min_size=1,
+            required_permissions=0o440,
+            forbidden_permissions=0o002,
+            min_file_count=3,
+        )
+    )
+    for path in generate_tree(checked_tree, ignore=[]):
+        checker.write_row(path, path.path.name.split("-")[0], {})
+    checker.close()
+
+    assert checker.results["image"]["min_size"] == {
+        "checked": 5,
+        "failed": 1,
+        "failures": [str(checked_tree / "sub-02" / "image-0.nii")],
+    }
+    assert checker.results["image"]["permissions"]["failures"] == [
+        str(checked_tree / "sub-02" / "image-2.nii")
+    ]
+    assert checker.results["sub"]["file_count"] == {
+        "checked": 2,
+        "failed": 1,
+        "failures": [str(checked_tree / "sub-01")],
+    }
+    assert checker.failed_count() == 3
+
+    output = io.StringIO()
+    checker.write_report(output)
+    assert "    min_size (at least 1 bytes): 1 of 5 failed\n" in output.getvalue()
+
+
+def test_file_checker_identifiers(checked_tree):
+    checker = FileChecker(create_rules(identifiers="sub", min_file_count=3))
+    for path in generate_tree(checked_tree, ignore=[]):
+        checker.write_row(path, path.path.name.split("-")[0], {})
+
+    assert list(checker.results) == ["sub"]
+
+
+def test_file_count_unexplored(checked_tree):
+    # sub-03 links to sub-02, which has enough files, but its content is not explored
+    (checked_tree / "sub-03").symlink_to("sub-02")
+    checker = FileChecker(create_rules(identifiers="sub", min_file_count=3))
+    for path in generate_tree(checked_tree, ignore=[], inode_tracker=InodeTracker("record")):
+        checker.write_row(path, path.path.name.split("-")[0], {})
+
+    assert checker.results["sub"]["file_count"] == {
+        "checked": 2,
+        "failed": 1,
+        "failures": [str(checked_tree / "sub-01")],
+    }
+
+
+def test_rule_is_abstract():
+    with pytest.raises(TypeError):
+        Rule()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from file_tree_check.gitAnnex import annex_key, annex_key_size
+from file_tree_check.measureRegistry import compute_measures, set_annex_sizes
+from file_tree_check.smartDirectoryPath import SmartDirectoryPath
+from file_tree_check.smartFilePath import SmartFilePath
+
+PRESENT_KEY = "SHA256E-s27071--5f3c0e1d.nii.gz"
+MISSING_KEY = "MD5E-s1048576-m1700000000--d41d8cd9.nii.gz"
+
+
+@pytest.fixture
+def annex_sizes():
+    set_annex_sizes(True)
+    yield
+    set_annex_sizes(False)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    # A DataLad-like dataset, with the content of only one of the annexed files present
+    root = SmartDirectoryPath(tmp_path, parent_smart_path=None, is_last=False)
+    objects = tmp_path / ".git" / "annex" / "objects" / "Xx" / "Yy"
+    (objects / PRESENT_KEY).mkdir(parents=True)
+    (objects / PRESENT_KEY / PRESENT_KEY).write_bytes(bytes(27071))
+    anat = tmp_path / "sub-01" / "anat"
+    anat.mkdir(parents=True)
+    paths = {}
+    for name, key in (("sub-01_T1w.nii.gz", PRESENT_KEY), ("sub-01_dwi.nii.gz", MISSING_KEY)):
+        target = Path("..", "..", ".git", "annex", "objects", "Xx", "Yy", key, key)
+        os.symlink(target, anat / name)
+        paths[name] = anat / name
+    paths["sub-01_T1w.json"] = anat / "sub-01_T1w.json"
+    paths["sub-01_T1w.json"].write_text("{}")
+    return {
+        name: SmartFilePath(path, parent_smart_path=root, is_last=False)
+        for name, path in paths.items()
+    }
+
+
+def test_annex_key():
+    assert annex_key(f"../../.git/annex/objects/Xx/Yy/{PRESENT_KEY}/{PRESENT_KEY}") == PRESENT_KEY
+    assert annex_key("../other/file.nii.gz") is None
+    assert annex_key(None) is None
+    assert annex_key_size(PRESENT_KEY) == 27071
+    assert annex_key_size(MISSING_KEY) == 1048576
+    assert annex_key_size("URL--https&c%%example.com%data.nii.gz") is None
+
+
+def test_annex_sizes(dataset, annex_sizes, monkeypatch):
+    stat = Path.stat
+
+    def stat_unannexed(self, **kwargs):
+        assert not os.path.islink(self), f"{self} was stat'ed"
+        return stat(self, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", stat_unannexed)
+
+    measures = ["file_size", "annex_present"]
+    assert compute_measures(dataset["sub-01_T1w.nii.gz"], measures) == {
+        "file_size": 27071,
+        "annex_present": True,
+    }
+    assert compute_measures(dataset["sub-01_dwi.nii.gz"], measures) == {
+        "file_size": 1048576,
+        "annex_present": False,
+    }
+    assert compute_measures(dataset["sub-01_T1w.json"], measures) == {
+        "file_size": 2,
+        "annex_present": True,
+    }
+    assert dataset["sub-01_dwi.nii.gz"].file_size == 1048576
+
+
+def test_file_size_follows_links(dataset):
+    assert dataset["sub-01_T1w.nii.gz"].file_size == 27071
+    with pytest.raises(FileNotFoundError):
+        compute_measures(dataset["sub-01_dwi.nii.gz"], ["file_size"])
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from file_tree_check.asyncTraversal import generate_tree_async
+from file_tree_check.inodeTracker import InodeTracker
+from file_tree_check.main import generate_tree
+
+
+@pytest.fixture
+def linked_tree(tmp_path):
+    # A directory with a hard link, a second link to it and a link loop back to the root
+    anat = tmp_path / "anat"
+    anat.mkdir()
+    (anat / "T1w.nii").write_bytes(bytes(100))
+    os.link(anat / "T1w.nii", anat / "T1w_copy.nii")
+    os.symlink("..", anat / "loop")
+    os.symlink("anat", tmp_path / "freesurfer")
+    return tmp_path
+
+
+@pytest.fixture(params=["sync", "async"])
+def traverse(request):
+    def traverse(root, inode_tracker):
+        if request.param == "sync":
+            return list(generate_tree(root, ignore=[], inode_tracker=inode_tracker))
+        return list(
+            generate_tree_async(root, ignore=[], concurrency=4, inode_tracker=inode_tracker)
+        )
+
+    return traverse
+
+
+@pytest.mark.parametrize(
+    "symlink_policy, expected",
+    [
+        ("follow", ["", "anat", "anat/loop", "anat/T1w.nii", "anat/T1w_copy.nii", "freesurfer"]),
+        ("skip", ["", "anat", "anat/T1w.nii", "anat/T1w_copy.nii"]),
+        ("record", ["", "anat", "anat/loop", "anat/T1w.nii", "anat/T1w_copy.nii", "freesurfer"]),
+    ],
+)
+def test_symlink_policies(linked_tree, traverse, symlink_policy, expected):
+    inode_tracker = InodeTracker(symlink_policy)
+
+    paths = traverse(linked_tree, inode_tracker)
+
+    assert sorted(path.path.relative_to(linked_tree).as_posix().strip(".") for path in paths) == (
+        sorted(expected)
+    )
+    # Each directory is explored once, the ones not explored have no children
+    unexplored = [path.path.name for path in paths if path.is_directory and not path.children]
+    if symlink_policy == "follow":
+        assert sorted(path.name for path in inode_tracker.redundant) == ["freesurfer", "loop"]
+        assert sorted(unexplored) == ["freesurfer", "loop"]
+    elif symlink_policy == "record":
+        assert sorted(path.name for path in inode_tracker.recorded) == ["freesurfer", "loop"]
+        assert sorted(unexplored) == ["freesurfer", "loop"]
+
+
+def test_skipped_last_entry(linked_tree, traverse):
+    # The skipped links are the last entry of the root and the first of anat
+    paths = traverse(linked_tree, InodeTracker("skip"))
+
+    lines = [path.displayable().strip() for path in paths[1:]]
+    assert [line.split(" ")[0] for line in lines] == ["└──", "├──", "└──"]
+    assert lines[0].endswith("anat")
+    assert lines[-1].endswith("T1w_copy.nii")
+
+
+def test_hard_links_once(linked_tree, traverse):
+    paths = traverse(linked_tree, InodeTracker("skip", hard_links_once=True))
+
+    files = {path.path.name: path for path in paths if not path.is_directory}
+    assert files["T1w.nii"].hard_link_of is None
+    assert files["T1w_copy.nii"].hard_link_of == linked_tree / "anat" / "T1w.nii"
+    assert [
+        files[name].get_stats(["file_size"])["file_size"] for name in ("T1w.nii", "T1w_copy.nii")
+    ] == [100, 0]
+
+    # Without it, both links have the file's size
+    paths = traverse(linked_tree, InodeTracker("skip"))
+
+    assert [path.file_size for path in paths if not path.is_directory] == [100, 100]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        InodeTracker("resolve")
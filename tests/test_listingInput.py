@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+import random
+import shutil
+import stat
+from pathlib import Path
+
+import pytest
+
+from file_tree_check.listingInput import (
+    generate_tree_from_listing,
+    parse_listing_line,
+    sort_listing,
+)
+from file_tree_check.main import generate_tree
+
+MEASURES = ["file_size", "file_count", "dir_count", "modified_time", "mode"]
+
+
+@pytest.fixture
+def demo_path():
+    return Path(__file__).parent.parent / "Demo"
+
+
+def write_listing(root: Path, listing_path: Path) -> None:
+    # Like find <root> -printf '%p\t%y\t%s\t%T@\t%m\n', in a random order
+    lines = []
+    for directory, directories, files in os.walk(root):
+        if directory == str(root):
+            lines.append(listing_line(root, "d"))
+        for name in directories:
+            lines.append(listing_line(Path(directory, name), "d"))
+        for name in files:
+            lines.append(listing_line(Path(directory, name), "f"))
+    random.Random(0).shuffle(lines)
+    listing_path.write_text("".join(lines))
+
+
+def listing_line(path: Path, entry_type: str) -> str:
+    stat_result = path.stat()
+    return (
+        f"{path}\t{entry_type}\t{stat_result.st_size}\t{stat_result.st_mtime}"
+        f"\t{stat.S_IMODE(stat_result.st_mode):o}\n"
+    )
+
+
+def describe(paths) -> list[tuple]:
+    return [
+        (
+            str(path.path),
+            path.is_last,
+            str(path.parent.path) if path.parent else None,
+            path.identifier,
+            path.get_stats(MEASURES),
+        )
+        for path in paths
+    ]
+
+
+def test_parse_listing_line():
+    path, is_dir, stat_result = parse_listing_line("/data/sub-01/\td\t4096\t1700000000.5\t750\n")
+
+    assert (path, is_dir) == ("/data/sub-01", True)
+    assert stat.S_ISDIR(stat_result.st_mode)
+    assert stat.S_IMODE(stat_result.st_mode) == 0o750
+    assert (stat_result.st_size, stat_result.st_mtime) == (4096, 1700000000.5)
+    assert parse_listing_line("/data/a.nii\tf\t12\t1.0")[2].st_mode == stat.S_IFREG | 0o644
+    with pytest.raises(ValueError):
+        parse_listing_line("/data/a.nii")
+
+
+def test_generate_tree_from_listing(tmp_path, demo_path):
+    root = tmp_path / "Demo"
+    shutil.copytree(demo_path, root)
+    listing_path = tmp_path / "listing.tsv"
+    write_listing(root, listing_path)
+    with open(listing_path, "a") as listing:
+        listing.write("malformed line\n")
+        listing.write(f"{tmp_path}/outside.txt\tf\t1\t0.0\n")
+    options = dict(ignore=["code"], depth_limit=4)
+    expected = describe(generate_tree(root, **options))
+    shutil.rmtree(root)
+
+    # The filesystem is not touched, the tree was removed
+    paths = describe(generate_tree_from_listing(listing_path, root, chunk_rows=5, **options))
+
+    assert paths == expected
+
+    sorted_path = tmp_path / "sorted.tsv"
+    sort_listing(listing_path, sorted_path, root, chunk_rows=5)
+    paths = describe(generate_tree_from_listing(sorted_path, root, presorted=True, **options))
+
+    assert paths == expected
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from file_tree import FileTree
+
+from file_tree_check import smartPath
+from file_tree_check.main import add_configuration, collapsed_tree_lines, generate_tree
+
+
+@pytest.fixture
+def demo_path():
+    return Path(__file__).parent.parent / "Demo"
+
+
+@pytest.fixture
+def duck_tree():
+    return FileTree.read(
+        Path(__file__).parent.parent / "file_tree_check" / "trees" / "duck_demo.tree"
+    )
+
+
+def test_add_configuration(demo_path, duck_tree):
+    configurations = {}
+    for path in generate_tree(demo_path, ignore=[], file_tree=duck_tree):
+        configurations = add_configuration(path, configurations, target_depth=2)
+
+    assert list(configurations) == ["momma_duck-{momma_duck}"]
+    momma_configurations = configurations["momma_duck-{momma_duck}"]
+    assert [
+        (configuration["structure"], len(configuration["paths"]))
+        for configuration in momma_configurations
+    ] == [
+        (["baby_duck_jpg", "baby_duck_jpg", "baby_duck_jpg", "momma_txt"], 7),
+        (["baby_swan-imposter.jpg"], 1),
+    ]
+    assert list(momma_configurations[1]["paths"]) == [str(demo_path / "pond-2" / "momma_duck-2.1")]
+
+
+def test_generate_tree_digests(demo_path, duck_tree):
+    paths = list(generate_tree(demo_path, ignore=[], file_tree=duck_tree, digests=True))
+
+    assert all(path.digest is not None for path in paths)
+    mommas = {path.path.name: path for path in paths if path.depth == 2}
+    assert mommas["momma_duck-1.1"].digest == mommas["momma_duck-3.4"].digest
+    assert mommas["momma_duck-1.1"].digest != mommas["momma_duck-2.1"].digest
+    assert mommas["momma_duck-2.1"].diff(mommas["momma_duck-1.1"]) == [
+        ("baby_swan-imposter.jpg", "removed"),
+        ("baby_duck-1.1.1_color-yellow.jpg", "added"),
+        ("baby_duck-1.1.2_color-green.jpg", "added"),
+        ("baby_duck-1.1.3_color-blue.jpg", "added"),
+        ("momma_duck-1.1.txt", "added"),
+    ]
+
+
+def test_generate_tree_digest_measures(demo_path, monkeypatch):
+    measures = ["file_count", "file_size"]
+    expected = list(generate_tree(demo_path, ignore=[], digests=True, digest_measures=measures))
+    measured = []
+    compute_measures = smartPath.compute_measures
+
+    def count_measures(path, names):
+        measured.append(path.path)
+        return compute_measures(path, names)
+
+    monkeypatch.setattr(smartPath, "compute_measures", count_measures)
+
+    paths = []
+    for path in generate_tree(demo_path, ignore=[], digests=True, digest_measures=measures):
+        path.add_stats({measure: {} for measure in measures}, path.identifier, measures)
+        paths.append(path)
+
+    # The digests use the measures of add_stats(), each path is measured once
+    assert [path.digest for path in paths] == [path.digest for path in expected]
+    assert sorted(measured) == sorted(path.path for path in paths)
+
+
+def test_add_configuration_keep_subtrees(demo_path, duck_tree):
+    configurations = {}
+    for path in generate_tree(demo_path, ignore=[], file_tree=duck_tree, digests=True):
+        configurations = add_configuration(path, configurations, target_depth=2, keep_subtrees=True)
+
+    subtrees = configurations["momma_duck-{momma_duck}"].subtrees
+    assert len(subtrees) == 8
+    assert all(subtree.digest is not None for subtree in subtrees)
+
+
+def test_collapsed_tree_lines(demo_path, duck_tree):
+    paths = list(generate_tree(demo_path, ignore=[], file_tree=duck_tree, digests=True))
+
+    lines = list(collapsed_tree_lines(paths[0], name_max_length=30))
+
+    assert [line.rstrip() for line in lines if "more" in line] == [
+        "│   └── ... and 1 more `momma_duck-*` with identical structure",
+        "    └── ... and 3 more `momma_duck-*` with identical structure",
+    ]
+    # 4 folded directories of 5 lines each, replaced by 2 lines
+    assert len(lines) == len(paths) - 4 * 5 + 2
+
+
+def test_collapsed_tree_lines_without_repeats(demo_path, duck_tree):
+    paths = list(generate_tree(demo_path / "pond-2", ignore=[], file_tree=duck_tree, digests=True))
+
+    assert list(collapsed_tree_lines(paths[0], ["file_size"])) == [
+        path.displayable(["file_size"]) for path in paths
+    ]
+
+
+def test_displayable_prefixes(demo_path, duck_tree):
+    for path in generate_tree(demo_path, ignore=[], file_tree=duck_tree):
+        # Separators rebuilt by going up the parent hierarchy
+        parents = []
+        parent = path.parent
+        while parent is not None and parent.parent is not None:
+            parents.append("    " if parent.is_last else "│   ")
+            parent = parent.parent
+        prefix = "".join(reversed(parents))
+        if path.parent is not None:
+            prefix += "└── " if path.is_last else "├── "
+
+        assert path.displayable(["file_size"]) == prefix + path.display(["file_size"])
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import gzip
+import os
+import struct
+from pathlib import Path
+
+import pytest
+
+from file_tree_check.measureRegistry import (
+    MEASURES,
+    STAT_BLOCK_SIZE,
+    Measure,
+    compute_measures,
+    read_header,
+    register_measure,
+)
+from file_tree_check.niftiHeader import parse_nifti_header
+from file_tree_check.smartDirectoryPath import SmartDirectoryPath
+from file_tree_check.smartFilePath import SmartFilePath
+
+
+@pytest.fixture
+def test_path():
+    return Path(__file__).parent / "test_data"
+
+
+@pytest.fixture
+def tree_file(test_path):
+    root = SmartDirectoryPath(test_path, parent_smart_path=None, is_last=False)
+    return SmartFilePath(test_path / "filetree.tree", parent_smart_path=root, is_last=True)
+
+
+def nifti1_header(shape, voxel_size, datatype=4, byte_order="<"):
+    header = bytearray(348)
+    struct.pack_into(byte_order + "i", header, 0, 348)
+    dim = (len(shape),) + tuple(shape) + (1,) * (7 - len(shape))
+    struct.pack_into(byte_order + "8h", header, 40, *dim)
+    struct.pack_into(byte_order + "h", header, 70, datatype)
+    pixdim = (1.0,) + tuple(voxel_size) + (0.0,) * (7 - len(voxel_size))
+    struct.pack_into(byte_order + "8f", header, 76, *pixdim)
+    header[344:348] = b"n+1\0"
+    return bytes(header)
+
+
+def nifti2_header(shape, voxel_size, datatype=16):
+    header = bytearray(540)
+    struct.pack_into("<i", header, 0, 540)
+    struct.pack_into("<h", header, 12, datatype)
+    dim = (len(shape),) + tuple(shape) + (1,) * (7 - len(shape))
+    struct.pack_into("<8q", header, 16, *dim)
+    pixdim = (1.0,) + tuple(voxel_size) + (0.0,) * (7 - len(voxel_size))
+    struct.pack_into("<8d", header, 104, *pixdim)
+    return bytes(header)
+
+
+@pytest.fixture
+def nifti_files(tmp_path):
+    root = SmartDirectoryPath(tmp_path, parent_smart_path=None, is_last=False)
+    anat = tmp_path / "sub-01_T1w.nii.gz"
+    anat.write_bytes(
+        gzip.compress(nifti1_header((256, 256, 176), (1, 1, 1.2)) + os.urandom(1 << 20))
+    )
+    dwi = tmp_path / "sub-01_dwi.nii"
+    dwi.write_bytes(nifti2_header((96, 96, 60, 65), (2, 2, 2, 3.5)) + bytes(1024))
+    # Only the first compressed bytes are read, a truncated image still has its header
+    truncated = tmp_path / "sub-02_T1w.nii.gz"
+    truncated.write_bytes(anat.read_bytes()[:4096])
+    # Not gzipped, like the images of test_data
+    fake = tmp_path / "sub-03_T1w.nii.gz"
+    fake.write_text("hello")
+    other = tmp_path / "sub-01_T1w.json"
+    other.write_text("{}")
+    return {
+        path.name: SmartFilePath(path, parent_smart_path=root, is_last=False)
+        for path in (anat, dwi, truncated, fake, other)
+    }
+
+
+def test_compute_measures_single_stat(tree_file, monkeypatch):
+    calls = []
+    stat = Path.stat
+    monkeypatch.setattr(Path, "stat", lambda self, **kwargs: calls.append(self) or stat(self))
+
+    stats = compute_measures(
+        tree_file,
+        ["file_size", "modified_time", "allocated_size", "link_count", "uid", "gid", "mode"],
+    )
+
+    assert len(calls) == 1
+    stat_result = os.stat(tree_file.path)
+    assert stats == {
+        "file_size": stat_result.st_size,
+        "modified_time": int(stat_result.st_mtime),
+        "allocated_size": stat_result.st_blocks * STAT_BLOCK_SIZE,
+        "link_count": stat_result.st_nlink,
+        "uid": stat_result.st_uid,
+        "gid": stat_result.st_gid,
+        "mode": f"{stat_result.st_mode & 0o7777:04o}",
+    }
+
+
+def test_compute_measures_listing(test_path, tree_file):
+    directory = tree_file.parent
+
+    assert compute_measures(directory, ["dir_count", "file_count"]) == {
+        "file_count": 1,
+        "dir_count": 2,
+    }
+    assert compute_measures(tree_file, ["file_count"]) == {"file_count": None}
+    with pytest.raises(ValueError):
+        compute_measures(tree_file, ["unknown"])
+
+
+def test_register_measure_header(tree_file, monkeypatch):
+    monkeypatch.setitem(
+        MEASURES,
+        "first_line",
+        Measure(
+            "first_line",
+            lambda path, inputs: inputs["header"].split(b"\n")[0].decode(),
+            inputs=("header",),
+            directories=False,
+            header_size=64,
+            arrow_type="string",
+        ),
+    )
+
+    stats = tree_file.get_stats(["first_line"])
+
+    assert stats == {"first_line": tree_file.path.read_text().split("\n")[0][:64]}
+    with pytest.raises(ValueError):
+        register_measure(Measure("bad", lambda path, inputs: None, inputs=("content",)))
+
+
+def test_parse_nifti_header():
+    assert parse_nifti_header(nifti1_header((64, 64, 32), (3, 3, 4), byte_order=">")) == {
+        "shape": (64, 64, 32),
+        "voxel_size": (3.0, 3.0, 4.0),
+        "datatype": "int16",
+    }
+    assert parse_nifti_header(b"hello") is None
+    assert parse_nifti_header(nifti1_header((64, 64, 32), (3, 3, 4))[:200]) is None
+
+
+def test_nifti_measures(nifti_files, monkeypatch):
+    nifti_measures = ["nifti_shape", "nifti_voxel_size", "nifti_datatype"]
+
+    assert compute_measures(nifti_files["sub-01_T1w.nii.gz"], nifti_measures) == {
+        "nifti_shape": "256x256x176",
+        "nifti_voxel_size": "1x1x1.2",
+        "nifti_datatype": "int16",
+    }
+    assert compute_measures(nifti_files["sub-01_dwi.nii"], nifti_measures) == {
+        "nifti_shape": "96x96x60x65",
+        "nifti_voxel_size": "2x2x2x3.5",
+        "nifti_datatype": "float32",
+    }
+    assert compute_measures(nifti_files["sub-02_T1w.nii.gz"], nifti_measures)["nifti_shape"] == (
+        "256x256x176"
+    )
+    assert compute_measures(nifti_files["sub-03_T1w.nii.gz"], nifti_measures) == {
+        name: None for name in nifti_measures
+    }
+    # Vanished since it was found
+    nifti_files["sub-01_dwi.nii"].path.unlink()
+    assert compute_measures(nifti_files["sub-01_dwi.nii"], nifti_measures) == {
+        name: None for name in nifti_measures
+    }
+
+    # The header of files that are not images is never read
+    monkeypatch.setattr(
+        "file_tree_check.measureRegistry.read_header",
+        lambda path, size: pytest.fail(f"{path.path} was read"),
+    )
+    assert compute_measures(nifti_files["sub-01_T1w.json"], nifti_measures) == {
+        name: None for name in nifti_measures
+    }
+
+
+def test_read_header_gzip(nifti_files):
+    header = read_header(nifti_files["sub-01_T1w.nii.gz"], 540)
+
+    assert len(header) == 540
+    assert header[:348] == nifti1_header((256, 256, 176), (1, 1, 1.2))
+    with pytest.raises(ValueError):
+        read_header(nifti_files["sub-03_T1w.nii.gz"], 540)
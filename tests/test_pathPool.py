@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from file_tree_check.main import generate_tree
+from file_tree_check.pathPool import PathPool, StatCache
+
+
+class SizeCache(StatCache):
+    """Sizes of files in several units."""
+
+    table = "sizes"
+    columns = ("unit", "value")
+
+
+class SizePool(PathPool):
+    """The size of each file, read by the pool and cached in bytes."""
+
+    def wants(self, path):
+        return not path.is_directory
+
+    def arguments(self, path):
+        return (str(path.path),)
+
+    def cached(self, path):
+        values = self.cache.get(path.stat(), ["bytes"])
+        return int(values["bytes"]) if values is not None else None
+
+    def assign(self, path, result):
+        path.size = result
+
+    def cache_result(self, path, result):
+        self.cache.put(path.stat(), {"bytes": result})
+
+
+@pytest.fixture
+def sized_tree(tmp_path):
+    root = tmp_path / "data"
+    for index in range(6):
+        (root / f"sub-{index % 2}").mkdir(parents=True, exist_ok=True)
+        (root / f"sub-{index % 2}" / f"file-{index}.txt").write_bytes(bytes(index))
+    return root
+
+
+def test_stat_cache(tmp_path, sized_tree):
+    stat_result = os.stat(sized_tree / "sub-1" / "file-3.txt")
+    cache = SizeCache(tmp_path / "cache" / "sizes.sqlite")
+    cache.put(stat_result, {"bytes": 3, "kilobytes": 0})
+    cache.close()
+
+    cache = SizeCache(tmp_path / "cache" / "sizes.sqlite")
+
+    assert cache.get(stat_result, ["bytes"]) == {"bytes": "3"}
+    assert cache.get(stat_result, ["bytes", "blocks"]) is None
+    assert cache.get(os.stat(sized_tree / "sub-0" / "file-2.txt"), ["bytes"]) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_process_paths(tmp_path, sized_tree, processes):
+    expected = list(generate_tree(sized_tree, ignore=[]))
+    cache_path = tmp_path / "sizes.sqlite"
+
+    pool = SizePool(os.path.getsize, processes, SizeCache(cache_path), window=2)
+    paths = generate_tree(sized_tree, ignore=[])
+    paths = list(pool.process_paths(path for path in paths if path.path.name != "file-5.txt"))
+
+    # Kept in order, the sizes cached for the next run
+    assert [path.path for path in paths] == [
+        path.path for path in expected if path.path.name != "file-5.txt"
+    ]
+    assert [path.size for path in paths if not path.is_directory] == [0, 2, 4, 1, 3]
+    assert pool.processed_count == 5
+
+    pool = SizePool(os.path.getsize, processes, SizeCache(cache_path))
+    paths = list(pool.process_paths(generate_tree(sized_tree, ignore=[])))
+
+    assert pool.processed_count == 1
+    assert pool.cache.hits == 5
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_process_paths_errors(tmp_path, sized_tree, cached):
+    paths = list(generate_tree(sized_tree, ignore=[]))
+    (sized_tree / "sub-0" / "file-2.txt").unlink()
+    cache = SizeCache(tmp_path / "sizes.sqlite") if cached else None
+
+    paths = list(SizePool(os.path.getsize, cache=cache).process_paths(paths))
+
+    # The file deleted since it was found has no size, the others are still measured
+    assert {path.path.name: path.size for path in paths if not path.is_directory} == {
+        "file-0.txt": 0,
+        "file-2.txt": None,
+        "file-4.txt": 4,
+        "file-1.txt": 1,
+        "file-3.txt": 3,
+        "file-5.txt": 5,
+    }
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+from file_tree import FileTree
+
+from file_tree_check.listingInput import generate_tree_from_listing
+from file_tree_check.main import generate_tree
+from file_tree_check.pipeWriter import PipeWriter, read_binary_records
+
+
+@pytest.fixture
+def demo_path():
+    return Path(__file__).parent.parent / "Demo"
+
+
+@pytest.fixture
+def duck_tree():
+    return FileTree.read(
+        Path(__file__).parent.parent / "file_tree_check" / "trees" / "duck_demo.tree"
+    )
+
+
+def pipe(demo_path, duck_tree, record_format):
+    output = io.BytesIO()
+    pipe_writer = PipeWriter(output, record_format=record_format, file_tree=duck_tree)
+    paths = list(generate_tree(demo_path / "pond-2", ignore=[], file_tree=duck_tree))
+    for path in paths:
+        pipe_writer.write_row(path, path.identifier, {})
+    pipe_writer.close()
+    return paths, output.getvalue()
+
+
+def test_PipeWriter_csv(demo_path, duck_tree):
+    paths, output = pipe(demo_path, duck_tree, "csv")
+
+    swan = demo_path / "pond-2" / "momma_duck-2.1" / "baby_swan-imposter.jpg"
+    lines = output.decode().splitlines()
+    assert len(lines) == 5
+    assert (
+        lines[0]
+        == f"{swan},baby_swan-imposter.jpg,{swan.stat().st_size},{int(swan.stat().st_mtime)}"
+    )
+
+
+def test_PipeWriter_ndjson(demo_path, duck_tree):
+    paths, output = pipe(demo_path, duck_tree, "ndjson")
+
+    records = [json.loads(line) for line in output.decode().splitlines()]
+    assert records[1]["identifier"] == "baby_duck_jpg"
+    assert records[1]["placeholders"] == {
+        "pond": "2",
+        "momma_duck": "2.2",
+        "baby_duck": "2.2.1",
+        "color": "yellow",
+    }
+
+
+def test_PipeWriter_binary(demo_path, duck_tree):
+    paths, output = pipe(demo_path, duck_tree, "binary")
+    _, ndjson_output = pipe(demo_path, duck_tree, "ndjson")
+
+    assert output.startswith(b"FTC\x01")
+    assert list(read_binary_records(io.BytesIO(output))) == [
+        json.loads(line) for line in ndjson_output.decode().splitlines()
+    ]
+
+
+def test_PipeWriter_unknown_format():
+    with pytest.raises(ValueError):
+        PipeWriter(io.BytesIO(), record_format="xml")
+
+
+def test_PipeWriter_listing_unknown_size(tmp_path):
+    # The files only exist in the listing, one of them has no known size
+    root = tmp_path / "absent"
+    listing_path = tmp_path / "listing.tsv"
+    listing_path.write_text(
+        f"{root}\td\t0\t10.0\n{root}/a.txt\tf\t3\t20.5\n{root}/b.txt\tf\t5\t30.0\n"
+    )
+    outputs = {}
+    for record_format in ["csv", "ndjson", "binary"]:
+        output = io.BytesIO()
+        pipe_writer = PipeWriter(output, record_format=record_format)
+        for path in generate_tree_from_listing(listing_path, root, ignore=[]):
+            stats = {"file_size": None, "modified_time": 30} if path.path.name == "b.txt" else {}
+            pipe_writer.write_row(path, "text_file", stats)
+        pipe_writer.close()
+        outputs[record_format] = output.getvalue()
+
+    assert outputs["csv"].decode().splitlines() == [
+        f"{root}/a.txt,text_file,3,20",
+        f"{root}/b.txt,text_file,,30",
+    ]
+    records = [json.loads(line) for line in outputs["ndjson"].decode().splitlines()]
+    assert [(record["file_size"], record["modified_time"]) for record in records] == [
+        (3, 20),
+        (None, 30),
+    ]
+    assert list(read_binary_records(io.BytesIO(outputs["binary"]))) == records
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from file_tree_check.main import generate_tree
+from file_tree_check.measureRegistry import MEASURES
+from file_tree_check.sidecarReader import (
+    SidecarCache,
+    SidecarReader,
+    register_sidecar_measures,
+    sidecar_value,
+)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = tmp_path / "dataset"
+    for subject, repetition_time in (("01", 2.0), ("02", 2.0), ("03", 2.5)):
+        func = root / f"sub-{subject}" / "func"
+        func.mkdir(parents=True)
+        (func / f"sub-{subject}_task-rest_bold.json").write_text(
+            json.dumps(
+                {
+                    "RepetitionTime": repetition_time,
+                    "TaskName": "rest",
+                    "Scanner": {"Model": "Prisma"},
+                }
+            )
+        )
+        (func / f"sub-{subject}_task-rest_bold.nii.gz").write_bytes(b"")
+    # Not valid JSON, like the sidecars of test_data
+    (root / "sub-03" / "func" / "broken.json").write_text("{")
+    return root
+
+
+@pytest.fixture
+def registry():
+    registered = dict(MEASURES)
+    yield MEASURES
+    MEASURES.clear()
+    MEASURES.update(registered)
+
+
+def test_sidecar_value():
+    document = {"RepetitionTime": 2, "SliceTiming": [0, 0.5], "Scanner": {"Model": "Prisma"}}
+
+    assert sidecar_value(document, "RepetitionTime") == "2"
+    assert sidecar_value(document, "SliceTiming") == "[0, 0.5]"
+    assert sidecar_value(document, "Scanner.Model") == "Prisma"
+    assert sidecar_value(document, "EchoTime") is None
+    assert sidecar_value(document, "RepetitionTime.Unit") is None
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_read_paths(tmp_path, dataset, processes):
+    keys = ["RepetitionTime", "Scanner.Model"]
+    expected = list(generate_tree(dataset, ignore=[]))
+
+    reader = SidecarReader(keys, processes, SidecarCache(tmp_path / "sidecars.sqlite"), window=2)
+    paths = list(reader.read_paths(generate_tree(dataset, ignore=[])))
+
+    assert [path.path for path in paths] == [path.path for path in expected]
+    sidecars = {path.path.name: path.sidecar for path in paths if path.sidecar is not None}
+    assert sidecars == {
+        "sub-01_task-rest_bold.json": {"RepetitionTime": "2.0", "Scanner.Model": "Prisma"},
+        "sub-02_task-rest_bold.json": {"RepetitionTime": "2.0", "Scanner.Model": "Prisma"},
+        "sub-03_task-rest_bold.json": {"RepetitionTime": "2.5", "Scanner.Model": "Prisma"},
+        "broken.json": {"RepetitionTime": None, "Scanner.Model": None},
+    }
+    assert reader.read_count == 4
+
+    # Unchanged sidecars are found in the cache instead of being read again
+    reader = SidecarReader(keys, processes, SidecarCache(tmp_path / "sidecars.sqlite"))
+    paths = list(reader.read_paths(generate_tree(dataset, ignore=[])))
+
+    assert reader.read_count == 1
+    assert reader.cache.hits == 3
+    assert {path.path.name: path.sidecar for path in paths if path.sidecar is not None} == sidecars
+
+    # A new key is read from every sidecar
+    reader = SidecarReader(
+        keys + ["TaskName"], processes, SidecarCache(tmp_path / "sidecars.sqlite")
+    )
+    paths = list(reader.read_paths(generate_tree(dataset, ignore=[])))
+
+    assert reader.read_count == 4
+    assert all(
+        path.sidecar["TaskName"] == "rest" for path in paths if path.path.name.endswith("bold.json")
+    )
+
+
+def test_sidecar_measures(dataset, registry):
+    names = register_sidecar_measures(["RepetitionTime"])
+    paths = [path for path in generate_tree(dataset, ignore=[]) if not path.is_directory]
+
+    assert names == ["sidecar_RepetitionTime"]
+    assert "sidecar_RepetitionTime" in registry
+    values = {path.path.name: path.get_stats(names)["sidecar_RepetitionTime"] for path in paths}
+    assert values == {
+        "sub-01_task-rest_bold.json": "2.0",
+        "sub-01_task-rest_bold.nii.gz": None,
+        "sub-02_task-rest_bold.json": "2.0",
+        "sub-02_task-rest_bold.nii.gz": None,
+        "sub-03_task-rest_bold.json": "2.5",
+        "sub-03_task-rest_bold.nii.gz": None,
+        "broken.json": None,
+    }
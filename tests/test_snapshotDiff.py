@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import csv
+
+from file_tree_check.snapshotDiff import (
+    DIFF_HEADER,
+    diff_rows,
+    is_sorted_by_path,
+    write_diff_csv,
+    write_diff_report,
+)
+
+
+def write_rows(csv_path, rows):
+    with open(csv_path, "w", newline="") as csv_file:
+        csv.writer(csv_file).writerows(rows)
+    return csv_path
+
+
+def test_diff_rows(tmp_path):
+    old_csv = write_rows(
+        tmp_path / "old.csv",
+        [
+            ["Path", "Identifier", "file_size", "modified_time"],
+            ["/a/1", "a", "1", "10"],
+            ["/a/2", "a", "2.0", "10"],
+            ["/b/1", "b", "3", "10"],
+        ],
+    )
+    new_csv = write_rows(
+        tmp_path / "new.csv",
+        [
+            ["Path", "Identifier", "file_size"],
+            ["/a/2", "a", "2"],
+            ["/b/1", "c", "4"],
+            ["/b/2", "b", "5"],
+        ],
+    )
+
+    assert is_sorted_by_path(old_csv)
+    assert list(diff_rows(old_csv, new_csv)) == [
+        ["removed", "a", "/a/1", "", "", ""],
+        ["changed", "c", "/b/1", "Identifier", "b", "c"],
+        ["changed", "c", "/b/1", "file_size", "3", "4"],
+        ["added", "b", "/b/2", "", "", ""],
+    ]
+
+
+def test_write_diff_csv(tmp_path):
+    # Grouped by identifier like the Data.csv written by StatBuilder
+    old_csv = write_rows(
+        tmp_path / "old.csv",
+        [
+            ["Path", "Identifier", "file_size"],
+            ["/b/1", "b", "3"],
+            ["/a/1", "a", "1"],
+            ["/a/2", "a", "2"],
+        ],
+    )
+    new_csv = write_rows(
+        tmp_path / "new.csv",
+        [
+            ["Path", "Identifier", "file_size"],
+            ["/b/1", "b", "3"],
+            ["/b/2", "b", "5"],
+            ["/a/2", "a", "6"],
+        ],
+    )
+    assert not is_sorted_by_path(old_csv)
+
+    counts = write_diff_csv(old_csv, new_csv, tmp_path / "diff.csv", chunk_rows=2)
+
+    assert counts == {
+        "a": {"added": 0, "removed": 1, "changed": 1},
+        "b": {"added": 1, "removed": 0, "changed": 0},
+    }
+    with open(tmp_path / "diff.csv", newline="") as csv_file:
+        assert list(csv.reader(csv_file)) == [
+            DIFF_HEADER,
+            ["removed", "a", "/a/1", "", "", ""],
+            ["changed", "a", "/a/2", "file_size", "2", "6"],
+            ["added", "b", "/b/2", "", "", ""],
+        ]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["diff.csv", "new.csv", "old.csv"]
+
+    with open(tmp_path / "report.txt", "w") as report:
+        write_diff_report(report, tmp_path / "diff.csv", counts)
+    assert (tmp_path / "report.txt").read_text() == (
+        "\nIn 'a': 1 removed, 1 changed\n"
+        "    removed: /a/1\n"
+        "    changed: /a/2  file_size: 2 -> 6\n"
+        "\nIn 'b': 1 added\n"
+        "    added: /b/2\n"
+    )
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from file_tree_check.statBuilder import StatBuilder, top_identifiers, top_outliers
+
+
+@pytest.fixture
+def root():
+    return Path("/data/study")
+
+
+@pytest.fixture
+def stat_dict(root):
+    return {
+        "file_count": {
+            "sub": {
+                root / "sub-01": 3,
+                root / "sub-02": 3,
+                root / "sub-03": 2,
+            },
+            "study": {root: 0},
+        }
+    }
+
+
+def test_write_summary(root, stat_dict):
+    stat_builder = StatBuilder(stat_dict, ["file_count"])
+    output = io.StringIO()
+
+    written = stat_builder.write_summary(output, root, configurations=None)
+
+    summary = output.getvalue()
+    assert written == len(summary)
+    assert (
+        "    In 'sub':\n"
+        "        file_count of 3 found 2 times\n"
+        "          Common:\n"
+        "          sub-01  has: 3\n"
+        "          sub-02  has: 3\n"
+        "          Outliers:\n"
+        "            sub-03  has: 2\n"
+    ) in summary
+    assert "          .  has: 0\n" in summary
+
+
+def test_create_summary_matches_write_summary(root, stat_dict):
+    stat_builder = StatBuilder(stat_dict, ["file_count"])
+    output = io.StringIO()
+    stat_builder.write_summary(output, root, configurations=None)
+
+    # Only the creation time on the second line may differ
+    expected = output.getvalue().splitlines()
+    summary = stat_builder.create_summary(root, configurations=None).splitlines()
+    assert summary[2:] == expected[2:]
+
+
+def test_top_outliers():
+    outliers = [("a", 5), ("b", 12), ("c", None), ("d", 9)]
+
+    assert top_outliers(outliers, mode=10, count=2) == [("c", None), ("a", 5)]
+
+
+def test_write_summary_size_controls(root, stat_dict):
+    stat_builder = StatBuilder(stat_dict, ["file_count"])
+    stat_dict["file_count"]["sub"][root / "sub-04"] = 0
+    output = io.StringIO()
+
+    stat_builder.write_summary(output, root, configurations=None, max_outliers=1, list_common=False)
+
+    assert (
+        "    In 'sub':\n"
+        "        file_count of 3 found 2 times\n"
+        "          Common: 2 paths\n"
+        "          Outliers: showing 1 of 2, furthest from 3 first\n"
+        "            sub-04  has: 0\n"
+    ) in output.getvalue()
+
+
+def test_write_json_summary(root, stat_dict):
+    stat_builder = StatBuilder(stat_dict, ["file_count"])
+    output = io.StringIO()
+
+    stat_builder.write_json_summary(output, root, configurations=None, max_outliers=1)
+
+    summary = json.loads(output.getvalue())
+    assert summary["measures"]["file_count"]["sub"] == {
+        "mode": 3,
+        "count": 3,
+        "mode_count": 2,
+        "outlier_count": 1,
+        "top_outliers": [{"path": "sub-03", "value": 2}],
+    }
+
+
+def test_top_identifiers():
+    measure_dict = {
+        "empty": {"a": 0, "b": None, "c": 0},
+        "small": {"d": 1},
+        "large": {"e": 1, "f": 2},
+    }
+
+    assert top_identifiers(measure_dict, 2) == ["large", "small"]
+    assert top_identifiers(measure_dict, 5) == ["large", "small"]
+
+
+@pytest.mark.parametrize("figure_per_measure, processes", ([False, 1], [True, 1], [True, 2]))
+def test_create_histograms(root, stat_dict, tmp_path, figure_per_measure, processes):
+    stat_builder = StatBuilder(stat_dict, ["file_count"])
+
+    saved = stat_builder.create_histograms(
+        tmp_path / "plots.png",
+        plots_per_measure=2,
+        figure_per_measure=figure_per_measure,
+        processes=processes,
+    )
+
+    expected = "plots_file_count.png" if figure_per_measure else "plots.png"
+    assert saved == [str(tmp_path / expected)]
+    assert (tmp_path / expected).stat().st_size > 0
+
+
+def test_write_summary_configuration_delta(root, stat_dict):
+    stat_builder = StatBuilder(stat_dict, ["file_count"])
+    configurations = {
+        "sub": [
+            {"structure": ["anat", "dwi"], "paths": ["sub-03"]},
+            {"structure": ["anat", "dwi", "func"], "paths": ["sub-01", "sub-02"]},
+        ]
+    }
+
+    summary = stat_builder.create_summary(root, configurations)
+
+    assert (
+        "     Configuration #1 was found in 2 directories. Contains the following: \n"
+        "            ['anat', 'dwi', 'func']\n"
+        "     Configuration #2 was found in 1 directories. Contains the same as #1 minus "
+        "['func']"
+    ) in summary
+
+
+def test_plotted_measures(root, stat_dict):
+    stat_dict["mode"] = {"sub": {root / "sub-01": "0755", root / "sub-02": None}}
+    stat_builder = StatBuilder(stat_dict, ["file_count", "mode"])
+
+    assert stat_builder.plotted_measures() == ["file_count"]